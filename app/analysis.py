@@ -1,11 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy.cluster import hierarchy
-from scipy.spatial.distance import pdist, squareform
-from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE
-import umap
 from typing import Dict, Tuple
 from itertools import combinations
 from models.review import Review
@@ -174,12 +167,17 @@ def visualize_judgment_vectors(reviewer_data: Dict[str, Dict],
     n_samples, n_features = all_reviewers.shape
     n_components = min(n_components, n_samples, n_features)
     
-    # Perform dimensionality reduction
+    # Perform dimensionality reduction. The plotting and reduction libraries
+    # take seconds to import, so they load here rather than with the module
+    import matplotlib.pyplot as plt
     if plot_type == 'PCA':
+        from sklearn.decomposition import PCA
         reducer = PCA(n_components=n_components, random_state=random_state)
     elif plot_type == 'UMAP':
+        import umap
         reducer = umap.UMAP(n_components=n_components, random_state=random_state)
     elif plot_type == 'TSNE':
+        from sklearn.manifold import TSNE
         reducer = TSNE(n_components=n_components, random_state=random_state)
     else:
         raise ValueError("Invalid plot_type. Choose 'PCA', 'UMAP', or 'TSNE'.")
@@ -226,6 +224,11 @@ def reviewer_similarity_heatmap(reviewer_judgment_vectors, metric='cosine', meth
     :param figsize: Figure size (width, height) in inches
     """
 
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from scipy.cluster import hierarchy
+    from scipy.spatial.distance import pdist, squareform
+
     # 2D array where each row is a reviewer's vector
     judgment_vectors = []
     # List of reviewer labels
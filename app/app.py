@@ -11,6 +11,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.sqlite_database import SqliteDatabase
 from app.config import load_database_uri
 from app.routes import agent_routes, object_routes, task_routes
+from app.task_management import start_job_worker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,9 +26,13 @@ async def lifespan(app: FastAPI):
     # Provide the database instance to the app
     app.state.db = db
 
+    # Run queued tasks, including any left unfinished by a previous server process
+    job_worker = start_job_worker()
+
     yield
 
     # Shutdown
+    job_worker.stop(timeout=5)
     db.close()
 
 app = FastAPI(lifespan=lifespan)
@@ -1,9 +1,12 @@
 import configparser
 import os
+import threading
+
+# Parsed config files keyed by path, with the (mtime, size) they were read at
+_config_cache = {}
+_config_cache_lock = threading.Lock()
 
 def load_config(config_path=None):
-    # Create a ConfigParser object
-    config = configparser.ConfigParser()
     config_path = config_path
     # we can explicitly pass in the config_path, such as in test scripts
     if config_path is None:
@@ -15,9 +18,24 @@ def load_config(config_path=None):
         # default to the home directory
         config_path = os.path.expanduser('~/ae_config/config.ini')
 
+    # Reuse the parsed file until it changes on disk
+    try:
+        stat = os.stat(config_path)
+    except OSError:
+        raise FileNotFoundError(f"Configuration file not found at {config_path}")
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _config_cache_lock:
+        cached = _config_cache.get(config_path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    # Create a ConfigParser object
+    config = configparser.ConfigParser()
     config_files = config.read(config_path)
     if config_files is None or len(config_files) == 0:
         raise FileNotFoundError(f"Configuration file not found at {config_path}")
+    with _config_cache_lock:
+        _config_cache[config_path] = (signature, config)
     return config
 
 def load_database_uri(config_path=None):
@@ -46,6 +64,25 @@ def load_local_server_url(config_path=None):
     local_server_url = config.get('API_KEYS', 'LOCAL_MODEL_HOST', fallback=None)
     return local_server_url
 
+def load_llm_cache_path(config_path=None):
+    config = load_config(config_path=config_path)
+    # Location of the LLM response cache database
+    return config.get('LLM_CACHE', 'PATH', fallback=None)
+
+def load_llm_backends(config_path=None):
+    config = load_config(config_path=config_path)
+    # Extra LLM provider backends, as provider name = module:class
+    if not config.has_section('LLM_BACKENDS'):
+        return {}
+    return dict(config.items('LLM_BACKENDS'))
+
+def load_openai_compatible_server(config_path=None):
+    config = load_config(config_path=config_path)
+    # Base URL (ending in /v1) and optional API key of an OpenAI-compatible
+    # inference server such as vLLM or llama.cpp
+    return (config.get('API_KEYS', 'OPENAI_COMPATIBLE_HOST', fallback=None),
+            config.get('API_KEYS', 'OPENAI_COMPATIBLE_API_KEY', fallback=None))
+
 
 def load_constant_from_config(keys):
     '''
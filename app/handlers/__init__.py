@@ -1,6 +1,9 @@
 from app.handlers.form_handlers import (
     FormSubmissionError,
     format_numeric_values,
+    object_schema,
+    validate_properties,
+    normalize_form_data,
     get_default_properties,
     generate_form,
     handle_form_submission
@@ -11,14 +14,27 @@ from app.handlers.file_handlers import (
     convert_to_csv,
     process_object_links,
     get_link_name,
+    get_link_names,
+    label_object_links,
+    format_object_label,
     handle_hypothesis,
     generate_judgment_space_visualization
 )
 
+from app.handlers.import_handlers import (
+    ImportValidationError,
+    IMPORTABLE_OBJECT_TYPES,
+    validate_import_properties,
+    import_jsonl
+)
+
 __all__ = [
     # Form handlers
     'FormSubmissionError',
     'format_numeric_values',
+    'object_schema',
+    'validate_properties',
+    'normalize_form_data',
     'get_default_properties',
     'generate_form',
     'handle_form_submission',
@@ -28,6 +44,15 @@ __all__ = [
     'convert_to_csv',
     'process_object_links',
     'get_link_name',
+    'get_link_names',
+    'label_object_links',
+    'format_object_label',
     'handle_hypothesis',
-    'generate_judgment_space_visualization'
+    'generate_judgment_space_visualization',
+
+    # Import handlers
+    'ImportValidationError',
+    'IMPORTABLE_OBJECT_TYPES',
+    'validate_import_properties',
+    'import_jsonl'
 ]
@@ -3,9 +3,6 @@ import logging
 from io import StringIO, BytesIO
 import re
 from typing import Dict, List, Tuple, Optional
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
 import base64
 
 from app.sqlite_database import SqliteDatabase
@@ -53,23 +50,53 @@ def convert_to_csv(data: List[List[str]]) -> str:
 def process_object_links(db: SqliteDatabase, properties: Dict, object_specifications: Dict, object_type: str) -> Dict:
     """Process object links in properties, getting names for linked objects."""
     logger.info(f"Processing object links for {object_type}")
-    link_names = {}
+    linked_ids = []
     try:
         for prop_name, prop_spec in object_specifications[object_type]['properties'].items():
             if prop_name not in ['object_id', 'created', 'name'] and prop_name in properties:
                 if prop_spec['view'] == 'object_link':
                     obj_id = properties[prop_name]
                     logger.debug(f"Processing single link for {prop_name}: {obj_id}")
-                    link_names[obj_id] = get_link_name(db, obj_id)
+                    linked_ids.append(obj_id)
                 elif prop_spec['view'] == 'list_of_object_links':
                     logger.debug(f"Processing multiple links for {prop_name}")
-                    for obj_id in properties[prop_name]:
-                        link_names[obj_id] = get_link_name(db, obj_id)
-        return link_names
+                    linked_ids.extend(properties[prop_name])
+        return get_link_names(db, linked_ids)
     except Exception as e:
         logger.error(f"Error processing object links for {object_type}: {str(e)}")
         raise
 
+def get_link_names(db: SqliteDatabase, obj_ids: List[str]) -> Dict[str, str]:
+    """Get the names of several linked objects with a single name lookup."""
+    link_names = {obj_id: get_link_name(db, obj_id) for obj_id in obj_ids if not obj_id}
+    present_ids = [obj_id for obj_id in obj_ids if obj_id]
+    try:
+        names = db.load_names(present_ids)
+    except Exception as e:
+        logger.warning(f"Failed to batch load link names: {str(e)}")
+        return {**link_names, **{obj_id: get_link_name(db, obj_id) for obj_id in present_ids}}
+    for obj_id in present_ids:
+        name, obj_type = names.get(obj_id, (None, None))
+        link_names[obj_id] = _link_name(obj_id, {'name': name} if obj_id in names else None, obj_type)
+    return link_names
+
+def label_object_links(db: SqliteDatabase, objects: List[Dict], link_properties: List[str]) -> List[Dict]:
+    """Label linked object IDs in listed objects as '(name) id', resolving all names in one lookup."""
+    linked_ids = [obj['properties'][prop_name] for obj in objects for prop_name in link_properties
+                  if isinstance(obj['properties'].get(prop_name), str)]
+    names = db.load_names(linked_ids)
+    for obj in objects:
+        for prop_name in link_properties:
+            obj_id = obj['properties'].get(prop_name)
+            name, _ = names.get(obj_id, (None, None)) if isinstance(obj_id, str) else (None, None)
+            if name:
+                obj['properties'][prop_name] = format_object_label(name, obj_id)
+    return objects
+
+def format_object_label(name: str, obj_id: str) -> str:
+    """Format an object reference for display as '(name) id'."""
+    return f"({name}) {obj_id}"
+
 def get_link_name(db: SqliteDatabase, obj_id: str) -> str:
     """Get the name of a linked object."""
     if not obj_id:
@@ -77,19 +104,23 @@ def get_link_name(db: SqliteDatabase, obj_id: str) -> str:
         return "[Missing Link]"
     try:
         linked_object_properties, obj_type = db.load(obj_id)
-        if not linked_object_properties:
-            logger.warning(f"No properties found for object ID: {obj_id}")
-            return f"[Missing {obj_type or 'Object'}: {obj_id}]"
-        name = linked_object_properties.get('name')
-        if not name:
-            logger.warning(f"No name property for object ID: {obj_id}")
-            return f"[Unnamed {obj_type or 'Object'}: {obj_id}]"
-        logger.debug(f"Retrieved name for {obj_id}: {name}")
-        return name
+        return _link_name(obj_id, linked_object_properties, obj_type)
     except Exception as e:
         logger.warning(f"Failed to get link name for {obj_id}: {str(e)}")
         return f"[Invalid Link: {obj_id}]"
 
+def _link_name(obj_id: str, linked_object_properties: Optional[Dict], obj_type: Optional[str]) -> str:
+    """Build the display name for a linked object from its loaded properties."""
+    if not linked_object_properties:
+        logger.warning(f"No properties found for object ID: {obj_id}")
+        return f"[Missing {obj_type or 'Object'}: {obj_id}]"
+    name = linked_object_properties.get('name')
+    if not name:
+        logger.warning(f"No name property for object ID: {obj_id}")
+        return f"[Unnamed {obj_type or 'Object'}: {obj_id}]"
+    logger.debug(f"Retrieved name for {obj_id}: {name}")
+    return name
+
 def handle_hypothesis(properties: Dict) -> Dict:
     """Process hypothesis text to validate gene symbols."""
     logger.info("Processing hypothesis text")
@@ -117,6 +148,11 @@ def generate_judgment_space_visualization(judgment_space: JudgmentSpace) -> Tupl
     if not judgment_space.review_sets:
         return None, None
 
+    # Plotting libraries are slow to import, so they load on the first visualization
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import numpy as np
+
     try:
         judgment_space.generate_reviewer_judgment_dict()
         data = np.array(list(judgment_space.reviewer_judgment_dict.values()))
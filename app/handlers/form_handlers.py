@@ -10,6 +10,7 @@ from fastapi import HTTPException
 from jsonschema import validate, ValidationError
 
 from app.sqlite_database import SqliteDatabase
+from app.handlers.file_handlers import format_object_label
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -33,6 +34,48 @@ def format_numeric_values(data: List[List[str]]) -> List[List[str]]:
                     continue
     return data
 
+# JSON Schema for each property type of the object specifications
+PROPERTY_TYPE_SCHEMAS = {
+    "string": {"type": "string"},
+    "object_id": {"type": "string"},
+    # CSV text, or a table as a list of rows as in exported objects
+    "csv": {"type": ["string", "array"], "items": {"type": "array"}},
+    "int": {"type": "integer"},
+    "float": {"type": "number"},
+    "boolean": {"type": "boolean"},
+    "list_of_object_ids": {"type": "array", "items": {"type": "string"}},
+    "array": {"type": "array"},
+    "object": {"type": "object"},
+}
+
+def object_schema(object_type: str, specifications: Dict) -> Dict:
+    """Build the JSON Schema for an object type's properties from its specification. Any property may be null."""
+    properties = {}
+    for field_name, field_spec in specifications[object_type]["properties"].items():
+        schema = PROPERTY_TYPE_SCHEMAS.get(field_spec.get("type"))
+        if schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            properties[field_name] = {**schema, "type": types + ["null"]}
+    return {"type": "object", "properties": properties}
+
+def validate_properties(properties: Dict, object_type: str, specifications: Dict):
+    """Validate JSON properties against the object type's schema, raising jsonschema's ValidationError."""
+    validate(instance=properties, schema=object_schema(object_type, specifications))
+
+def format_csv_data(csv_content: str) -> str:
+    """Format the numeric values in CSV text to 2 decimal places."""
+    rows = list(csv.reader(StringIO(csv_content)))
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerows(format_numeric_values(rows))
+    return output.getvalue()
+
+def normalize_form_data(form_data: Dict, object_type: str) -> Dict:
+    """Normalize submitted properties the way they are stored: dataset CSV numbers to 2 decimal places."""
+    if object_type == "dataset" and isinstance(form_data.get("data"), str):
+        form_data["data"] = format_csv_data(form_data["data"])
+    return form_data
+
 def get_default_properties(object_type: str, specifications: Dict) -> Dict:
     """Get default properties for an object type from specifications."""
     logger.info(f"Getting default properties for {object_type}")
@@ -64,13 +107,12 @@ def generate_form(db: SqliteDatabase, object_type: str, specifications: Dict, ob
             if (field_spec.get("input_type", "") == "select_single_object" 
                 or field_spec.get("input_type", "") == "select_multiple_objects"):
                 field_object_type = field_spec.get("object_type", "")
-                field_objects = db.find(field_object_type)
+                field_objects = db.find(field_object_type, fields=["name"])
                 option_dicts = []
                 for field_object in field_objects:
                     field_obj_id = field_object['object_id']
-                    field_obj_name = field_object['properties']['name'] if 'name' in field_object['properties'] else "unnamed"
-                    field_obj_name = field_obj_name if len(field_obj_name) > 0 else "unnamed"
-                    option_label = f"({field_obj_name}) {field_obj_id}"
+                    field_obj_name = field_object['properties']['name'] or "unnamed"
+                    option_label = format_object_label(field_obj_name, field_obj_id)
                     option_dicts.append({"label": option_label, "value": field_obj_id})
                     
                 field_spec["options"] = option_dicts
@@ -109,30 +151,14 @@ async def handle_form_submission(form_data: Dict, object_type: str, db: SqliteDa
         csv_file = form_data.pop('data', None) if object_type == "dataset" else None
         if csv_file:
             logger.info("Processing CSV file for dataset")
-        if csv_file:
-            print("File:", csv_file)
             if (csv_file != "undefined"):
                 if isinstance(csv_file, StringIO):
                     # This is the case when uploading a csv file into a dataset object
-                    csv_content = csv_file.read()
+                    form_data['data'] = csv_file.read()
                 else:
                     # This is the case when importing a dataset object
-                    csv_content = csv_file
-                print("Content", csv_content)
-                
-                # Process the CSV content
-                csv_data = StringIO(csv_content)
-                reader = csv.reader(csv_data)
-                rows = list(reader)
-
-                # Format numeric values in CSV content
-                formatted_rows = format_numeric_values(rows)
-
-                # Convert back to CSV string
-                output = StringIO()
-                writer = csv.writer(output)
-                writer.writerows(formatted_rows)
-                form_data['data'] = output.getvalue()
+                    form_data['data'] = csv_file
+        normalize_form_data(form_data, object_type)
         
         if form_data.get("object_id"):
             logger.info(f"Updating object {form_data['object_id']}")
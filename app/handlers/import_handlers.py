@@ -0,0 +1,111 @@
+import json
+import logging
+from typing import AsyncIterator, Dict, List, Tuple
+
+from jsonschema import ValidationError
+
+from app.sqlite_database import SqliteDatabase
+from app.handlers.file_handlers import convert_to_csv
+from app.handlers.form_handlers import validate_properties, normalize_form_data
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+IMPORTABLE_OBJECT_TYPES = ("dataset", "hypothesis", "agent", "llm")
+
+# Properties set by the database on import rather than taken from the file
+ASSIGNED_PROPERTIES = ("object_id", "created")
+
+class ImportValidationError(Exception):
+    """Raised when an imported object does not match its object specification."""
+    def __init__(self, message):
+        self.message = message
+        super().__init__(self.message)
+
+def validate_import_properties(properties: Dict, object_type: str, object_specifications: Dict) -> Dict:
+    """Check an imported object against its specification and fill in defaults.
+
+    Objects are validated against the same schema and normalized the same way
+    as objects submitted through forms, so that an imported object matches
+    one created in the web app.
+    """
+    if not isinstance(properties, dict):
+        raise ImportValidationError(f"Expected a JSON object, got {type(properties).__name__}")
+
+    properties = {key: value for key, value in properties.items() if key not in ASSIGNED_PROPERTIES}
+    try:
+        validate_properties(properties, object_type, object_specifications)
+    except ValidationError as e:
+        path = ".".join(str(part) for part in e.absolute_path)
+        raise ImportValidationError(f"'{path}': {e.message}" if path else e.message)
+    for prop_name, prop_spec in object_specifications[object_type]["properties"].items():
+        if prop_name not in properties:
+            if "default" in prop_spec:
+                properties[prop_name] = prop_spec["default"]
+        elif prop_spec.get("type") == "csv" and isinstance(properties[prop_name], list):
+            # Exported objects hold tables as lists of rows
+            properties[prop_name] = convert_to_csv(properties[prop_name])
+    return normalize_form_data(properties, object_type)
+
+async def iterate_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """Split a stream of byte chunks into (line_number, text) pairs without reading it all into memory."""
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line.decode("utf-8", errors="replace")
+    if buffer:
+        yield line_number + 1, buffer.decode("utf-8", errors="replace")
+
+async def import_jsonl(db: SqliteDatabase, object_type: str, chunks: AsyncIterator[bytes],
+                       object_specifications: Dict, batch_size: int = SqliteDatabase.BATCH_SIZE) -> Dict:
+    """Import one object per JSONL line, inserting valid objects in batched transactions.
+
+    Invalid lines, and objects whose name is already used by an object of the
+    same type or by an earlier line, are skipped and reported with their line
+    number; they do not stop the rest of the file from being imported.
+    """
+    logger.info(f"Importing JSONL objects of type {object_type}")
+    object_ids: List[str] = []
+    errors: List[Dict] = []
+    batch: List[Tuple[int, Dict]] = []
+    names = set()
+
+    def flush():
+        if not batch:
+            return
+        try:
+            added = db.add_many([properties for _, properties in batch], object_type)
+            object_ids.extend(object_id for object_id, _, _ in added)
+        except Exception as e:
+            logger.error(f"Failed to insert import batch for {object_type}: {str(e)}")
+            errors.extend({"line": line_number, "error": str(e)} for line_number, _ in batch)
+        batch.clear()
+
+    async for line_number, line in iterate_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            properties = validate_import_properties(json.loads(line), object_type, object_specifications)
+        except json.JSONDecodeError as e:
+            errors.append({"line": line_number, "error": f"Invalid JSON: {e.msg}"})
+            continue
+        except ImportValidationError as e:
+            errors.append({"line": line_number, "error": e.message})
+            continue
+        name = properties.get("name")
+        if name:
+            if name in names or not db.name_is_unique(name, object_type):
+                errors.append({"line": line_number, "error": f"Name '{name}' is already used by another {object_type}"})
+                continue
+            names.add(name)
+        batch.append((line_number, properties))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    logger.info(f"Imported {len(object_ids)} {object_type} objects with {len(errors)} errors")
+    return {"object_type": object_type, "imported": len(object_ids), "object_ids": object_ids, "errors": errors}
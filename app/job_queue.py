@@ -0,0 +1,245 @@
+import json
+import time
+import uuid
+import socket
+import logging
+import threading
+import traceback
+
+from app.sqlite_database import get_connection_pool
+
+logger = logging.getLogger(__name__)
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+class JobQueue:
+    """ Durable job queue stored in a jobs table of the SQLite database
+
+    Jobs survive restarts and can be claimed by workers in any number of
+    processes. A claimed job is leased to its worker for lease_seconds; the
+    worker renews the lease while it runs, and a job whose lease runs out
+    (because its worker died) is claimed again by the next worker. Failed jobs
+    are retried with exponential backoff; either way a job makes at most
+    max_attempts attempts.
+    Higher priority jobs are claimed first, then older jobs.
+    """
+
+    LEASE_SECONDS = 60
+    RETRY_BACKOFF = 10
+
+    def __init__(self, uri):
+        self.uri = uri
+        self.pool = get_connection_pool(uri)
+        with self.pool.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL DEFAULT 3,
+                    run_after REAL NOT NULL,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    completed_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_queue ON jobs (status, priority DESC, created_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_events (
+                    event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, event_id)")
+
+    def enqueue(self, kind, payload=None, priority=0, max_attempts=3, job_id=None):
+        """ Add a job and return its job_id """
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        with self.pool.transaction() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, kind, payload, status, priority, max_attempts, run_after, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload or {}), PENDING, priority, max_attempts, now, now))
+        return job_id
+
+    def claim(self, worker_id, kinds=None, lease_seconds=None):
+        """ Lease the next ready job to worker_id, or return None if there is none
+
+        A job is ready when it is pending and its retry delay has passed, or when
+        it is running but its lease has expired. Reclaiming a job counts as an
+        attempt, so a job whose lease expired on its last attempt (one that keeps
+        killing its worker) is failed instead of being claimed again.
+        """
+        now = time.time()
+        lease_seconds = lease_seconds or self.LEASE_SECONDS
+        kind_filter = f" AND kind IN ({', '.join('?' * len(kinds))})" if kinds else ""
+        query = (f"SELECT job_id FROM jobs WHERE ((status = '{PENDING}' AND run_after <= ?) "
+                 f"OR (status = '{RUNNING}' AND lease_expires < ?)){kind_filter}")
+        params = [now, now] + list(kinds or [])
+        query += " ORDER BY priority DESC, created_at LIMIT 1"
+        with self.pool.transaction() as conn:
+            conn.execute(
+                f"UPDATE jobs SET status = '{FAILED}', error = 'Lease expired on the last attempt', "
+                "completed_at = ?, lease_owner = NULL, lease_expires = NULL "
+                f"WHERE status = '{RUNNING}' AND lease_expires < ? AND attempts >= max_attempts{kind_filter}",
+                [now, now] + list(kinds or []))
+            # A single UPDATE ... RETURNING, so two workers can never claim the same job
+            row = conn.execute(
+                f"UPDATE jobs SET status = '{RUNNING}', lease_owner = ?, lease_expires = ?, "
+                f"attempts = attempts + 1, started_at = ?, error = NULL WHERE job_id = ({query}) "
+                "RETURNING job_id, kind, payload, attempts, max_attempts",
+                [worker_id, now + lease_seconds, now] + params).fetchone()
+        if row is None:
+            return None
+        return {"job_id": row[0], "kind": row[1], "payload": json.loads(row[2]),
+                "attempts": row[3], "max_attempts": row[4]}
+
+    def renew_lease(self, job_id, worker_id, lease_seconds=None):
+        """ Extend a running job's lease; returns False if worker_id no longer holds it """
+        lease_seconds = lease_seconds or self.LEASE_SECONDS
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND lease_owner = ? AND status = '{RUNNING}'",
+                (time.time() + lease_seconds, job_id, worker_id))
+            return cursor.rowcount > 0
+
+    def complete(self, job_id, worker_id, result=None):
+        """ Mark a job completed with a JSON serializable result """
+        with self.pool.transaction() as conn:
+            conn.execute(
+                f"UPDATE jobs SET status = '{COMPLETED}', result = ?, completed_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL WHERE job_id = ? AND lease_owner = ?",
+                (json.dumps(result), time.time(), job_id, worker_id))
+
+    def fail(self, job_id, worker_id, error):
+        """ Record a failed attempt: retry later with backoff, or fail for good after max_attempts """
+        now = time.time()
+        with self.pool.transaction() as conn:
+            row = conn.execute("SELECT attempts, max_attempts FROM jobs WHERE job_id = ? AND lease_owner = ?",
+                               (job_id, worker_id)).fetchone()
+            if row is None:
+                return
+            attempts, max_attempts = row
+            if attempts < max_attempts:
+                conn.execute(
+                    f"UPDATE jobs SET status = '{PENDING}', error = ?, run_after = ?, lease_owner = NULL, "
+                    "lease_expires = NULL WHERE job_id = ?",
+                    (error, now + self.RETRY_BACKOFF * 2 ** (attempts - 1), job_id))
+            else:
+                conn.execute(
+                    f"UPDATE jobs SET status = '{FAILED}', error = ?, completed_at = ?, lease_owner = NULL, "
+                    "lease_expires = NULL WHERE job_id = ?",
+                    (error, now, job_id))
+
+    def add_event(self, job_id, event):
+        """ Record a progress event (a JSON serializable dictionary) for a job """
+        with self.pool.transaction() as conn:
+            conn.execute("INSERT INTO job_events (job_id, event, created_at) VALUES (?, ?, ?)",
+                         (job_id, json.dumps(event), time.time()))
+
+    def events(self, job_id, after=0):
+        """ Return a job's progress events with event_id greater than after, oldest first
+
+        Returns a list of (event_id, event) tuples.
+        """
+        with self.pool.transaction() as conn:
+            rows = conn.execute("SELECT event_id, event FROM job_events WHERE job_id = ? AND event_id > ? "
+                                "ORDER BY event_id", (job_id, after)).fetchall()
+        return [(event_id, json.loads(event)) for event_id, event in rows]
+
+    def get(self, job_id):
+        """ Return a job as a dictionary, or None if it does not exist """
+        with self.pool.transaction() as conn:
+            cursor = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+            row = cursor.fetchone()
+            columns = [description[0] for description in cursor.description]
+        if row is None:
+            return None
+        job = dict(zip(columns, row))
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+        return job
+
+
+class JobWorker:
+    """ Runs jobs from a JobQueue in background threads
+
+    handlers maps a job kind to a function called with the job's payload and a
+    report function that records a progress event for the job. The handler's
+    return value is stored as the job result and an exception fails the
+    attempt. Run one worker per process; all of them share the queue.
+    """
+
+    def __init__(self, queue, handlers, concurrency=1, poll_interval=1.0, worker_id=None):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.concurrency):
+            thread = threading.Thread(target=self.run, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def run(self):
+        """ Claim and run jobs until stop() is called """
+        while not self._stop.is_set():
+            try:
+                if not self.run_next():
+                    self._stop.wait(self.poll_interval)
+            except Exception as e:
+                logger.error(f"Job worker {self.worker_id} error: {str(e)}")
+                self._stop.wait(self.poll_interval)
+
+    def run_next(self):
+        """ Run one job if one is ready; returns whether a job was run """
+        job = self.queue.claim(self.worker_id, kinds=list(self.handlers))
+        if job is None:
+            return False
+        logger.info(f"Worker {self.worker_id} running {job['kind']} job {job['job_id']} (attempt {job['attempts']})")
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job["job_id"], heartbeat_stop), daemon=True)
+        heartbeat.start()
+        try:
+            report = lambda event: self.queue.add_event(job["job_id"], event)
+            result = self.handlers[job["kind"]](job["payload"], report)
+            self.queue.complete(job["job_id"], self.worker_id, result)
+        except Exception as e:
+            logger.error(f"Job {job['job_id']} failed: {str(e)}")
+            logger.error(f"Error traceback: {traceback.format_exc()}")
+            self.queue.fail(job["job_id"], self.worker_id, str(e))
+        finally:
+            heartbeat_stop.set()
+            heartbeat.join()
+        return True
+
+    def _heartbeat(self, job_id, stop):
+        # Renew the lease well before it expires so a live job is never reclaimed
+        while not stop.wait(self.queue.LEASE_SECONDS / 3):
+            if not self.queue.renew_lease(job_id, self.worker_id):
+                return
@@ -1,18 +1,15 @@
 import logging
 import time
-import uuid
 from datetime import datetime
 from typing import Dict, Optional
 import traceback
 
 from fastapi import APIRouter, HTTPException, Request, Body
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from app.sqlite_database import SqliteDatabase
-from app.config import load_database_uri
-from app.task_management import TaskStatus, TaskInfo, tasks, agent_executor, run_agent_task
+from app.task_management import TaskStatus, get_job_queue
 from models.agent import Agent
-from models.json_object import Json
+from helpers.sse import format_sse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,26 +39,14 @@ async def start_run_agent(
         JSONResponse containing the task ID
     """
     try:
-        # Create new task immediately
-        task_id = str(uuid.uuid4())
-        tasks[task_id] = TaskInfo(
-            id=task_id,
-            status=TaskStatus.PENDING,
-            created_at=datetime.now(),
-            result={"store_result": store_result}  # Store the flag in task info
-        )
-        
-        # Submit task to thread pool
-        agent_executor.submit(
-            run_agent_task,
-            task_id=task_id,
-            db=SqliteDatabase(load_database_uri()),  # Create new db connection for thread
-            agent_id=agent_id,
-            dataset_id=dataset_id,
-            json_object_id=json_object_id,
-            properties=properties,
-            store_result=store_result
-        )
+        # Queue the task; it survives restarts and runs on any job worker
+        task_id = get_job_queue().enqueue("run_agent", {
+            "agent_id": agent_id,
+            "dataset_id": dataset_id,
+            "json_object_id": json_object_id,
+            "properties": properties,
+            "store_result": store_result
+        })
         
         # Return task ID immediately as proper JSON
         return JSONResponse(content={"task_id": task_id})
@@ -80,32 +65,28 @@ async def get_task_status(task_id: str):
         
     Returns:
         JSONResponse containing task status and result if complete.
-        If task.result["store_result"] is True, creates a new JSON object in database
-        and returns its ID. Otherwise returns the result directly.
+        If the task was started with store_result, the result was saved as a new
+        JSON object when the task completed and its ID is returned. Otherwise
+        returns the result directly.
     """
-    task = tasks.get(task_id)
-    if not task:
+    task = get_job_queue().get(task_id)
+    # Analysis and review jobs are reported by /jobs/{job_id}
+    if not task or task["kind"] != "run_agent":
         raise HTTPException(status_code=404, detail="Task not found")
         
     response = {
-        "task_id": task.id,
-        "status": task.status.value,
-        "created_at": task.created_at.isoformat() if task.created_at else None,
-        "completed_at": task.completed_at.isoformat() if task.completed_at else None
+        "task_id": task["job_id"],
+        "status": task["status"],
+        "attempts": task["attempts"],
+        "created_at": datetime.fromtimestamp(task["created_at"]).isoformat(),
+        "completed_at": datetime.fromtimestamp(task["completed_at"]).isoformat() if task["completed_at"] else None
     }
     
-    if task.status == TaskStatus.COMPLETED:
-        if task.result.get("store_result", False):
-            # Create new JSON object in database
-            db = SqliteDatabase(load_database_uri())
-            json_obj = Json(db)
-            json_obj.create(task.result["result"])  # The actual result is nested
-            response["result"] = {"json_id": json_obj.object_id}
-        else:
-            # Return result directly
-            response["result"] = task.result["result"]
-    elif task.status == TaskStatus.FAILED:
-        response["error"] = task.error
+    if task["status"] == TaskStatus.COMPLETED.value:
+        # A stored result was saved as a JSON object when the task completed
+        response["result"] = task["result"]["result"]
+    elif task["status"] == TaskStatus.FAILED.value or task["error"]:
+        response["error"] = task["error"]
         
     # Return as proper JSON response with explicit headers
     return JSONResponse(
@@ -179,3 +160,41 @@ async def run_agent(
         logger.error(f"Unexpected error in run_agent after {elapsed_time:.2f} seconds: {str(e)}")
         logger.error(f"Error traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Error running agent: {str(e)}")
+
+@router.post("/{agent_id}/run_stream")
+async def run_agent_stream(
+    agent_id: str,
+    request: Request,
+    dataset_id: Optional[str] = None,
+    json_object_id: Optional[str] = None,
+    properties: Optional[Dict] = Body(None)
+) -> StreamingResponse:
+    """Run an agent, streaming its output as Server-Sent Events while the LLM generates it.
+    
+    Takes the same arguments as run_agent. Each piece of output text is sent as a
+    "token" event with data {"text": ...}. The parsed result that run_agent would
+    return follows as a "result" event, or an "error" event with {"detail": ...}
+    if the run fails.
+    """
+    agent = Agent.load(request.app.state.db, agent_id)
+    if not agent:
+        raise HTTPException(status_code=404, detail="Agent not found")
+
+    # A plain generator: Starlette iterates it in a worker thread, so the
+    # blocking provider stream never holds up the event loop
+    def events():
+        start_time = time.time()
+        stream = agent.run_stream(properties=properties, dataset_id=dataset_id, json_object_id=json_object_id)
+        try:
+            while True:
+                yield format_sse("token", {"text": next(stream)})
+        except StopIteration as finished:
+            logger.info(f"Agent {agent_id} stream completed in {time.time() - start_time:.2f} seconds")
+            yield format_sse("result", finished.value)
+        except Exception as e:
+            logger.error(f"Error streaming agent {agent_id}: {str(e)}")
+            logger.error(f"Error traceback: {traceback.format_exc()}")
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -1,19 +1,15 @@
 import logging
 import json
-import asyncio
-import functools
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException, Request, Query, Body
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 
 from app.view_edit_specs import object_specifications
 from app.sqlite_database import SqliteDatabase
-from app.config import load_database_uri
 from models.analysis_plan import AnalysisPlan
 from models.review_plan import ReviewPlan
-from services.analysisrunner import AnalysisRunner
-from services.reviewrunner import ReviewRunner
+from app.task_management import get_job_queue
 from app.handlers.form_handlers import (
     generate_form,
     handle_form_submission,
@@ -23,10 +19,12 @@ from app.handlers.form_handlers import (
 from app.handlers.file_handlers import (
     preprocess_properties,
     process_object_links,
+    label_object_links,
     handle_hypothesis,
     generate_judgment_space_visualization,
     convert_to_csv
 )
+from app.handlers.import_handlers import import_jsonl, IMPORTABLE_OBJECT_TYPES
 from models.judgment_space import JudgmentSpace
 from helpers.json_to_markdown import json_to_markdown
 
@@ -67,51 +65,70 @@ async def return_object_specs(request: Request):
         logger.error(f"Error returning object specifications: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get object specifications: {str(e)}")
 
+def sortable_fields(object_type: str) -> List[str]:
+    """Properties list views can be sorted by: the spec's properties, the indexed ones and created."""
+    properties = list(object_specifications[object_type]["properties"])
+    return properties + list(SqliteDatabase.INDEXED_PROPERTIES) + ["created"]
+
+def list_view_fields(object_type: str) -> List[str]:
+    """Properties shown in list views: everything in the spec except fields marked list_view False."""
+    properties = object_specifications[object_type]["properties"]
+    fields = [name for name, spec in properties.items() if spec.get("list_view", True)]
+    return fields + ["created"]
+
 @router.get("/objects/{object_type}")
 async def list_objects(
     request: Request, 
     object_type: str,
     limit: Optional[int] = Query(None, ge=1, description="Maximum number of objects to return"),
-    properties_filter: Optional[Dict] = None
+    properties_filter: Optional[Dict] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated properties to return, or * for all properties. Defaults to the list view properties."),
+    offset: Optional[int] = Query(None, ge=0, description="Number of objects to skip"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; continues after that object"),
+    sort: str = Query("created", description="Property to sort by"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="Sort order, asc or desc")
 ):
     logger.info(f"Listing objects of type: {object_type}, filter: {properties_filter}")
     
     db = request.app.state.db
     try:
-        # Handle special case for user objects
-        if object_type == "user":
-            objects = db.find("user", properties_filter)
+        if object_type not in object_specifications:
+            raise HTTPException(status_code=404, detail="Object type not found")
+        if sort not in sortable_fields(object_type):
+            raise HTTPException(status_code=400, detail=f"Cannot sort by {sort}")
+        if fields == "*":
+            projection = None
+        elif fields:
+            projection = [field.strip() for field in fields.split(",") if field.strip()]
         else:
-            if object_type not in object_specifications:
-                raise HTTPException(status_code=404, detail="Object type not found")
-            objects = db.find(object_type, properties_filter)
+            projection = list_view_fields(object_type)
+        objects = db.find(object_type, properties_filter, fields=projection, order_by=sort,
+                          descending=(order == "desc"), limit=limit, offset=offset, after=cursor)
+        total_count = db.count(object_type, properties_filter)
             
-        logger.info(f"Found {len(objects)} objects of type {object_type}")
+        logger.info(f"Found {len(objects)} of {total_count} objects of type {object_type}")
         if len(objects) == 0:
             logger.warning(f"No objects found for type {object_type}")
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Database error fetching {object_type} objects: {str(e)}")
         return {"error": f"Failed to fetch objects: {str(e)}"}
     
+    # Only the objects on this page are decorated, with one name lookup for the page
     if object_type == 'hypothesis':
-        for index, obj in enumerate(objects):
-            if ("agent_id" in obj['properties']):
-                agent_id = obj['properties']['agent_id']
-                agent_properties, agent_type = db.load(agent_id)
-                if agent_properties:
-                    objects[index]['properties']['agent_id'] = f"({agent_properties['name']}) {agent_id}"
+        label_object_links(db, objects, ["agent_id"])
     
-    # Apply limit after hypothesis processing
-    if limit:
-        objects = objects[:limit]
-            
-    objects.reverse()
+    next_cursor = objects[-1]["object_id"] if limit and len(objects) == limit else None
     
     return {
         "object_type": object_type, 
         "objects": objects, 
         "object_spec": object_specifications[object_type],
-        "total_count": len(objects)
+        "total_count": total_count,
+        "next_cursor": next_cursor
     }
 
 @router.get("/objects/{object_type}/{object_id}")
@@ -286,9 +303,23 @@ async def delete_object(request: Request, object_type: str, object_id: str):
     db.remove(object_id)
     return RedirectResponse(url=f"/objects/{object_type}", status_code=303)
 
+def job_handle(job_id: str, url: str) -> Dict:
+    return {"job_id": job_id, "url": url, "status_url": f"/jobs/{job_id}", "events_url": f"/jobs/{job_id}/events"}
+
 @router.post("/objects/{object_type}/{object_id}/execute")
-async def execute_object(request: Request, object_type: str, object_id: str):
-    """Execute a plan object (analysis_plan or review_plan)."""
+async def execute_object(
+    request: Request,
+    object_type: str,
+    object_id: str,
+    parallel: bool = Query(False, description="Run the analysis or reviewer agents concurrently instead of one at a time"),
+    batch: bool = Query(False, description="Submit the agents' queries as provider batch jobs, which cost less but can take hours")
+):
+    """Execute a plan object (analysis_plan or review_plan).
+
+    The run is queued on a job worker and this returns at once with the job
+    handle: url of the new run, status_url to poll and events_url, a
+    Server-Sent Events stream reporting each agent as it finishes.
+    """
     logger.info(f"Executing {object_type} with ID: {object_id}")
     
     if object_type not in ["analysis_plan", "review_plan"]:
@@ -304,17 +335,9 @@ async def execute_object(request: Request, object_type: str, object_id: str):
         except Exception as e:
             return {"error": f"{e}"}
         
-        def execute_analysis_plan(analysis_run_id):
-            uri = load_database_uri()
-            db = SqliteDatabase(uri)
-            runner = AnalysisRunner(db, analysis_run_id)
-            result = runner.run()
-            return result
-        
-        loop = asyncio.get_event_loop()
-        runner_func = functools.partial(execute_analysis_plan, analysis_run.object_id)
-        result = await loop.run_in_executor(None, runner_func)
-        return {"url": f"/objects/{object_type}/{analysis_run.object_id}"}
+        # Run on a job worker; if the server dies the run resumes from its last completed agent
+        job_id = get_job_queue().enqueue("analysis_run", {"analysis_run_id": analysis_run.object_id, "parallel": parallel, "batch": batch})
+        return job_handle(job_id, f"/objects/{object_type}/{analysis_run.object_id}")
     
     elif object_type == "review_plan":
         review_plan = ReviewPlan.load(db, object_id)
@@ -324,17 +347,8 @@ async def execute_object(request: Request, object_type: str, object_id: str):
         except Exception as e:
             return {"error": f"{e}"}
         
-        def execute_review_plan(review_set_id):
-            uri = load_database_uri()
-            db = SqliteDatabase(uri)
-            runner = ReviewRunner(db, review_set_id)
-            result = runner.run()
-            return result
-        
-        loop = asyncio.get_event_loop()
-        runner_func = functools.partial(execute_review_plan, review_set.object_id)
-        result = await loop.run_in_executor(None, runner_func)
-        return {"url": f"/objects/{object_type}/{review_set.object_id}"}
+        job_id = get_job_queue().enqueue("review_set", {"review_set_id": review_set.object_id, "parallel": parallel, "batch": batch})
+        return job_handle(job_id, f"/objects/{object_type}/{review_set.object_id}")
     
     else:
         raise HTTPException(
@@ -370,3 +384,31 @@ async def import_object(request: Request, object_type: str):
             return HTMLResponse(content="<h1>Unexpected Error</h1><p>Something went wrong.</p>", status_code=500)
         
     return {"error": "Something went wrong"}
+
+@router.post("/objects/{object_type}/import_jsonl")
+async def import_objects_jsonl(request: Request, object_type: str):
+    """Bulk import objects from JSONL, one JSON object per line.
+
+    The body can be the raw JSONL (application/x-ndjson) or a multipart form with
+    the file in a 'jsonl' field. Lines are parsed as they arrive.
+    """
+    if object_type not in IMPORTABLE_OBJECT_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Bulk import not supported for object type: {object_type}"
+        )
+    db = request.app.state.db
+
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form_data = await request.form()
+        jsonl_file = form_data.get("jsonl")
+        if jsonl_file is None or isinstance(jsonl_file, str):
+            raise HTTPException(status_code=400, detail="No 'jsonl' file in form data")
+
+        async def chunks():
+            while chunk := await jsonl_file.read(65536):
+                yield chunk
+    else:
+        chunks = request.stream
+
+    return await import_jsonl(db, object_type, chunks(), object_specifications)
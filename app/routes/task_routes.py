@@ -1,20 +1,51 @@
 import logging
-import asyncio
-import functools
-from typing import Dict
+from datetime import datetime
+from typing import Dict, Optional
 
-from fastapi import APIRouter, HTTPException, Request
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
 
-from app.sqlite_database import SqliteDatabase
-from app.config import load_database_uri
-from models.analysis_plan import AnalysisPlan
-from models.review_plan import ReviewPlan
-from services.analysisrunner import AnalysisRunner
-from services.reviewrunner import ReviewRunner
+from app.task_management import get_job_queue, follow_job
+from helpers.sse import format_sse
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["tasks"])
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str) -> Dict:
+    """Get the status of a queued job, with its result or error once it has finished."""
+    job = get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "created_at": datetime.fromtimestamp(job["created_at"]).isoformat(),
+        "completed_at": datetime.fromtimestamp(job["completed_at"]).isoformat() if job["completed_at"] else None,
+        "result": job["result"],
+        "error": job["error"]
+    }
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, last_event_id: Optional[int] = Header(None)):
+    """Stream a job's progress as Server-Sent Events.
+
+    Each agent that finishes is sent as a "progress" event whose data is a JSON
+    object with agent_id, status, message and total. A final "done" event carries
+    the job's status, result and error, after which the stream ends. A client
+    that reconnects with a Last-Event-ID header resumes after that event.
+    """
+    if not get_job_queue().get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        async for event_id, event in follow_job(job_id, after=last_event_id or 0):
+            yield format_sse("progress" if "agent_id" in event else "done", event, event_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
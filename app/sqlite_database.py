@@ -1,22 +1,142 @@
 import json
+import re
 import sqlite3
 import datetime
+import hashlib
+import threading
 import uuid
+from contextlib import contextmanager
+
+class ConnectionPool:
+    """ A thread-safe pool of reusable SQLite connections for a single database URI.
+
+    Connections are opened lazily, configured once with WAL journaling and tuned
+    pragmas, and returned to the pool after each unit of work instead of being
+    closed. Any thread may check out any idle connection, so a connection is
+    never used by two threads at the same time but can move between threads.
+    """
+
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL",
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA busy_timeout=30000",
+        "PRAGMA temp_store=MEMORY",
+        "PRAGMA cache_size=-16000",
+    )
+
+    def __init__(self, uri, max_idle=8):
+        self.uri = uri
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.uri, timeout=30, check_same_thread=False)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        """ Take an idle connection from the pool, or open a new one. """
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, conn):
+        """ Return a connection to the pool, closing it if the pool is full. """
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """ Check out a connection for one transaction.
+
+        The transaction is committed when the block exits normally and rolled back
+        if it raises; either way the connection goes back to the pool.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """ Close all idle connections. Checked-out connections return to the pool as usual. """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+# Property names that may be used to filter or sort; they are written into SQL
+PROPERTY_KEY_PATTERN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+# Prefix of the string stored in place of a property whose content lives in the blobs table
+BLOB_REF_PREFIX = "blob:sha256:"
+
+def is_blob_ref(value):
+    """ Check whether a property value is a reference to content in the blobs table """
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+class StaleObjectError(Exception):
+    """ Raised when an update expects a version of an object that has since been changed """
+
+# One pool per database URI, shared by every SqliteDatabase opened on that URI
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_connection_pool(uri):
+    """ Get the shared connection pool for a database URI, creating it on first use. """
+    with _pools_lock:
+        pool = _pools.get(uri)
+        if pool is None:
+            pool = ConnectionPool(uri)
+            _pools[uri] = pool
+        return pool
 
 class SqliteDatabase:
+    # Maximum number of object_ids bound in a single "IN (...)" query
+    BATCH_SIZE = 500
+
+    # Maximum number of properties set by one json_set call in a partial update
+    PATCH_CHUNK_SIZE = 50
+
+    # Large text properties stored once in the blobs table, keyed by SHA-256 hash,
+    # with only the reference kept in the properties JSON
+    BLOB_PROPERTIES = ("data", "dataset_copy", "full_prompt", "hypotheses_text")
+
+    # Text shorter than this stays inline in the properties JSON
+    BLOB_MIN_SIZE = 1024
+
+    # Frequently filtered properties, each backed by a virtual generated column and an index
+    INDEXED_PROPERTIES = ("name", "analysis_run_id", "review_set_id", "agent_id", "analysis_plan_id", "status")
+
     def __init__(self, uri):
         self.uri = uri
-        # Create initial connection to set up tables
+        self.pool = get_connection_pool(uri)
+        # Set up tables on the first pooled connection
         with self._get_connection() as conn:
             self._create_tables(conn)
+            self._migrate(conn)
+            self.property_columns = self._get_property_columns(conn)
+            self.has_created_at = any(row[1] == "created_at" for row in conn.execute("PRAGMA table_xinfo(nodes)"))
 
     def _get_connection(self):
-        """Get a new connection for the current thread."""
-        return sqlite3.connect(self.uri)
+        """ Check out a pooled connection for one transaction (see ConnectionPool.transaction). """
+        return self.pool.transaction()
 
     def close(self):
-        """No-op since we don't maintain persistent connections."""
-        pass
+        """ Close the idle pooled connections for this database URI. """
+        self.pool.close()
 
     def serialize_properties(self, properties):
         """ Serialize the entire properties dictionary to a JSON string before storing in the database. """
@@ -37,6 +157,107 @@ class SqliteDatabase:
         """
         conn.execute(query)
 
+    def _migrate(self, conn):
+        """ Apply schema migrations newer than the version recorded in PRAGMA user_version.
+
+        The migrations run inside one immediate transaction so that concurrent
+        processes opening the same database apply each migration only once.
+        """
+        migrations = [
+            self._add_property_columns,
+            self._add_name_index,
+            self._add_version_column,
+            self._add_blobs_table,
+            self._add_created_at_column,
+            self._add_created_at_rowid_index,
+        ]
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for target_version, migration in enumerate(migrations, start=1):
+            if version < target_version:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {target_version}")
+
+    def _add_property_columns(self, conn):
+        """ Migration 1: index object_type and add indexed generated columns for hot properties """
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_nodes_object_type ON nodes (object_type)")
+        existing_columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(nodes)")}
+        for key in self.INDEXED_PROPERTIES:
+            column = f"prop_{key}"
+            if column not in existing_columns:
+                # Guard with json_valid so a malformed row cannot break the index build
+                conn.execute(f"""
+                    ALTER TABLE nodes ADD COLUMN {column} GENERATED ALWAYS AS
+                    (CASE WHEN json_valid(properties) THEN json_extract(properties, '$.{key}') END) VIRTUAL
+                """)
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_nodes_{column} ON nodes (object_type, {column})")
+
+    def _add_name_index(self, conn):
+        """ Migration 2: index names across object types for name lookups that are not type scoped """
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_nodes_name ON nodes (prop_name)")
+
+    def _add_version_column(self, conn):
+        """ Migration 3: add the version counter used for optimistic concurrency control """
+        existing_columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(nodes)")}
+        if "version" not in existing_columns:
+            conn.execute("ALTER TABLE nodes ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _add_blobs_table(self, conn):
+        """ Migration 4: add the content-addressed blobs table """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                content TEXT NOT NULL
+            )
+        """)
+
+    def _add_created_at_column(self, conn):
+        """ Migration 5: add an indexed, sortable creation timestamp
+
+        The created property is stored as '%m.%d.%Y %H:%M:%S', which does not sort
+        by time, so the generated column rewrites it as 'YYYY-MM-DD HH:MM:SS'.
+        """
+        existing_columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(nodes)")}
+        if "created_at" not in existing_columns:
+            created = "json_extract(properties, '$.created')"
+            conn.execute(f"""
+                ALTER TABLE nodes ADD COLUMN created_at GENERATED ALWAYS AS (
+                    CASE
+                        WHEN NOT json_valid(properties) THEN NULL
+                        WHEN {created} GLOB '[0-9][0-9].[0-9][0-9].[0-9][0-9][0-9][0-9]*'
+                            THEN substr({created}, 7, 4) || '-' || substr({created}, 1, 2) || '-' ||
+                                 substr({created}, 4, 2) || substr({created}, 11)
+                        ELSE {created}
+                    END
+                ) VIRTUAL
+            """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_nodes_created_at ON nodes (object_type, created_at, object_id)")
+
+    def _add_created_at_rowid_index(self, conn):
+        """ Migration 6: index created_at ahead of the rowid, the tiebreaker of sorted listings
+
+        Objects added together by add_many share one created timestamp, and
+        rowids follow insertion order where random object_ids do not.
+        """
+        conn.execute("DROP INDEX IF EXISTS idx_nodes_created_at")
+        conn.execute("CREATE INDEX idx_nodes_created_at ON nodes (object_type, created_at)")
+
+    def _get_property_columns(self, conn):
+        """ Map property keys to the generated columns that exist in the nodes table """
+        existing_columns = {row[1] for row in conn.execute("PRAGMA table_xinfo(nodes)")}
+        return {key: f"prop_{key}" for key in self.INDEXED_PROPERTIES if f"prop_{key}" in existing_columns}
+
+    def _property_expression(self, key):
+        """ SQL expression for a property value, using its generated column when there is one
+
+        The key is written into the SQL, so only plain property names are accepted.
+        """
+        if key in self.property_columns:
+            return self.property_columns[key]
+        if not PROPERTY_KEY_PATTERN.fullmatch(key):
+            raise ValueError(f"Invalid property name: {key!r}")
+        return f"json_extract(properties, '$.{key}')"
+
     def add(self, object_id=None, properties=None, object_type="node"):
         """ Add a new node to the database """
         if properties is None:
@@ -47,24 +268,32 @@ class SqliteDatabase:
         else:
             object_id = object_id
 
-        properties_json = self.serialize_properties(properties)
         try:
             with self._get_connection() as conn:
+                properties_json = self.serialize_properties(self._store_blobs(conn, properties))
                 self._create_node_sql(conn, object_id, properties_json, object_type)
-            return object_id, self.deserialize_properties(properties_json), object_type
+            return object_id, dict(properties), object_type
         except Exception as e:
             raise Exception(f"Database_Object: Failed to add object to the SQL database. {e}")
 
-    def load(self, object_id):
-        """ Load a node from the database by its ID """
+    def load(self, object_id, resolve_blobs=True, with_version=False):
+        """ Load a node from the database by its ID
+
+        Blob references in BLOB_PROPERTIES are replaced by their content unless
+        resolve_blobs is False. With with_version, returns (properties,
+        object_type, version), the version read by the same query as the
+        properties so that it can be passed to update as expected_version.
+        """
         try:
             with self._get_connection() as conn:
-                properties_string, object_type = self._get_node_sql(conn, object_id)
+                properties_string, object_type, version = self._get_node_sql(conn, object_id)
                 properties = self.deserialize_properties(properties_string) if properties_string else None
                 if properties is None:
-                    return None, None
+                    return (None, None, None) if with_version else (None, None)
                 properties["object_id"] = object_id   
-                return properties, object_type
+                if resolve_blobs:
+                    self._resolve_blobs(conn, [properties])
+                return (properties, object_type, version) if with_version else (properties, object_type)
         except Exception as e:
             raise Exception(f"Database_Object: Failed to retrieve object from the SQL database. {e}")
 
@@ -76,26 +305,122 @@ class SqliteDatabase:
         except Exception as e:
             raise Exception(f"Database_Object: Failed to remove object from the SQL database. {e}")
 
-    def update(self, object_id, properties):
-        """ Update a node's properties in the database """
-        # Fetch the existing properties
-        existing_properties, _ = self.load(object_id)
-        if not existing_properties:
-            raise ValueError(f"Object with object_id {object_id} not found.")
+    def update(self, object_id, properties, expected_version=None):
+        """ Update a node's properties in the database
+
+        The new properties are merged into the stored JSON by a single UPDATE
+        statement, so properties that are not being changed are neither read
+        back nor rewritten. Every update increments the node's version.
 
-        # remove the object_id from existing properties
-        existing_properties.pop("object_id")
-        # Merge existing properties with new properties
-        updated_properties = {**existing_properties, **properties}
-        properties_json = self.serialize_properties(updated_properties)
+        Args:
+            object_id: ID of the node to update
+            properties: Dictionary of properties to set; other properties are kept
+            expected_version: If given, only update when the stored version still
+                              matches, otherwise raise StaleObjectError
+
+        Returns the node's new version.
+        """
         try:
             with self._get_connection() as conn:
-                self._update_node_sql(conn, object_id, properties_json)
+                updated = self._patch_node_sql(conn, object_id, self._store_blobs(conn, properties), expected_version)
+                version = self._get_version_sql(conn, object_id)
         except Exception as e:
             raise Exception(f"Database_Object: Failed to update object in the SQL database. {e}")
+        if version is None:
+            raise ValueError(f"Object with object_id {object_id} not found.")
+        if not updated:
+            raise StaleObjectError(f"Object {object_id} is at version {version}, expected version {expected_version}.")
+        return version
+
+    def get_version(self, object_id):
+        """ Get the version of a node, or None if it does not exist """
+        with self._get_connection() as conn:
+            return self._get_version_sql(conn, object_id)
+
+    def add_many(self, properties_list, object_type="node"):
+        """ Add several new nodes of one object type in a single transaction
 
-    def find(self, object_type, properties_filter=None):
+        Returns a list of (object_id, properties, object_type) tuples in the same
+        order as properties_list, matching the return value of add().
+        """
+        created = datetime.datetime.now().strftime("%m.%d.%Y %H:%M:%S")
+        added = []
+        for properties in properties_list:
+            properties = dict(properties) if properties else {}
+            properties["created"] = created
+            added.append((f"{object_type}_{str(uuid.uuid4())}", properties, object_type))
+        try:
+            with self._get_connection() as conn:
+                rows = [(object_id, self.serialize_properties(self._store_blobs(conn, properties)), object_type)
+                        for object_id, properties, object_type in added]
+                self._create_nodes_sql(conn, rows)
+            return added
+        except Exception as e:
+            raise Exception(f"Database_Object: Failed to add objects to the SQL database. {e}")
+
+    def load_many(self, object_ids, resolve_blobs=True, with_version=False):
+        """ Load several nodes by ID with one query per BATCH_SIZE IDs
+
+        Returns a list of (properties, object_type) tuples in the same order as
+        object_ids, with (None, None) for IDs that are not in the database.
+        Blob references are resolved and versions returned as in load().
+        """
+        try:
+            with self._get_connection() as conn:
+                rows = self._get_nodes_sql(conn, object_ids)
+                results = []
+                for object_id in object_ids:
+                    properties_string, object_type, version = rows.get(object_id, (None, None, None))
+                    if not properties_string:
+                        results.append((None, None, None))
+                        continue
+                    properties = self.deserialize_properties(properties_string)
+                    properties["object_id"] = object_id
+                    results.append((properties, object_type, version))
+                if resolve_blobs:
+                    self._resolve_blobs(conn, [result[0] for result in results if result[0]])
+                return results if with_version else [result[:2] for result in results]
+        except Exception as e:
+            raise Exception(f"Database_Object: Failed to retrieve objects from the SQL database. {e}")
+
+    def load_names(self, object_ids):
+        """ Look up the names of several nodes without loading their properties
+
+        Args:
+            object_ids: List of object_ids to look up
+
+        Returns:
+            Dictionary of object_id to (name, object_type) for the nodes that exist
+        """
+        try:
+            with self._get_connection() as conn:
+                return self._get_names_sql(conn, object_ids)
+        except Exception as e:
+            raise Exception(f"Database_Object: Failed to retrieve object names from the SQL database. {e}")
+
+    def update_many(self, updates):
+        """ Update the properties of several nodes in a single transaction
+
+        Args:
+            updates: Dictionary of object_id to the properties to merge into that node
+        """
+        try:
+            with self._get_connection() as conn:
+                missing = [object_id for object_id, properties in updates.items()
+                           if not self._patch_node_sql(conn, object_id, self._store_blobs(conn, properties))]
+                if missing:
+                    raise ValueError(f"Objects with object_ids {missing} not found.")
+        except ValueError:
+            raise
+        except Exception as e:
+            raise Exception(f"Database_Object: Failed to update objects in the SQL database. {e}")
+
+    def find(self, object_type, properties_filter=None, resolve_blobs=True, fields=None,
+             order_by=None, descending=False, limit=None, offset=None, after=None):
         """ Find all nodes of a given object type with optional property filtering
+
+        Large properties stored in the blobs table are replaced by their content,
+        as in load(), unless resolve_blobs is False.
         
         Args:
             object_type: Type of objects to find
@@ -105,25 +430,182 @@ class SqliteDatabase:
                              for LIKE matching.
                              Example: {'name': 'test'} - exact match
                                      {'name': {'operator': 'like', 'value': '%test%'}} - LIKE match
+            resolve_blobs: Replace blob references with their content. Pass False,
+                           or leave the large properties out of fields, when
+                           the content is not needed.
+            fields: Optional list of property keys to return. Only these keys are
+                    extracted in SQL; keys an object does not have come back as None.
+            order_by: Property to sort by. 'created' sorts by creation time using the
+                      indexed created_at column. Ties are broken by insertion order,
+                      and objects without the property sort first (last descending).
+            descending: Sort in descending order
+            limit: Maximum number of objects to return
+            offset: Number of objects to skip
+            after: object_id of the last object of the previous page, for keyset
+                   pagination with order_by. Only objects sorting after it are returned.
+                   Raises ValueError if there is no such object of object_type.
         """
         try:
             with self._get_connection() as conn:
-                return self._find_nodes_sql(conn, object_type, properties_filter)
+                results = self._find_nodes_sql(conn, object_type, properties_filter, fields,
+                                               order_by, descending, limit, offset, after)
+                if resolve_blobs:
+                    self._resolve_blobs(conn, [result["properties"] for result in results])
+                return results
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Database_Object: Failed to find objects in the SQL database. {e}")
 
+    def count(self, object_type, properties_filter=None):
+        """ Count the nodes of a given object type that match the optional property filter """
+        where, params = self._filter_sql(object_type, properties_filter)
+        try:
+            with self._get_connection() as conn:
+                return conn.execute(f"SELECT COUNT(*) FROM nodes WHERE {where}", params).fetchone()[0]
+        except Exception as e:
+            raise Exception(f"Database_Object: Failed to count objects in the SQL database. {e}")
+
+    def put_blob(self, content):
+        """ Store text content in the blobs table and return its reference """
+        with self._get_connection() as conn:
+            return self._put_blob_sql(conn, content)
+
+    def get_blob(self, ref):
+        """ Get the content for a blob reference, or None if it is not stored """
+        content_hash = ref[len(BLOB_REF_PREFIX):]
+        with self._get_connection() as conn:
+            return self._get_blobs_sql(conn, [content_hash]).get(content_hash)
+
+    def resolve_blob(self, value):
+        """ Return the content for a blob reference, or the value itself if it is not one """
+        if is_blob_ref(value):
+            content = self.get_blob(value)
+            if content is not None:
+                return content
+        return value
+
+    def externalize_blobs(self):
+        """ Move large inline BLOB_PROPERTIES values of existing nodes into the blobs table
+
+        Returns the number of nodes rewritten. Run VACUUM afterwards to give the
+        freed space back to the file system.
+        """
+        conditions = " OR ".join(f"length(json_extract(properties, '$.{key}')) >= ?" for key in self.BLOB_PROPERTIES)
+        query = f"SELECT object_id, properties FROM nodes WHERE json_valid(properties) AND ({conditions})"
+        with self._get_connection() as conn:
+            rows = conn.execute(query, [self.BLOB_MIN_SIZE] * len(self.BLOB_PROPERTIES)).fetchall()
+        for start in range(0, len(rows), self.BATCH_SIZE):
+            with self._get_connection() as conn:
+                for object_id, properties_string in rows[start:start + self.BATCH_SIZE]:
+                    properties = self.deserialize_properties(properties_string)
+                    stored = self._store_blobs(conn, properties)
+                    changed = {key: value for key, value in stored.items() if value is not properties[key]}
+                    self._patch_node_sql(conn, object_id, changed)
+        return len(rows)
+
+    def collect_blobs(self):
+        """ Delete blobs that no node references any more
+
+        Blobs are shared between nodes, so they are kept when a node is updated
+        or removed and need collecting from time to time. The references are
+        read and the blobs deleted in one write transaction, so that a
+        concurrent add cannot reference a blob as it is deleted. Returns the
+        number of blobs deleted.
+        """
+        referenced = " UNION ".join(
+            f"SELECT substr(json_extract(properties, '$.{key}'), {len(BLOB_REF_PREFIX) + 1}) FROM nodes "
+            f"WHERE json_valid(properties) AND json_extract(properties, '$.{key}') LIKE ?"
+            for key in self.BLOB_PROPERTIES)
+        with self._get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            deleted = conn.execute(f"DELETE FROM blobs WHERE hash NOT IN ({referenced})",
+                                   [BLOB_REF_PREFIX + "%"] * len(self.BLOB_PROPERTIES)).rowcount
+        return deleted
+
+    def _store_blobs(self, conn, properties):
+        """ Move large BLOB_PROPERTIES values into the blobs table, returning properties with references """
+        stored = dict(properties)
+        for key in self.BLOB_PROPERTIES:
+            value = stored.get(key)
+            if isinstance(value, str) and len(value) >= self.BLOB_MIN_SIZE and not is_blob_ref(value):
+                stored[key] = self._put_blob_sql(conn, value)
+        return stored
+
+    def _resolve_blobs(self, conn, properties_list):
+        """ Replace blob references in BLOB_PROPERTIES with their content, in place """
+        hashes = {value[len(BLOB_REF_PREFIX):]
+                  for properties in properties_list
+                  for key, value in properties.items()
+                  if key in self.BLOB_PROPERTIES and is_blob_ref(value)}
+        if not hashes:
+            return
+        contents = self._get_blobs_sql(conn, list(hashes))
+        for properties in properties_list:
+            for key in self.BLOB_PROPERTIES:
+                value = properties.get(key)
+                if is_blob_ref(value) and value[len(BLOB_REF_PREFIX):] in contents:
+                    properties[key] = contents[value[len(BLOB_REF_PREFIX):]]
+
+    def _put_blob_sql(self, conn, content):
+        """ Insert content into the blobs table unless an identical blob is already there """
+        content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        conn.execute("INSERT OR IGNORE INTO blobs (hash, content) VALUES (?, ?)", (content_hash, content))
+        return BLOB_REF_PREFIX + content_hash
+
+    def _get_blobs_sql(self, conn, hashes):
+        """ Retrieve blob contents by hash, returning a dict of hash to content """
+        contents = {}
+        for start in range(0, len(hashes), self.BATCH_SIZE):
+            batch = hashes[start:start + self.BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            query = f"SELECT hash, content FROM blobs WHERE hash IN ({placeholders})"
+            for content_hash, content in conn.execute(query, batch):
+                contents[content_hash] = content
+        return contents
+
     def _create_node_sql(self, conn, object_id, properties_json, object_type="node"):
         """ Insert a new node into the nodes table """
         query = "INSERT INTO nodes (object_id, properties, object_type) VALUES (?, ?, ?)"
         conn.execute(query, (object_id, properties_json, object_type))
 
+    def _create_nodes_sql(self, conn, rows):
+        """ Insert (object_id, properties_json, object_type) rows into the nodes table """
+        query = "INSERT INTO nodes (object_id, properties, object_type) VALUES (?, ?, ?)"
+        conn.executemany(query, rows)
+
+    def _get_nodes_sql(self, conn, object_ids):
+        """ Retrieve nodes by object_id, returning a dict of object_id to (properties, object_type, version) """
+        object_ids = list(dict.fromkeys(object_ids))
+        rows = {}
+        for start in range(0, len(object_ids), self.BATCH_SIZE):
+            batch = object_ids[start:start + self.BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            query = f"SELECT object_id, properties, object_type, version FROM nodes WHERE object_id IN ({placeholders})"
+            for object_id, properties, object_type, version in conn.execute(query, batch):
+                rows[object_id] = (properties, object_type, version)
+        return rows
+
+    def _get_names_sql(self, conn, object_ids):
+        """ Retrieve node names by object_id, returning a dict of object_id to (name, object_type) """
+        object_ids = list(dict.fromkeys(object_ids))
+        name_expression = self._property_expression("name")
+        names = {}
+        for start in range(0, len(object_ids), self.BATCH_SIZE):
+            batch = object_ids[start:start + self.BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            query = f"SELECT object_id, {name_expression}, object_type FROM nodes WHERE object_id IN ({placeholders})"
+            for object_id, name, object_type in conn.execute(query, batch):
+                names[object_id] = (name, object_type)
+        return names
+
     def _get_node_sql(self, conn, object_id):
-        """ Retrieve a node's properties from the nodes table by its object_id """
-        query = "SELECT properties, object_type FROM nodes WHERE object_id = ?"
+        """ Retrieve a node's properties, object type and version from the nodes table by its object_id """
+        query = "SELECT properties, object_type, version FROM nodes WHERE object_id = ?"
         result = conn.execute(query, (object_id,)).fetchone()
         if result:
-            return result[0], result[1]
-        return None, None
+            return result[0], result[1], result[2]
+        return None, None, None
 
     def _delete_node_sql(self, conn, object_id):
         """ Delete a node from the nodes table by its object_id """
@@ -132,24 +614,64 @@ class SqliteDatabase:
 
     def _update_node_sql(self, conn, object_id, properties):
         """ Update a node's properties in the nodes table """
-        query = "UPDATE nodes SET properties = ? WHERE object_id = ?"
+        query = "UPDATE nodes SET properties = ?, version = version + 1 WHERE object_id = ?"
         conn.execute(query, (properties, object_id))
 
-    def _find_nodes_sql(self, conn, object_type, properties_filter=None):
+    def _patch_node_sql(self, conn, object_id, properties, expected_version=None):
+        """ Merge properties into a node's stored JSON in one statement, returning whether a row changed """
+        expression = "properties"
+        params = []
+        items = list(properties.items())
+        # json_set is nested in chunks to stay below SQLite's function argument limit
+        for start in range(0, len(items), self.PATCH_CHUNK_SIZE):
+            arguments = []
+            for key, value in items[start:start + self.PATCH_CHUNK_SIZE]:
+                arguments.append("?, json(?)")
+                params.extend([f'$."{key}"', json.dumps(value)])
+            expression = f"json_set({expression}, {', '.join(arguments)})"
+        query = f"UPDATE nodes SET properties = {expression}, version = version + 1 WHERE object_id = ?"
+        params.append(object_id)
+        if expected_version is not None:
+            query += " AND version = ?"
+            params.append(expected_version)
+        return conn.execute(query, params).rowcount > 0
+
+    def _get_version_sql(self, conn, object_id):
+        """ Retrieve a node's version from the nodes table """
+        result = conn.execute("SELECT version FROM nodes WHERE object_id = ?", (object_id,)).fetchone()
+        return result[0] if result else None
+
+    def _find_nodes_sql(self, conn, object_type, properties_filter=None, fields=None,
+                        order_by=None, descending=False, limit=None, offset=None, after=None):
         """ Find all nodes of a given object type with property filtering """
-        query = "SELECT object_id, properties FROM nodes WHERE object_type = ?"
-        params = [object_type]
-        
-        if properties_filter:
-            for key, value in properties_filter.items():
-                if isinstance(value, dict) and 'operator' in value and value['operator'].lower() == 'like':
-                    # Handle LIKE operator
-                    query += f" AND json_extract(properties, '$.{key}') LIKE ?"
-                    params.append(value['value'])
-                else:
-                    # Handle exact match
-                    query += f" AND json_extract(properties, '$.{key}') = ?"
-                    params.append(str(value))  # Convert to string since JSON properties are stored as strings
+        if fields:
+            # Build a JSON object of just the requested keys instead of returning the whole document
+            arguments = ", ".join("?, json_extract(properties, ?)" for _ in fields)
+            query = f"SELECT object_id, json_object({arguments}) FROM nodes WHERE json_valid(properties) AND "
+            params = [param for key in fields for param in (key, f'$."{key}"')]
+        else:
+            query = "SELECT object_id, properties FROM nodes WHERE "
+            params = []
+        where, where_params = self._filter_sql(object_type, properties_filter)
+        query += where
+        params.extend(where_params)
+
+        if order_by:
+            sort_expression = self._sort_expression(order_by)
+            direction = "DESC" if descending else "ASC"
+            if after:
+                # Keyset pagination: continue from the sort position of the previous page's last object
+                cursor = conn.execute(f"SELECT {sort_expression}, rowid FROM nodes WHERE object_id = ? AND object_type = ?",
+                                      (after, object_type)).fetchone()
+                if cursor is None:
+                    raise ValueError(f"Unknown cursor: {after}")
+                keyset, keyset_params = self._keyset_sql(sort_expression, descending, *cursor)
+                query += f" AND {keyset}"
+                params.extend(keyset_params)
+            query += f" ORDER BY {sort_expression} {direction}, rowid {direction}"
+        if limit is not None or offset is not None:
+            query += " LIMIT ? OFFSET ?"
+            params.extend([-1 if limit is None else limit, offset or 0])
         
         result = conn.execute(query, params)
         
@@ -163,13 +685,63 @@ class SqliteDatabase:
 
         return valid_results
     
-    def name_is_unique(self, name):
-        """ Check if the name is unique in the database """
-        query = "SELECT object_id, properties FROM nodes"
+    def _filter_sql(self, object_type, properties_filter=None):
+        """ Build the WHERE clause and parameters for an object type and property filter """
+        where = "object_type = ?"
+        params = [object_type]
+        if properties_filter:
+            for key, value in properties_filter.items():
+                if isinstance(value, dict) and 'operator' in value and value['operator'].lower() == 'like':
+                    # Handle LIKE operator
+                    where += f" AND {self._property_expression(key)} LIKE ?"
+                    params.append(value['value'])
+                else:
+                    # Handle exact match
+                    where += f" AND {self._property_expression(key)} = ?"
+                    params.append(str(value))  # Convert to string since JSON properties are stored as strings
+        return where, params
+
+    def _keyset_sql(self, sort_expression, descending, value, rowid):
+        """ Condition for the rows that sort after (value, rowid) in ORDER BY sort_expression, rowid
+
+        SQLite sorts NULLs first in ascending order and last in descending order,
+        and a plain comparison with NULL matches nothing, so they are handled apart.
+        """
+        comparison = "<" if descending else ">"
+        if value is None:
+            condition = f"({sort_expression} IS NULL AND rowid {comparison} ?)"
+            if not descending:
+                condition = f"({condition} OR {sort_expression} IS NOT NULL)"
+            return condition, [rowid]
+        condition = f"{sort_expression} {comparison} ? OR ({sort_expression} = ? AND rowid {comparison} ?)"
+        if descending:
+            condition += f" OR {sort_expression} IS NULL"
+        return f"({condition})", [value, value, rowid]
+
+    def _sort_expression(self, order_by):
+        """ SQL expression to sort by, using the created_at column for creation time """
+        if order_by == "created" and self.has_created_at:
+            return "created_at"
+        return self._property_expression(order_by)
+
+    def find_ids_by_name(self, name, object_type=None):
+        """ Return the object_ids of nodes with the given name, optionally scoped to one object type """
+        name_column = self._property_expression("name")
+        if object_type is None:
+            query = f"SELECT object_id FROM nodes WHERE {name_column} = ?"
+            params = (name,)
+        else:
+            query = f"SELECT object_id FROM nodes WHERE object_type = ? AND {name_column} = ?"
+            params = (object_type, name)
         with self._get_connection() as conn:
-            result = conn.execute(query).fetchall()
-        for row in result:
-            properties = json.loads(row[1])
-            if properties.get('name') == name:
-                return False
-        return True
+            return [row[0] for row in conn.execute(query, params)]
+
+    def name_is_unique(self, name, object_type=None, exclude_object_id=None):
+        """ Check if the name is unique in the database
+
+        Args:
+            name: Name to check
+            object_type: If given, only objects of this type are compared
+            exclude_object_id: Object to ignore, e.g. the object being renamed
+        """
+        return all(object_id == exclude_object_id for object_id in self.find_ids_by_name(name, object_type))
@@ -1,15 +1,15 @@
+import asyncio
 import logging
-import uuid
-from concurrent.futures import ThreadPoolExecutor
-from dataclasses import dataclass
-from datetime import datetime
 from enum import Enum
-from typing import Dict, Optional
-import traceback
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
 
 from app.sqlite_database import SqliteDatabase
 from app.config import load_database_uri
+from app.job_queue import JobQueue, JobWorker
 from models.agent import Agent
+from models.json_object import Json
+from services.analysisrunner import AnalysisRunner
+from services.reviewrunner import ReviewRunner
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,68 +21,96 @@ class TaskStatus(Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
-@dataclass
-class TaskInfo:
-    id: str
-    status: TaskStatus
-    result: Optional[Dict] = None
-    error: Optional[str] = None
-    created_at: datetime = None
-    completed_at: datetime = None
+# Worker threads started in the API process; run scripts/run_job_workers.py for more
+AGENT_WORKER_CONCURRENCY = 4
 
-# Global task store
-tasks = {}
-
-# Create a thread pool for running agent tasks
-agent_executor = ThreadPoolExecutor(max_workers=4)
-
-def run_agent_task(
-    task_id: str,
-    db,
-    agent_id: str,
-    dataset_id: Optional[str] = None,
-    json_object_id: Optional[str] = None,
-    properties: Optional[Dict] = None,
-    store_result: bool = False
-):
-    """Background task to run an agent. This is a synchronous function that runs in a thread."""
+def run_agent_task(payload: Dict, report: Callable[[Dict], None]) -> Dict:
+    """Run an agent. This is a synchronous function that runs in a worker thread."""
+    db = SqliteDatabase(load_database_uri())
     try:
-        # Get task from global store
-        task = tasks.get(task_id)
-        if not task:
-            logger.error(f"Task {task_id} not found")
-            return
-            
-        # Update status to running
-        task.status = TaskStatus.RUNNING
-        
         # Load the agent
-        agent = Agent.load(db, agent_id)
+        agent = Agent.load(db, payload["agent_id"])
         if not agent:
-            raise ValueError(f"Agent {agent_id} not found")
+            raise ValueError(f"Agent {payload['agent_id']} not found")
             
         # Run the agent (db connection is now managed inside agent.run())
         result = agent.run(
-            properties=properties,
-            dataset_id=dataset_id,
-            json_object_id=json_object_id
+            properties=payload.get("properties"),
+            dataset_id=payload.get("dataset_id"),
+            json_object_id=payload.get("json_object_id")
         )
-        
-        # Update task status
-        task.status = TaskStatus.COMPLETED
-        task.result = {
-            "store_result": store_result,
-            "result": result
-        }
-        task.completed_at = datetime.now()
-        
-    except Exception as e:
-        logger.error(f"Error in agent task {task_id}: {str(e)}")
-        logger.error(f"Error traceback: {traceback.format_exc()}")
-        
-        # Get task again in case it changed
-        task = tasks.get(task_id)
-        if task:
-            task.status = TaskStatus.FAILED
-            task.error = str(e)
-            task.completed_at = datetime.now()
+
+        # Store the result once, when the task completes, rather than on every status check
+        store_result = payload.get("store_result", False)
+        if store_result:
+            json_obj = Json(db)
+            json_obj.create(result)
+            result = {"json_id": json_obj.object_id}
+        return {"store_result": store_result, "result": result}
+    finally:
+        db.close()
+
+def run_analysis_task(payload: Dict, report: Callable[[Dict], None]) -> Dict:
+    """Run an analysis run, reporting each agent as it finishes. Agents that already
+    have attempts are skipped, so a run whose worker died resumes from the last
+    completed agent."""
+    db = SqliteDatabase(load_database_uri())
+    try:
+        runner = AnalysisRunner(db, payload["analysis_run_id"], progress=report)
+        return {"result": runner.run(parallel=payload.get("parallel", False), batch=payload.get("batch", False))}
+    finally:
+        db.close()
+
+def run_review_task(payload: Dict, report: Callable[[Dict], None]) -> Dict:
+    """Run a review set, reporting each reviewer agent as it finishes and resuming
+    from the last completed one."""
+    db = SqliteDatabase(load_database_uri())
+    try:
+        runner = ReviewRunner(db, payload["review_set_id"], progress=report)
+        return {"result": runner.run(parallel=payload.get("parallel", False), batch=payload.get("batch", False))}
+    finally:
+        db.close()
+
+# Job kinds and the functions that run them
+TASK_HANDLERS = {
+    "run_agent": run_agent_task,
+    "analysis_run": run_analysis_task,
+    "review_set": run_review_task,
+}
+
+_job_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    """Get the job queue in the configured database, creating it on first use."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(load_database_uri())
+    return _job_queue
+
+def start_job_worker(concurrency: int = AGENT_WORKER_CONCURRENCY) -> JobWorker:
+    """Start a worker running queued tasks in background threads of this process."""
+    worker = JobWorker(get_job_queue(), TASK_HANDLERS, concurrency=concurrency)
+    worker.start()
+    logger.info(f"Started job worker {worker.worker_id} with {concurrency} threads")
+    return worker
+
+async def follow_job(job_id: str, after: int = 0, poll_interval: float = 0.5) -> AsyncIterator[Tuple[int, Dict]]:
+    """Yield a job's (event_id, event) progress events as they are recorded, starting
+    after event_id `after`, until the job has completed or failed for good.
+
+    The last event yielded is {"status": ...} with the job's final status,
+    result and error; its event_id is the id of the last progress event.
+    """
+    queue = get_job_queue()
+    while True:
+        # Read the job before its events so no event recorded before completion is missed
+        job = await asyncio.to_thread(queue.get, job_id)
+        for event_id, event in await asyncio.to_thread(queue.events, job_id, after):
+            after = event_id
+            yield event_id, event
+        if job is None or job["status"] in (TaskStatus.COMPLETED.value, TaskStatus.FAILED.value):
+            yield after, {"status": job["status"] if job else None,
+                          "result": job["result"] if job else None,
+                          "error": job["error"] if job else "Job not found"}
+            return
+        await asyncio.sleep(poll_interval)
@@ -14,7 +14,7 @@ object_specifications = {
             "type": {
                 "type": "string",
                 "input_type": "dropdown",
-                "options": ["OpenAI", "Anthropic", "Groq", "GoogleAI", "LocalModel"],
+                "options": ["OpenAI", "Anthropic", "Groq", "GoogleAI", "LocalModel", "OpenAICompatible"],
                 "view": "text",
                 "editable": True,
                 "default": "Groq"
@@ -50,7 +50,11 @@ object_specifications = {
                                          "gemini-1.5-flash-001", 
                                          "gemini-1.0-pro-latest", 
                                          "gemini-1.0-pro-001"], 
-                            "LocalModel": [ 'mixtral:latest', 'mixtral:instruct', 'llama2:latest']},
+                            "LocalModel": [ 'mixtral:latest', 'mixtral:instruct', 'llama2:latest'],
+                            # Whatever the vLLM or llama.cpp server at OPENAI_COMPATIBLE_HOST serves
+                            "OpenAICompatible": ["meta-llama/Meta-Llama-3.1-8B-Instruct",
+                                                 "meta-llama/Meta-Llama-3.1-70B-Instruct",
+                                                 "mistralai/Mistral-7B-Instruct-v0.3"]},
                 "view": "text",
                 "default": "llama3-8b-8192",
                 "editable": True
@@ -86,6 +90,15 @@ object_specifications = {
                 "step": 0.1,
                 "editable": True
             },
+            "response_cache": {
+                "type": "string",
+                "label": "response cache",
+                "input_type": "dropdown",
+                "options": ["off", "on", "force"],
+                "view": "text",
+                "default": "off",
+                "editable": True
+            },
             "description": {
                 "type": "string",
                 "editable": True,
@@ -152,6 +165,7 @@ object_specifications = {
             },
             "data": {
                 "type": "csv",
+                "list_view": False,
                 "input_type": "upload_table",
                 "view": "scrolling_table",
                 "editable": True
@@ -292,6 +306,14 @@ object_specifications = {
                 "input_type": "textarea",
                 "view": "text",
                 "collapsible": True
+            },
+            "llm_usage": {
+                "type": "object",
+                "label": "LLM usage",
+                "list_view": False,
+                "editable": False,
+                "view": "json_tree",
+                "collapsible": True
             }
         }
     },
@@ -314,6 +336,7 @@ object_specifications = {
             },
             "data": {
                 "type": "csv",
+                "list_view": False,
                 "view": "scrolling_table",
                 "editable": False,
                 "object_type": "dataset"
@@ -354,6 +377,7 @@ object_specifications = {
             },
             "full_prompt": {
                 "type": "string",
+                "list_view": False,
                 "label": "prompt",
                 "editable": False,
                 "input_type": "textarea",
@@ -362,6 +386,7 @@ object_specifications = {
             },
             "agent_copy": {
                 "type": "string",
+                "list_view": False,
                 "label": "agent data copy",
                 "editable": False,
                 "view": "text",
@@ -369,6 +394,7 @@ object_specifications = {
             },
             "llm_copy": {
                 "type": "string",
+                "list_view": False,
                 "label": "llm data copy",
                 "editable": False,
                 "view": "text",
@@ -376,11 +402,20 @@ object_specifications = {
             },
             "dataset_copy": {
                 "type": "string",
+                "list_view": False,
                 "label": "dataset data copy",
                 "editable": False,
                 "view": "text",
                 "collapsible": True
             },
+            "llm_call": {
+                "type": "object",
+                "label": "LLM call",
+                "list_view": False,
+                "editable": False,
+                "view": "json_tree",
+                "collapsible": True
+            }
         }
     },
     # MARK:reviewplan
@@ -455,6 +490,14 @@ object_specifications = {
                 "input_type": "textarea",
                 "view": "text",
                 "collapsible": True
+            },
+            "llm_usage": {
+                "type": "object",
+                "label": "LLM usage",
+                "list_view": False,
+                "editable": False,
+                "view": "json_tree",
+                "collapsible": True
             }
         }
     },
@@ -470,6 +513,7 @@ object_specifications = {
             },
             "review_text": {
                 "type": "string",
+                "list_view": False,
                 "label": "review",
                 "editable": True,
                 "view": "text"
@@ -488,6 +532,7 @@ object_specifications = {
             },
             "hypotheses_text": {
                 "type": "string",
+                "list_view": False,
                 "label": "hypotheses list",
                 "editable": False,
                 "view": "text",
@@ -519,6 +564,14 @@ object_specifications = {
                 "object_type": "analysis_run",
                 "view": "object_link",
                 "editable": False
+            },
+            "llm_call": {
+                "type": "object",
+                "label": "LLM call",
+                "list_view": False,
+                "editable": False,
+                "view": "json_tree",
+                "collapsible": True
             }
         }
     },
@@ -566,6 +619,7 @@ object_specifications = {
             },
             "visualizations": {
                 "type": "string",
+                "list_view": False,
                 "label": "visualizations",
                 "editable": False,
                 "view": "judgment_space_visualizations",
@@ -598,6 +652,7 @@ object_specifications = {
                 "collapsible": True
             },
             "markdown": {
+                "list_view": False,
                 "label": "JSON Markdown",
                 "type": "object",
                 "editable": False,
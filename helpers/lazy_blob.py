@@ -0,0 +1,34 @@
+class LazyBlob:
+    """
+    Descriptor for a model attribute that may hold a blob reference.
+
+    The referenced content is loaded through the instance's db the first time
+    the attribute is read, and kept on the instance after that. The reference
+    is kept too, for stored_value.
+    """
+    def __set_name__(self, owner, name):
+        self.attribute = "_" + name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance.__dict__.get(self.attribute)
+        resolved = instance.db.resolve_blob(value)
+        if resolved is not value:
+            instance.__dict__[self.attribute] = resolved
+            instance.__dict__[self.attribute + "_ref"] = value
+        return resolved
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.attribute] = value
+        instance.__dict__.pop(self.attribute + "_ref", None)
+
+def stored_value(instance, name):
+    """
+    The value of a LazyBlob attribute as stored: its blob reference if it was
+    loaded from one, whether or not the content has been read since. Copying
+    this into another object saves the reference without reading or hashing
+    the content again.
+    """
+    attribute = "_" + name
+    return instance.__dict__.get(attribute + "_ref", instance.__dict__.get(attribute))
@@ -0,0 +1,25 @@
+from collections import Counter
+
+def merge_run_logs(stored, local):
+    """Combine the stored and local versions of a run log.
+
+    Keeps every line of the stored log, followed by the lines that only the
+    local log has, so that neither writer's entries are lost.
+    """
+    if not stored:
+        return local
+    if not local or stored.startswith(local):
+        return stored
+    if local.startswith(stored):
+        return local
+    remaining = Counter(stored.splitlines())
+    extra = []
+    for line in local.splitlines():
+        if remaining[line]:
+            remaining[line] -= 1
+        else:
+            extra.append(line)
+    if not extra:
+        return stored
+    separator = "" if stored.endswith("\n") else "\n"
+    return stored + separator + "".join(line + "\n" for line in extra)
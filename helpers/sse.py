@@ -0,0 +1,7 @@
+import json
+
+
+def format_sse(event, data, event_id=None):
+    """Format one Server-Sent Events message whose data is JSON encoded."""
+    message = f"id: {event_id}\n" if event_id is not None else ""
+    return message + f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -9,7 +9,7 @@ A simple FastMCP server that provides access to the Deckhard AI research workflo
 management system.
 """
 
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import httpx
 import logging
 import asyncio
@@ -94,7 +94,7 @@ def get_deckhard_object_specs() -> Dict:
             return {"error": error_msg}
 
 @mcp.tool(name="list-deckhard_objects", description="List and filter objects of a specific type in the Deckhard system")
-def list_deckhard_objects(object_type: str, properties_filter: Optional[Dict] = None, limit: Optional[int] = None) -> Dict:
+def list_deckhard_objects(object_type: str, properties_filter: Optional[Dict] = None, limit: Optional[int] = None, fields: Optional[List[str]] = None, offset: Optional[int] = None, cursor: Optional[str] = None) -> Dict:
     """List and filter objects of a specific type in the Deckhard system.
     
     Args:
@@ -105,7 +105,11 @@ def list_deckhard_objects(object_type: str, properties_filter: Optional[Dict] =
             - Get object by name: {"name": "My Agent"}
             - Pattern matching: {"name": {"operator": "like", "value": "%Test%"}}
             - Multiple filters: {"name": "Agent 1", "type": "analysis"}
-        limit: Optional maximum number of objects to return
+        limit: Optional maximum number of objects to return. Objects are returned newest first.
+        fields: Optional list of property names to return for each object. All properties
+            are returned when omitted.
+        offset: Optional number of objects to skip
+        cursor: Optional next_cursor value from a previous call, to fetch the following page
     
     Returns:
         Dictionary containing matched objects and metadata
@@ -126,6 +130,11 @@ def list_deckhard_objects(object_type: str, properties_filter: Optional[Dict] =
                 params['limit'] = limit
             if properties_filter is not None:
                 params['properties_filter'] = properties_filter
+            params['fields'] = ",".join(fields) if fields else "*"
+            if offset is not None:
+                params['offset'] = offset
+            if cursor is not None:
+                params['cursor'] = cursor
             response = client.get(f"{BASE_URL}/objects/{object_type}", params=params)
             response.raise_for_status()
             logger.debug(f"Successfully retrieved {object_type} objects")
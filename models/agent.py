@@ -1,8 +1,11 @@
 import json
 from helpers.safe_dict import SafeDict
 from models.llm import LLM
+from models.load_many import LoadManyMixin
+
+class Agent(LoadManyMixin):
+    load_with_db = False
 
-class Agent:
     def __init__(self, llm_id=None, context=None, 
                  prompt_template=None, name="unnamed", description=None, 
                  object_id=None, created=None):
@@ -77,6 +80,27 @@ class Agent:
         Returns:
             Parsed JSON object. If output is not valid JSON, returns {"data": output_text}
         """
+        llm, prompt = self.prepare_query(properties, dataset_id, json_object_id)
+
+        # Generate output using the LLM
+        output_text = llm.query(self.context, prompt)
+        return self.parse_output(output_text)
+
+    def run_stream(self, properties=None, dataset_id=None, json_object_id=None):
+        """Run the agent like run(), yielding the output text in chunks as the LLM generates it.
+
+        The generator returns the same parsed result as run(), so callers can
+        write `result = yield from agent.run_stream(...)`.
+        """
+        llm, prompt = self.prepare_query(properties, dataset_id, json_object_id)
+        output_text = yield from llm.query_stream(self.context, prompt)
+        return self.parse_output(output_text)
+
+    def prepare_query(self, properties=None, dataset_id=None, json_object_id=None):
+        """Merge the property sources into the prompt template and load the agent's LLM.
+
+        Returns (llm, prompt); see run() for how the sources are merged.
+        """
         # Create a new database connection for this thread
         from app.sqlite_database import SqliteDatabase
         from app.config import load_database_uri
@@ -119,16 +143,16 @@ class Agent:
             llm = LLM.load(db, self.llm_id)
             if not llm:
                 raise ValueError("LLM not found")
-
-            # Generate output using the LLM
-            output_text = llm.query(self.context, prompt)
-            
-            # Try to parse output as JSON
-            try:
-                return json.loads(output_text)
-            except json.JSONDecodeError:
-                # If not valid JSON, wrap in data property
-                return {"data": output_text}
+            return llm, prompt
         finally:
             # Always close the database connection
             db.close()
+
+    @staticmethod
+    def parse_output(output_text):
+        # Try to parse output as JSON
+        try:
+            return json.loads(output_text)
+        except json.JSONDecodeError:
+            # If not valid JSON, wrap in data property
+            return {"data": output_text}
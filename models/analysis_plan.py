@@ -1,6 +1,7 @@
 from models.analysis_run import AnalysisRun
+from models.load_many import LoadManyMixin
 
-class AnalysisPlan:
+class AnalysisPlan(LoadManyMixin):
     def __init__(self, db, name=None, agent_ids=None, dataset_id=None, 
                  n_hypotheses_per_agent=0, biological_context=None,
                  description=None, object_id=None,  created=None):
@@ -1,9 +1,16 @@
 
-class AnalysisRun:
+from app.sqlite_database import StaleObjectError
+from models.llm_calls import summarize_calls
+from models.load_many import LoadManyMixin
+from helpers.run_log import merge_run_logs
+
+class AnalysisRun(LoadManyMixin):
+    versioned = True
+
     def __init__(self, db, analysis_plan_id, agent_ids=None, dataset_id=None, 
                  n_hypotheses_per_agent=0, hypothesis_ids=None, biological_context=None,
                  description=None, run_log=None, attempts=None, status='pending', 
-                 object_id=None, created=None, name=None, user_ids=None):
+                 object_id=None, created=None, name=None, user_ids=None, llm_calls=None, llm_usage=None):
         self.db = db
         self.analysis_plan_id = analysis_plan_id
         self.agent_ids = agent_ids if agent_ids else []
@@ -19,6 +26,11 @@ class AnalysisRun:
         self.name = name if name else "none"
         self.user_ids = user_ids if user_ids else []
         self.created = created
+        # Call records of each agent's LLM queries; llm_usage is stored with them and
+        # recomputed from them when it is missing or a call is recorded
+        self.llm_calls = llm_calls if llm_calls else {}
+        self._llm_usage = llm_usage
+        self.version = None
 
     @classmethod
     def create(cls, db, analysis_plan_id, agent_ids, dataset_id, 
@@ -37,30 +49,83 @@ class AnalysisRun:
             "status": "pending"
         }
         object_id, created, _ = db.add(object_id=None, properties=properties, object_type="analysis_run")
-        return cls(db, analysis_plan_id, agent_ids, dataset_id, n_hypotheses_per_agent, [],
-                   biological_context, description, "", properties['attempts'], 'pending', object_id, name, [], created)
+        analysis_run = cls(db, analysis_plan_id, agent_ids, dataset_id, n_hypotheses_per_agent, [],
+                           biological_context, description, "", properties['attempts'], 'pending', object_id, name, [],
+                           created)
+        # A new node starts at version 0, so the first update already checks it
+        analysis_run.version = 0
+        return analysis_run
 
     @classmethod
     def load(cls, db, object_id):
-        properties, _ = db.load(object_id)
+        properties, _, version = db.load(object_id, with_version=True)
         if properties:
-            return cls(db, **properties)
+            return cls.from_properties(db, properties, version)
         return None
 
     def update(self):
-        properties = {
-            "hypothesis_ids": self.hypothesis_ids,
-            "attempts": self.attempts,
-            "status": self.status,
-            "run_log": self.run_log
-        }
-        self.db.update(self.object_id, properties)
+        # If another writer changed the run since it was loaded, merge in its
+        # progress and try again rather than overwriting it
+        while True:
+            properties = {
+                "hypothesis_ids": self.hypothesis_ids,
+                "attempts": self.attempts,
+                "status": self.status,
+                "run_log": self.run_log,
+                "llm_calls": self.llm_calls,
+                "llm_usage": self.llm_usage
+            }
+            try:
+                self.version = self.db.update(self.object_id, properties, expected_version=self.version)
+                return
+            except StaleObjectError:
+                self.merge_stored_progress()
+
+    def merge_stored_progress(self):
+        stored = AnalysisRun.load(self.db, self.object_id)
+        if stored is None:
+            raise ValueError(f"AnalysisRun with object_id {self.object_id} not found.")
+        self.hypothesis_ids = stored.hypothesis_ids + [hypothesis_id for hypothesis_id in self.hypothesis_ids
+                                                       if hypothesis_id not in stored.hypothesis_ids]
+        for agent_id, attempts in stored.attempts.items():
+            if len(attempts) > len(self.attempts.get(agent_id, [])):
+                self.attempts[agent_id] = attempts
+        for agent_id, calls in stored.llm_calls.items():
+            if len(calls) > len(self.llm_calls.get(agent_id, [])):
+                self.llm_calls[agent_id] = calls
+                self._llm_usage = None
+        if stored.status == 'done':
+            self.status = 'done'
+        self.run_log = merge_run_logs(stored.run_log, self.run_log)
+        self.version = stored.version
 
     def update_properties(self, **kwargs):
         for key, value in kwargs.items():
             setattr(self, key, value)
+        if "llm_calls" in kwargs and "llm_usage" not in kwargs:
+            # Keep the stored usage in step with the new call records
+            self._llm_usage = None
+            kwargs["llm_usage"] = self.llm_usage
         self.db.update(self.object_id, kwargs)
 
+    def record_call(self, agent_id, response):
+        """ Keep the call record of an agent's LLM response, if it has one """
+        call = getattr(response, "call", None)
+        if call:
+            self.llm_calls.setdefault(agent_id, []).append(call)
+            self._llm_usage = None
+
+    @property
+    def llm_usage(self):
+        """ Token, latency and retry totals over all the agents' LLM calls, overall and per model """
+        if self._llm_usage is None:
+            self._llm_usage = summarize_calls([call for calls in self.llm_calls.values() for call in calls])
+        return self._llm_usage
+
+    @llm_usage.setter
+    def llm_usage(self, llm_usage):
+        self._llm_usage = llm_usage
+
     def delete(self):
         self.db.remove(self.object_id)
 
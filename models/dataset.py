@@ -1,7 +1,11 @@
-import pandas as pd
 import json
+from helpers.lazy_blob import LazyBlob
+from models.load_many import LoadManyMixin
+
+class Dataset(LoadManyMixin):
+    resolve_blobs = False
+    data = LazyBlob()
 
-class Dataset:
     def __init__(self, db, 
                  name=None, data=None, 
                  experiment_description=None, 
@@ -28,7 +32,7 @@ class Dataset:
 
     @classmethod
     def load(cls, db, object_id):
-        properties, _ = db.load(object_id)
+        properties, _ = db.load(object_id, resolve_blobs=False)
         if properties:
             return cls(db, **properties)
         return None
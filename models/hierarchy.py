@@ -7,7 +7,6 @@ obtain the parent network and to create Dataset instances from the hierarchical
 """
 
 import json
-import pandas as pd
 import os
 import yaml
 from xml.etree.ElementTree import Element, SubElement, tostring
@@ -93,6 +92,9 @@ class Hierarchy():
 
     def add_data_from_file(self, file_path, key_column='name', columns=None, 
                            filter=None, sheet_name=0, delimiter=None):
+        # pandas is slow to import and only needed here
+        import pandas as pd
+
         # Determine file type from extension
         _, file_extension = os.path.splitext(file_path)
         file_extension = file_extension.lower()
@@ -1,9 +1,16 @@
- 
+from helpers.lazy_blob import LazyBlob
+from models.load_many import LoadManyMixin
+
+class Hypothesis(LoadManyMixin):
+    resolve_blobs = False
+    data = LazyBlob()
+    full_prompt = LazyBlob()
+    dataset_copy = LazyBlob()
 
-class Hypothesis:
     def __init__(self, db, name=None, hypothesis_text=None, data=None, biological_context=None, agent_id=None, 
                  dataset_id=None, description=None, analysis_run_id=None, 
-                 object_id=None, full_prompt=None, agent_copy=None, llm_copy=None, dataset_copy=None, created=None):
+                 object_id=None, full_prompt=None, agent_copy=None, llm_copy=None, dataset_copy=None, created=None,
+                 llm_call=None):
         self.db = db
         self.hypothesis_text = hypothesis_text
         self.data = data
@@ -19,9 +26,11 @@ class Hypothesis:
         self.agent_copy = agent_copy
         self.llm_copy = llm_copy
         self.dataset_copy = dataset_copy
+        # Provider, model, tokens, latency and retries of the query that generated the hypothesis
+        self.llm_call = llm_call
 
     @classmethod
-    def create(cls, db, hypothesis_text, data, biological_context, agent_id, dataset_id, description, analysis_run_id, name=None, full_prompt=None, agent_copy=None, llm_copy=None, dataset_copy=None):
+    def create(cls, db, hypothesis_text, data, biological_context, agent_id, dataset_id, description, analysis_run_id, name=None, full_prompt=None, agent_copy=None, llm_copy=None, dataset_copy=None, llm_call=None):
         properties = {
             "name": name,
             "hypothesis_text": hypothesis_text,
@@ -34,11 +43,13 @@ class Hypothesis:
             "full_prompt": full_prompt,
             "agent_copy": agent_copy,
             "llm_copy": llm_copy,
-            "dataset_copy": dataset_copy
+            "dataset_copy": dataset_copy,
+            "llm_call": llm_call
         }
         object_id, created, _ = db.add(object_id=None, properties=properties, object_type="hypothesis")
         hypothesis = cls(db, name, hypothesis_text, data, biological_context, agent_id, dataset_id, 
-                   description, analysis_run_id, object_id=object_id, full_prompt = full_prompt, created=created)
+                   description, analysis_run_id, object_id=object_id, full_prompt = full_prompt, created=created,
+                   llm_call=llm_call)
         if not name:
             agent_properties, agent_type = db.load(agent_id)
             hypothesis.update(name=f"hypothesis - {agent_properties['name']} - {biological_context}")
@@ -47,7 +58,7 @@ class Hypothesis:
 
     @classmethod
     def load(cls, db, object_id):
-        properties, _ = db.load(object_id)
+        properties, _ = db.load(object_id, resolve_blobs=False)
         if properties:
             return cls(db, **properties)
         return None
@@ -19,20 +19,12 @@ import services.review_judgments as review_judgments
 import numpy as np
 import io
 import base64
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from scipy.cluster import hierarchy
-from scipy.spatial.distance import pdist, squareform
-from sklearn.decomposition import PCA
-from sklearn.manifold import TSNE
-
-import umap
 from collections import defaultdict
 from models.agent import Agent
+from models.load_many import LoadManyMixin
 
 
-class JudgmentSpace:
+class JudgmentSpace(LoadManyMixin):
     def __init__(self, db, review_set_ids=None, name="unnamed", description=None, object_id=None, created=None, visualizations=None):
         self.db = db
         self.review_set_ids = review_set_ids if review_set_ids is not None else []
@@ -124,11 +116,17 @@ class JudgmentSpace:
         n_samples, n_features = all_reviewers.shape
         n_components = min(n_components, n_samples, n_features)
 
+        # The plotting and dimension reduction libraries take seconds to import
+        # (umap compiles its numba kernels), so they are loaded on first use
+        import matplotlib.pyplot as plt
         if plot_type == 'PCA':
+            from sklearn.decomposition import PCA
             reducer = PCA(n_components=n_components, random_state=random_state)
         elif plot_type == 'UMAP':
+            import umap
             reducer = umap.UMAP(n_components=n_components, random_state=random_state)
         elif plot_type == 'TSNE':
+            from sklearn.manifold import TSNE
             reducer = TSNE(n_components=n_components, random_state=random_state)
         else:
             raise ValueError("Invalid plot_type. Choose 'PCA', 'UMAP', or 'TSNE'.")
@@ -155,6 +153,7 @@ class JudgmentSpace:
         return img_buffer.getvalue().decode()
 
     def _plot_scatter_with_overlap_handling(self, reduced_data, labels, color_dict, marker_dict):
+        import matplotlib.pyplot as plt
         point_groups = defaultdict(list)
         for i, (x, y) in enumerate(reduced_data):
             point_groups[(x, y)].append(i)
@@ -179,6 +178,10 @@ class JudgmentSpace:
                                 alpha=0.7)
 
     def _generate_heatmap(self, figsize=(5, 5)):
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from scipy.cluster import hierarchy
+        from scipy.spatial.distance import pdist, squareform
         data = np.array(list(self.reviewer_judgment_dict.values()))
         
         # Perform hierarchical clustering
@@ -1,17 +1,24 @@
-import os
-from openai import OpenAI, APIError, APIConnectionError, InternalServerError
 import time
-from groq import Groq
-import google.generativeai as genai 
-import requests
-from app.config import load_api_key, load_local_server_url
-import anthropic
+from models.llm_backends import get_backend
+from models.llm_engine import query_engine
+from models.llm_cache import get_response_cache, request_key, is_deterministic, CACHE_OFF, CACHE_ON
+from models.llm_calls import LLMResponse, call_record
+from models.llm_retry import retry_policy
+import asyncio
 import json
+from models.load_many import LoadManyMixin
+
+class LLM(LoadManyMixin):
+    load_with_db = False
+
+    # Check the model name against the provider's model list before querying.
+    # Google models are always checked; set True to check the other providers too.
+    preflight = False
 
-class LLM:
     def __init__(self, type=None, model_name=None,
                  max_tokens=None, seed=None, temperature=None,
-                 object_id=None, created=None, name=None, description=None):
+                 object_id=None, created=None, name=None, description=None,
+                 response_cache=CACHE_OFF):
         self.type = type
         self.model_name = model_name
         self.max_tokens = max_tokens
@@ -21,9 +28,13 @@ class LLM:
         self.created = created
         self.name = name
         self.description = description
+        # "off", "on" to reuse responses to repeated deterministic queries,
+        # or "force" to reuse them even when the model samples
+        self.response_cache = response_cache
 
     @classmethod
-    def create(cls, db, type, model_name, max_tokens=2048, seed=None, temperature=0.5, name=None, description=None):
+    def create(cls, db, type, model_name, max_tokens=2048, seed=None, temperature=0.5, name=None, description=None,
+               response_cache=CACHE_OFF):
         """Create a new LLM instance in the database.
         
         Note: db parameter is used only for creation and not stored in the instance.
@@ -36,10 +47,12 @@ class LLM:
             "seed": seed,
             "temperature": temperature,
             "name": name,
-            "description": description
+            "description": description,
+            "response_cache": response_cache
         }
         object_id, created, _ = db.add(object_id=None, properties=properties, object_type="llm")
-        return cls(type, model_name, max_tokens, seed, temperature, object_id=object_id, created=created, name=name, description=description)
+        return cls(type, model_name, max_tokens, seed, temperature, object_id=object_id, created=created, name=name,
+                   description=description, response_cache=response_cache)
 
     @classmethod
     def load(cls, db, object_id):
@@ -63,21 +76,116 @@ class LLM:
         db.update(self.object_id, kwargs)
 
     def query(self, context, prompt):
+        """Query the model and return its response text.
+
+        The response is an LLMResponse whose call attribute records the
+        provider, model, token counts, latency and retries of the query.
+        """
+        self._coerce_parameters()
+        start = time.perf_counter()
+        cache, key = self._response_cache_entry(context, prompt)
+        if cache is not None:
+            response = cache.get(key)
+            if response is not None:
+                return self._record_call(response, time.perf_counter() - start, cached=True)
+        response = self.query_provider(context, prompt)
+        if cache is not None:
+            cache.put(key, response)
+        return self._record_call(response, time.perf_counter() - start)
+
+    def query_provider(self, context, prompt):
+        """Send one query to the provider, bypassing the response cache."""
+        backend = self.backend
+        return retry_policy.call(self.type, lambda: backend.complete(self, context, prompt))
+
+    def query_stream(self, context, prompt):
+        """Query the model, yielding the response text in chunks as they arrive.
+
+        When the generator finishes it returns the full response, an LLMResponse
+        with its call record, so callers can write
+        `response = yield from llm.query_stream(context, prompt)`. A cached
+        response is yielded as a single chunk. Only opening the stream is
+        retried; an error part way through a response is raised to the caller.
+        """
+        self._coerce_parameters()
+        start = time.perf_counter()
+        cache, key = self._response_cache_entry(context, prompt)
+        if cache is not None:
+            response = cache.get(key)
+            if response is not None:
+                yield response
+                return self._record_call(response, time.perf_counter() - start, cached=True)
+        usage = {}
+        chunks = []
+        for chunk in self.stream_provider(context, prompt, usage):
+            chunks.append(chunk)
+            yield chunk
+        response = LLMResponse("".join(chunks), usage)
+        if cache is not None:
+            cache.put(key, response)
+        return self._record_call(response, time.perf_counter() - start)
+
+    def stream_provider(self, context, prompt, usage):
+        """Stream one query from the provider, bypassing the response cache.
+
+        Token counts are written into usage once the provider reports them.
+        """
+        return self.backend.stream(self, context, prompt, usage)
+
+    async def aquery(self, context, prompt, engine=None):
+        """Query the model without blocking the event loop.
+
+        The query goes through engine (the shared query_engine by default), which
+        limits concurrent queries and request rates per provider and model and
+        retries transient errors. Many queries can be awaited together, e.g. with
+        asyncio.gather or engine.query_many.
+        """
+        self._coerce_parameters()
+        start = time.perf_counter()
+        cache, key = self._response_cache_entry(context, prompt)
+        if cache is not None:
+            response = await asyncio.to_thread(cache.get, key)
+            if response is not None:
+                return self._record_call(response, time.perf_counter() - start, cached=True)
+        response = await (engine or query_engine).query(self, context, prompt)
+        if cache is not None:
+            await asyncio.to_thread(cache.put, key, response)
+        return self._record_call(response, time.perf_counter() - start)
+
+    async def aquery_provider(self, context, prompt):
+        """Send one async query to the provider, without limits or retries."""
+        return await self.backend.acomplete(self, context, prompt)
+
+    @property
+    def backend(self):
+        """The provider backend for this LLM's type (see models.llm_backends)."""
+        return get_backend(self.type)
+
+    def _record_call(self, response, latency, cached=False):
+        # Token counts and retries come from the backend; cached responses cost no tokens
+        usage = getattr(response, "call", {})
+        if cached:
+            usage = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        return LLMResponse(response, call_record(self, usage.get("prompt_tokens"), usage.get("completion_tokens"),
+                                                 latency, usage.get("retries", 0), cached,
+                                                 usage.get("cached_tokens")))
+
+    def _response_cache_entry(self, context, prompt):
+        """Return the response cache and this query's key in it, or (None, None)
+        if the query should not be cached.
+
+        Caching is opt-in per LLM. With "on", sampled queries (a nonzero
+        temperature without a seed the provider honours) always go to the model.
+        """
+        mode = self.response_cache or CACHE_OFF
+        if mode == CACHE_OFF or (mode == CACHE_ON and not is_deterministic(self)):
+            return None, None
+        return get_response_cache(), request_key(self, context, prompt)
+
+    def _coerce_parameters(self):
         self.max_tokens = int(self.max_tokens)
         self.temperature = float(self.temperature)
         self.seed = int(self.seed)
-        if self.type == 'OpenAI':
-            return self.query_openai(context, prompt)
-        elif self.type == 'Anthropic':
-            return self.query_anthropic(context, prompt)
-        elif self.type == 'Groq':
-            return self.query_groq(context, prompt)
-        elif self.type == 'GoogleAI':
-            return self.query_google_model(context, prompt)
-        elif self.type == 'LocalModel':
-            return self.query_local_model(context, prompt)
-        else:
-            raise ValueError(f"Unsupported llm type: {self.type}")
         
     def to_json(self):
         return json.dumps({
@@ -89,270 +197,10 @@ class LLM:
             "object_id": self.object_id,
             "created": self.created,
             "name": self.name,
-            "description": self.description
+            "description": self.description,
+            "response_cache": self.response_cache
         })
     
     
-    def query_openai(self, context, prompt):
-        """
-        Queries the OpenAI model with the given context and prompt.
-
-        :param context: The context to use when querying the model.
-        :param prompt: The prompt to use when querying the model.
-        :return: The model's response
-        (maybe later: also return tokens used.)
-        """
-        # Load the API keys
-        key = load_api_key("OPENAI_API_KEY")
-        if not key:
-            raise EnvironmentError("OPENAI_API_KEY environment variable not set.")
-        client = OpenAI(api_key=key)
-        backoff_time = 10  # Start backoff time at 10 second
-        retries = 0
-        max_retries = 5
-        while retries < max_retries:
-            try:
-                if self.model_name == "o1-preview" or self.model_name == "o1-mini":
-                    response = client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "user", "content": context + "  " + prompt}])
-                else:
-                    response = client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": context},
-                        {"role": "user", "content": prompt}],
-                    max_tokens=self.max_tokens,
-                    n=1,
-                    stop=None,
-                    seed=self.seed,
-                    temperature=self.temperature)
-                response_content = response.choices[0].message.content.strip()
-                return response_content
-        
-            except APIConnectionError as e:
-                print(f"AIP connection error, retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2 # Double the backoff time for the next retry
-            except InternalServerError as e:
-                print(f"Server issue detected, retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2 # Double the backoff time for the next retry
-            except APIError as e:
-                raise Exception(f"API error occurred: {e}")
-            except Exception as e:
-                raise Exception(f"An unexpected error occurred: {e}")
-        else:
-            raise Exception(f"Error: Max retries exceeded. Last exception: {e}")
-    
-        
-    def query_anthropic(self, context, prompt):
-        """
-        Queries the Anthropic model with the given context and prompt.
-
-        :param context: The context to use when querying the model.
-        :param prompt: The prompt to use when querying the model.
-        :return: The model's response
-        (maybe later: also return tokens used.)
-        """
-        # Load the API keys
-        key = load_api_key("ANTHROPIC_API_KEY")
-        if not key:
-            raise EnvironmentError("ANTHROPIC_API_KEY environment variable not set.")
-        client = anthropic.Anthropic(api_key=key)
-        backoff_time = 10  # Start backoff time at 10 second
-        retries = 0
-        max_retries = 5
-        while retries < max_retries:
-            try:
-                response = client.messages.create(
-                    model=self.model_name,
-                    max_tokens=self.max_tokens,
-                    temperature=self.temperature,
-                    system=context,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                response_content = response.content[0].text
-            
-                return response_content
-        
-            except APIConnectionError as e:
-                print(f"AIP connection error, retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2 # Double the backoff time for the next retry
-            except InternalServerError as e:
-                print(f"Server issue detected, retrying in {backoff_time} seconds...")
-                time.sleep(backoff_time)
-                retries += 1
-                backoff_time *= 2 # Double the backoff time for the next retry
-            except APIError as e:
-                raise Exception(f"API error occurred: {e}")
-            except Exception as e:
-                raise Exception(f"An unexpected error occurred: {e}")
-        else:
-            raise Exception(f"Error: Max retries exceeded. Last exception: {e}")
-
-
-    def query_groq(self, context, prompt):
-        """
-        Queries a model hosted on groq with the given context and prompt.
-
-        :param context: The context to use when querying the model.
-        :param prompt: The prompt to use when querying the model.
-        :return: the model's response.
-        (maybe later: also return tokens used.)
-        """
-        key = load_api_key("GROQ_API_KEY")
-        if not key:
-            raise EnvironmentError("GROQ_API_KEY environment variable not set.")
-        client = Groq(api_key=key)
-
-        backoff_time = 10
-        retries = 0
-        max_retries = 5
-        while retries < max_retries:
-            try:
-                response = client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[
-                        {"role": "system", "content": context},
-                        {"role": "user", "content": prompt}],
-                    max_tokens=self.max_tokens,
-                    stop=None,
-                    seed=self.seed,
-                    temperature=self.temperature,
-                )
-                response_content = response.choices[0].message.content.strip()
-                return response_content
-            except requests.exceptions.RequestException as e:
-                if e.response is not None and e.response.status_code in [500, 502, 503]: # Server error wait and retry
-                    print(f"Server issue detected (status code {e.response.status_code}), retrying in {backoff_time} seconds...")
-                    time.sleep(backoff_time)
-                    retries += 1
-                    backoff_time *= 2
-                else:
-                    raise Exception(f"Request error occurred: {e}")
-            except Exception as e:
-                raise Exception(f"An unexpected error occurred: {e}")
-        
-        raise Exception(f"Error: Max retries exceeded. Last exception: {e}")
-   
-    # google models
-    def query_google_model(self, context, prompt):
-        '''
-        Queries a model hosted on google with the given context and prompt.
-        #models: gemini-1.5-pro,  gemini-1.5-flash, gemini-1.0-pro
-        :param context: The context to use when querying the model.
-        :param prompt: The prompt to use when querying the model.
-        :return: the model's response.
-        '''
-        # Load the API keys
-        key = load_api_key("GOOGLEAI_KEY")
-        if not key:
-            raise EnvironmentError("GOOGLEAI_KEY environment variable not set.")
-        # configuration load key  
-        genai.configure(api_key=key)
-
-        available_models = [m.name.split('/')[1] for m in genai.list_models()]
-        if self.model_name not in available_models:
-            raise ValueError(f"Unsupported model name: {self.model_name}, available models are: {available_models}")
-        
-        #set up model 
-        model = genai.GenerativeModel(self.model_name)
-        # full_prompt = context + prompt
-        #define message 
-        messages = [
-            {'role':'model',
-             'parts':context},
-            {'role':'user',
-            'parts': prompt}
-            ]
-        
-        backoff_time = 10
-        retries = 0
-        max_retries = 5
-        while retries < max_retries:
-            try: 
-                response = model.generate_content(
-                    messages, 
-                    generation_config=genai.types.GenerationConfig(
-                        max_output_tokens=self.max_tokens, 
-                        temperature=self.temperature
-                    )
-                )
-                response_content = response.text
-                return response_content
-            except requests.exceptions.RequestException as e:
-                if e.response is not None and e.response.status_code in [500, 503]: # Server error wait and retry
-                    print(f"Server issue detected (status code {e.response.status_code}), retrying in {backoff_time} seconds...")
-                    time.sleep(backoff_time)
-                    retries += 1
-                    backoff_time *= 2
-                else:
-                    raise Exception(f"Request error occurred: {e}")
-            except Exception as e:
-                raise Exception(f"An unexpected error occurred: {e}")
-        
-        raise Exception(f"Error: Max retries exceeded. Last exception: {e}")
-
-    
-   
-    def query_local_model(self, context, prompt):
-        '''
-        Queries a model hosted on a local server with the given context and prompt.
-
-        :param context: The context to use when querying the model.
-        :param prompt: The prompt to use when querying the model.
-        :return: the model's response.
-        '''
-        url = load_local_server_url()
-        if not url:
-            raise EnvironmentError("LOCAL_MODEL_HOST URL environment variable not set.")
-    
-        if not self.model_name in ['mistral:7b', 'mixtral:latest', 'mixtral:instruct', 'llama2:7b', 'llama2:latest']:
-            raise ValueError(f"Unsupported model name: {self.model_name}, supported models are: mistral:7b, mixtral:latest, mixtral:instruct, llama2:7b, llama2:latest")
-        
-        backoff_time = 10
-        retries = 0
-        max_retries = 5
-        while retries < max_retries:
-            try: 
-                response = requests.post(url, json={
-                    "model": self.model_name,
-                    "stream": False, 
-                    "messages": [
-                        {"role": "system", "content": context}, 
-                        {"role": "user", "content": prompt}],
-                    "options": {
-                    "seed": self.seed,
-                    "temperature": self.temperature,
-                    "num_predict": self.max_tokens
-                }
-                }, timeout=120)
-       
-                if response.status_code == 200:
-                    output = response.json()
-                    analysis = output['message']['content']
-                    return analysis
-            except requests.exceptions.RequestException as e:
-                if e.response is not None and e.response.status_code in [500, 502, 503]:
-                    print(f"Server issue detected (status code {e.response.status_code}), retrying in {backoff_time} seconds...")
-                    time.sleep(backoff_time)
-                    retries += 1
-                    backoff_time *= 2
-                else:
-                    raise Exception(f"Request error occurred: {e}")
-            except Exception as e:
-                raise Exception(f"An unexpected error occurred: {e}")
-
-        raise Exception(f"Error: Max retries exceeded. Last exception: {e}")
-    
-
     def __repr__(self):
         return f"<llm {self.type} {self.model_name} (object_id: {self.object_id})>"
@@ -0,0 +1,95 @@
+import asyncio
+
+from app.config import load_api_key
+from models.llm_backends import ProviderBackend, STREAMING, ASYNC, BATCH, SYSTEM_PROMPT
+from models.llm_calls import LLMResponse
+from models.llm_catalog import model_catalog
+from models.llm_clients import get_client, get_async_client
+from models.llm_prompt import split_prompt
+from models.llm_retry import retry_policy
+
+
+def anthropic_usage(response):
+    """Token usage of an Anthropic message."""
+    usage = getattr(response, "usage", None)
+    # input_tokens excludes the tokens written to or read from the prompt cache
+    input_tokens = getattr(usage, "input_tokens", None)
+    cache_write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    cache_read = getattr(usage, "cache_read_input_tokens", None) or 0
+    return {"prompt_tokens": input_tokens + cache_write + cache_read if input_tokens is not None else None,
+            "completion_tokens": getattr(usage, "output_tokens", None),
+            "cached_tokens": cache_read}
+
+
+class AnthropicBackend(ProviderBackend):
+    # The Messages API takes no seed
+    capabilities = frozenset({STREAMING, ASYNC, BATCH, SYSTEM_PROMPT})
+
+    def credential(self):
+        key = load_api_key("ANTHROPIC_API_KEY")
+        if not key:
+            raise EnvironmentError("ANTHROPIC_API_KEY environment variable not set.")
+        return key
+
+    def create_client(self, api_key):
+        import anthropic
+        return anthropic.Anthropic(api_key=api_key)
+
+    def create_async_client(self, api_key):
+        import anthropic
+        return anthropic.AsyncAnthropic(api_key=api_key)
+
+    def list_models(self, api_key):
+        client = get_client(self.name, api_key)
+        if not hasattr(client, "models"):
+            # Older SDKs have no model listing endpoint; the preflight is skipped
+            return None
+        return [model.id for model in client.models.list()]
+
+    def request(self, llm, context, prompt):
+        """The Messages API parameters of a query. A shared prompt prefix goes
+        first in the system prompt, marked for caching."""
+        prefix, body = split_prompt(prompt)
+        system = context
+        if prefix:
+            system = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+            if context:
+                system.append({"type": "text", "text": context})
+        return {"model": llm.model_name,
+                "max_tokens": llm.max_tokens,
+                "temperature": llm.temperature,
+                "system": system,
+                "messages": [{"role": "user", "content": body}]}
+
+    def client(self, llm):
+        key = self.credential()
+        if llm.preflight:
+            model_catalog.check(self.name, llm.model_name, key)
+        return get_client(self.name, key)
+
+    def complete(self, llm, context, prompt):
+        response = self.client(llm).messages.create(**self.request(llm, context, prompt))
+        return LLMResponse(response.content[0].text, anthropic_usage(response))
+
+    async def acomplete(self, llm, context, prompt):
+        key = self.credential()
+        if llm.preflight:
+            await asyncio.to_thread(model_catalog.check, self.name, llm.model_name, key)
+        response = await get_async_client(self.name, key).messages.create(**self.request(llm, context, prompt))
+        return LLMResponse(response.content[0].text, anthropic_usage(response))
+
+    def stream(self, llm, context, prompt, usage):
+        client = self.client(llm)
+        stream = retry_policy.call(self.name, lambda: client.messages.create(
+            **self.request(llm, context, prompt), stream=True))
+        for event in stream:
+            if event.type == "message_start":
+                usage.update(anthropic_usage(event.message))
+            elif event.type == "content_block_delta" and getattr(event.delta, "text", None):
+                yield event.delta.text
+            elif event.type == "message_delta":
+                usage["completion_tokens"] = event.usage.output_tokens
+
+    def batch_provider(self):
+        from models.llm_batch import AnthropicBatchProvider
+        return AnthropicBatchProvider(get_client(self.name, self.credential()), self)
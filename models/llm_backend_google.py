@@ -0,0 +1,85 @@
+import asyncio
+
+from app.config import load_api_key
+from models.llm_backends import ProviderBackend, STREAMING, ASYNC
+from models.llm_calls import LLMResponse
+from models.llm_catalog import model_catalog
+from models.llm_clients import get_client, get_async_client
+from models.llm_retry import retry_policy
+
+
+def google_usage(response):
+    """Token usage of a Gemini response or stream chunk."""
+    usage = getattr(response, "usage_metadata", None)
+    return {"prompt_tokens": getattr(usage, "prompt_token_count", None),
+            "completion_tokens": getattr(usage, "candidates_token_count", None)}
+
+
+class GoogleBackend(ProviderBackend):
+    """Gemini models through google.generativeai. The context is sent as an
+    opening model turn rather than a system prompt, and the seed is ignored.
+    The model name is always checked against the model list, which is cached.
+    """
+
+    capabilities = frozenset({STREAMING, ASYNC})
+
+    def credential(self):
+        key = load_api_key("GOOGLEAI_KEY")
+        if not key:
+            raise EnvironmentError("GOOGLEAI_KEY environment variable not set.")
+        return key
+
+    def create_client(self, api_key):
+        # google.generativeai holds one process-wide configuration, so the client
+        # registry reconfigures it when a different key is requested
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        return genai
+
+    # The configured module's models have *_async methods
+    create_async_client = create_client
+
+    def list_models(self, api_key):
+        genai = get_client(self.name, api_key)
+        return [model.name.split('/')[1] for model in genai.list_models()]
+
+    @staticmethod
+    def messages(context, prompt):
+        return [{'role': 'model', 'parts': context},
+                {'role': 'user', 'parts': prompt}]
+
+    @staticmethod
+    def generation_config(genai, llm):
+        return genai.types.GenerationConfig(max_output_tokens=llm.max_tokens, temperature=llm.temperature)
+
+    def model(self, llm):
+        key = self.credential()
+        genai = get_client(self.name, key)
+        model_catalog.check(self.name, llm.model_name, key)
+        return genai, genai.GenerativeModel(llm.model_name)
+
+    def complete(self, llm, context, prompt):
+        genai, model = self.model(llm)
+        response = model.generate_content(self.messages(context, prompt),
+                                          generation_config=self.generation_config(genai, llm))
+        return LLMResponse(response.text, google_usage(response))
+
+    async def acomplete(self, llm, context, prompt):
+        key = self.credential()
+        genai = get_async_client(self.name, key)
+        # The first check of a key fetches the model list, so keep it off the event loop
+        await asyncio.to_thread(model_catalog.check, self.name, llm.model_name, key)
+        model = genai.GenerativeModel(llm.model_name)
+        response = await model.generate_content_async(self.messages(context, prompt),
+                                                      generation_config=self.generation_config(genai, llm))
+        return LLMResponse(response.text, google_usage(response))
+
+    def stream(self, llm, context, prompt, usage):
+        genai, model = self.model(llm)
+        stream = retry_policy.call(self.name, lambda: model.generate_content(
+            self.messages(context, prompt), generation_config=self.generation_config(genai, llm), stream=True))
+        for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+            if getattr(chunk, "usage_metadata", None):
+                usage.update(google_usage(chunk))
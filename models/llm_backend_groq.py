@@ -0,0 +1,30 @@
+from app.config import load_api_key
+from models.llm_backend_openai import ChatCompletionsBackend, openai_usage
+
+
+class GroqBackend(ChatCompletionsBackend):
+    # The Groq SDK takes no stream_options; usage comes on the last chunk under x_groq
+    stream_options = None
+
+    def credential(self):
+        key = load_api_key("GROQ_API_KEY")
+        if not key:
+            raise EnvironmentError("GROQ_API_KEY environment variable not set.")
+        return key
+
+    def create_client(self, api_key):
+        from groq import Groq
+        return Groq(api_key=api_key)
+
+    def create_async_client(self, api_key):
+        from groq import AsyncGroq
+        return AsyncGroq(api_key=api_key)
+
+    def request(self, llm, context, prompt):
+        request = super().request(llm, context, prompt)
+        del request["n"]
+        return request
+
+    def stream_usage(self, chunk):
+        x_groq = getattr(chunk, "x_groq", None)
+        return openai_usage(x_groq) if getattr(x_groq, "usage", None) else None
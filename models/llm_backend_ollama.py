@@ -0,0 +1,99 @@
+import json
+import asyncio
+from urllib.parse import urljoin
+
+from app.config import load_local_server_url
+from models.llm_backends import ProviderBackend, STREAMING, ASYNC, SEED, SYSTEM_PROMPT
+from models.llm_calls import LLMResponse
+from models.llm_catalog import model_catalog
+from models.llm_clients import get_client, get_async_client, POOL_SIZE
+from models.llm_retry import retry_policy
+
+
+def ollama_usage(output):
+    # Ollama reports the prompt and generated token counts as eval counts
+    return {"prompt_tokens": output.get("prompt_eval_count"),
+            "completion_tokens": output.get("eval_count")}
+
+
+class OllamaBackend(ProviderBackend):
+    """Models served by Ollama's /api/chat at LOCAL_MODEL_HOST.
+
+    Any model pulled into the server can be used; with LLM.preflight set the
+    model name is checked against the server's installed models first.
+    """
+
+    capabilities = frozenset({STREAMING, ASYNC, SEED, SYSTEM_PROMPT})
+
+    def create_client(self, credential=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def create_async_client(self, credential=None):
+        import httpx
+        return httpx.AsyncClient(limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE))
+
+    def list_models(self, url):
+        # Ollama lists installed models at /api/tags on the same host as /api/chat
+        response = get_client(self.name).get(urljoin(url, "/api/tags"), timeout=10)
+        response.raise_for_status()
+        return [model["name"] for model in response.json().get("models", [])]
+
+    def url(self, llm):
+        url = load_local_server_url()
+        if not url:
+            raise EnvironmentError("LOCAL_MODEL_HOST URL environment variable not set.")
+        if llm.preflight:
+            model_catalog.check(self.name, llm.model_name, url)
+        return url
+
+    def request(self, llm, context, prompt, stream=False):
+        return {"model": llm.model_name,
+                "stream": stream,
+                "messages": self.chat_messages(context, prompt),
+                "options": {"seed": llm.seed,
+                            "temperature": llm.temperature,
+                            "num_predict": llm.max_tokens}}
+
+    def complete(self, llm, context, prompt):
+        response = get_client(self.name).post(self.url(llm), json=self.request(llm, context, prompt), timeout=120)
+        # Error statuses raise HTTPError, which the retry policy retries if transient
+        response.raise_for_status()
+        output = response.json()
+        return LLMResponse(output['message']['content'], ollama_usage(output))
+
+    async def acomplete(self, llm, context, prompt):
+        url = await asyncio.to_thread(self.url, llm)
+        response = await get_async_client(self.name).post(url, json=self.request(llm, context, prompt),
+                                                          timeout=120)
+        response.raise_for_status()
+        output = response.json()
+        return LLMResponse(output['message']['content'], ollama_usage(output))
+
+    def stream(self, llm, context, prompt, usage):
+        url = self.url(llm)
+        session = get_client(self.name)
+
+        def open_stream():
+            response = session.post(url, json=self.request(llm, context, prompt, stream=True),
+                                    stream=True, timeout=120)
+            response.raise_for_status()
+            return response
+
+        response = retry_policy.call(self.name, open_stream)
+        with response:
+            # Ollama streams one JSON object per line; the last has done set and the token counts
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                output = json.loads(line)
+                content = output.get('message', {}).get('content')
+                if content:
+                    yield content
+                if output.get('done'):
+                    usage.update(ollama_usage(output))
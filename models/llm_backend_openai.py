@@ -0,0 +1,150 @@
+import asyncio
+
+from app.config import load_api_key, load_openai_compatible_server
+from models.llm_backends import ProviderBackend, STREAMING, ASYNC, BATCH, SEED, SYSTEM_PROMPT
+from models.llm_calls import LLMResponse
+from models.llm_catalog import model_catalog
+from models.llm_clients import get_client, get_async_client
+from models.llm_retry import retry_policy
+
+# Reasoning models take neither a system message nor sampling parameters, and do not stream
+REASONING_MODELS = ("o1-preview", "o1-mini")
+
+
+def openai_usage(response):
+    """Token usage of an OpenAI style response or final stream chunk."""
+    usage = getattr(response, "usage", None)
+    # Newer API versions report the prompt tokens served from the prompt cache
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+    return {"prompt_tokens": getattr(usage, "prompt_tokens", None),
+            "completion_tokens": getattr(usage, "completion_tokens", None),
+            "cached_tokens": cached}
+
+
+class ChatCompletionsBackend(ProviderBackend):
+    """Base for providers with an OpenAI style chat completions API.
+
+    Subclasses say where the client comes from with credential, the key
+    (or server) their clients are shared by.
+    """
+
+    capabilities = frozenset({STREAMING, ASYNC, SEED, SYSTEM_PROMPT})
+    # Ask for token usage on the last chunk of a stream
+    stream_options = {"include_usage": True}
+
+    def credential(self):
+        raise NotImplementedError
+
+    def client(self, llm):
+        credential = self.credential()
+        if llm.preflight:
+            model_catalog.check(self.name, llm.model_name, credential)
+        return get_client(self.name, credential)
+
+    async def async_client(self, llm):
+        credential = self.credential()
+        if llm.preflight:
+            await asyncio.to_thread(model_catalog.check, self.name, llm.model_name, credential)
+        return get_async_client(self.name, credential)
+
+    def list_models(self, credential):
+        # vLLM and llama.cpp also list their served models at /v1/models
+        return [model.id for model in get_client(self.name, credential).models.list()]
+
+    def request(self, llm, context, prompt):
+        """The chat completion parameters of a query."""
+        return {"model": llm.model_name,
+                "messages": self.chat_messages(context, prompt),
+                "max_tokens": llm.max_tokens,
+                "n": 1,
+                "stop": None,
+                "seed": llm.seed,
+                "temperature": llm.temperature}
+
+    def complete(self, llm, context, prompt):
+        response = self.client(llm).chat.completions.create(**self.request(llm, context, prompt))
+        return LLMResponse(response.choices[0].message.content.strip(), openai_usage(response))
+
+    async def acomplete(self, llm, context, prompt):
+        client = await self.async_client(llm)
+        response = await client.chat.completions.create(**self.request(llm, context, prompt))
+        return LLMResponse(response.choices[0].message.content.strip(), openai_usage(response))
+
+    def stream(self, llm, context, prompt, usage):
+        client = self.client(llm)
+        options = {"stream_options": self.stream_options} if self.stream_options else {}
+        stream = retry_policy.call(self.name, lambda: client.chat.completions.create(
+            **self.request(llm, context, prompt), stream=True, **options))
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            chunk_usage = self.stream_usage(chunk)
+            if chunk_usage:
+                usage.update(chunk_usage)
+
+    def stream_usage(self, chunk):
+        """Token usage reported on a stream chunk, or None; the last chunk carries it."""
+        return openai_usage(chunk) if getattr(chunk, "usage", None) else None
+
+
+class OpenAIBackend(ChatCompletionsBackend):
+    capabilities = frozenset({STREAMING, ASYNC, BATCH, SEED, SYSTEM_PROMPT})
+
+    def credential(self):
+        key = load_api_key("OPENAI_API_KEY")
+        if not key:
+            raise EnvironmentError("OPENAI_API_KEY environment variable not set.")
+        return key
+
+    def create_client(self, api_key):
+        from openai import OpenAI
+        return OpenAI(api_key=api_key)
+
+    def create_async_client(self, api_key):
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=api_key)
+
+    def request(self, llm, context, prompt):
+        if llm.model_name in REASONING_MODELS:
+            return {"model": llm.model_name,
+                    "messages": [{"role": "user", "content": context + "  " + prompt}]}
+        return super().request(llm, context, prompt)
+
+    def stream(self, llm, context, prompt, usage):
+        if llm.model_name in REASONING_MODELS:
+            # The response arrives as one chunk
+            return super(ChatCompletionsBackend, self).stream(llm, context, prompt, usage)
+        return super().stream(llm, context, prompt, usage)
+
+    def batch_provider(self):
+        from models.llm_batch import OpenAIBatchProvider
+        return OpenAIBatchProvider(get_client(self.name, self.credential()), self)
+
+
+class OpenAICompatibleBackend(ChatCompletionsBackend):
+    """A self-hosted server with an OpenAI compatible API, such as vLLM
+    (`vllm serve <model>`) or llama.cpp (`llama-server`), set in the config
+    file as OPENAI_COMPATIBLE_HOST, e.g. http://localhost:8000/v1, with an
+    optional OPENAI_COMPATIBLE_API_KEY.
+
+    Both servers cache repeated prompt prefixes (vLLM with prefix caching
+    enabled), which the shared prompt prefix of a run takes advantage of.
+    """
+
+    def credential(self):
+        base_url, api_key = load_openai_compatible_server()
+        if not base_url:
+            raise EnvironmentError("OPENAI_COMPATIBLE_HOST URL environment variable not set.")
+        return (base_url, api_key)
+
+    # Keyed by the server's (base URL, API key); local servers often need no key
+    def create_client(self, server):
+        from openai import OpenAI
+        base_url, api_key = server
+        return OpenAI(base_url=base_url, api_key=api_key or "none")
+
+    def create_async_client(self, server):
+        from openai import AsyncOpenAI
+        base_url, api_key = server
+        return AsyncOpenAI(base_url=base_url, api_key=api_key or "none")
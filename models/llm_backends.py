@@ -0,0 +1,166 @@
+import asyncio
+import importlib
+import threading
+
+from app.config import load_llm_backends
+from models.llm_retry import retry_policy
+
+# What a provider backend supports, declared in its capabilities
+STREAMING = "streaming"          # streams responses token by token
+ASYNC = "async"                  # has a native async client
+BATCH = "batch"                  # has a batch API (see models.llm_batch)
+SEED = "seed"                    # honours the seed, so seeded sampling is repeatable
+SYSTEM_PROMPT = "system_prompt"  # takes the agent context as a system message
+
+
+class ProviderBackend:
+    """How to query one LLM provider.
+
+    A backend is created once per provider name on first use and shared by
+    every LLM of that type, so it keeps no per query state; provider clients
+    come from models.llm_clients, which creates them with the backend's
+    create_client and create_async_client, and the model list checked by
+    LLM.preflight comes from list_models. Subclasses implement complete, and
+    override acomplete and stream when they have async and streaming clients,
+    listing what they support in capabilities.
+    """
+
+    capabilities = frozenset()
+
+    def __init__(self, name):
+        self.name = name
+
+    def create_client(self, credential):
+        """A new client for a credential (an API key, or what the backend's
+        queries are keyed by), shared by all queries with that credential."""
+        raise NotImplementedError(f"{self.name} has no client")
+
+    def create_async_client(self, credential):
+        """A new async client for a credential, shared within one event loop."""
+        raise NotImplementedError(f"{self.name} has no async client")
+
+    def complete(self, llm, context, prompt):
+        """Send one query and return an LLMResponse carrying its token usage.
+
+        Makes a single attempt; the caller retries transient errors.
+        """
+        raise NotImplementedError
+
+    async def acomplete(self, llm, context, prompt):
+        """Async complete. Backends without an async client run complete in a thread."""
+        return await asyncio.to_thread(self.complete, llm, context, prompt)
+
+    def stream(self, llm, context, prompt, usage):
+        """Yield the response in chunks, writing its token usage into usage.
+
+        Backends without streaming yield the whole response as one chunk.
+        """
+        response = retry_policy.call(self.name, lambda: self.complete(llm, context, prompt))
+        usage.update(response.call)
+        yield str(response)
+
+    def batch_provider(self):
+        """The batch provider used by models.llm_batch, for backends with BATCH."""
+        return None
+
+    def list_models(self, credential):
+        """The names of the models offered for a credential, which models.llm_catalog
+        checks model names against, or None if the provider cannot list them."""
+        return None
+
+    def chat_messages(self, context, prompt):
+        """Chat messages for a query: the context as the system message and the
+        prompt as the user message. A PrefixedPrompt's text starts with its
+        shared prefix, so the data opens the first user turn, above the body
+        that refers to it, and servers can cache it across agents with the same
+        context. Without SYSTEM_PROMPT the context opens the user message instead."""
+        if SYSTEM_PROMPT not in self.capabilities:
+            return [{"role": "user", "content": context + "  " + str(prompt)}]
+        return [{"role": "system", "content": context}, {"role": "user", "content": str(prompt)}]
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.name}>"
+
+
+# Provider name to "module:class" of its backend; the module is imported on first use
+BACKENDS = {
+    "OpenAI": "models.llm_backend_openai:OpenAIBackend",
+    "OpenAICompatible": "models.llm_backend_openai:OpenAICompatibleBackend",
+    "Anthropic": "models.llm_backend_anthropic:AnthropicBackend",
+    "Groq": "models.llm_backend_groq:GroqBackend",
+    "GoogleAI": "models.llm_backend_google:GoogleBackend",
+    "LocalModel": "models.llm_backend_ollama:OllamaBackend",
+}
+
+
+class BackendRegistry:
+    """Provider backends by name, loaded lazily on first use.
+
+    Backends are registered as "module:class" specs, so a provider's module
+    and its SDK are only imported when an LLM of that type is queried. Besides
+    the built in BACKENDS, backends can be added without code changes in the
+    [LLM_BACKENDS] section of the config file:
+
+        [LLM_BACKENDS]
+        MyServer = mypackage.my_backend:MyServerBackend
+
+    (config option names are case insensitive, so these match LLM types
+    ignoring case) or at runtime with register_backend(name, spec_or_class).
+    """
+
+    def __init__(self, specs=None, load_configured=load_llm_backends):
+        self.specs = dict(BACKENDS if specs is None else specs)
+        self.load_configured = load_configured
+        self._configured = False
+        self._configured_specs = {}
+        self._backends = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, backend):
+        """Register a backend by "module:class" spec or ProviderBackend subclass."""
+        with self._lock:
+            self.specs[name] = backend
+            self._backends.pop(name, None)
+
+    def names(self):
+        with self._lock:
+            self._add_configured()
+            return list(self.specs) + [name for name in self._configured_specs
+                                       if name not in {known.lower() for known in self.specs}]
+
+    def get(self, name):
+        """The backend for a provider name, importing it on first use."""
+        with self._lock:
+            backend = self._backends.get(name)
+            if backend is not None:
+                return backend
+            self._add_configured()
+            spec = self.specs.get(name) or self._configured_specs.get(name.lower())
+            if spec is None:
+                raise ValueError(f"Unsupported llm type: {name}")
+            if isinstance(spec, str):
+                module_name, _, class_name = spec.partition(":")
+                spec = getattr(importlib.import_module(module_name), class_name)
+            backend = self._backends[name] = spec(name)
+            return backend
+
+    def _add_configured(self):
+        if self._configured or self.load_configured is None:
+            return
+        self._configured = True
+        try:
+            configured = self.load_configured()
+        except FileNotFoundError:
+            return
+        self._configured_specs = {name.lower(): spec for name, spec in configured.items()}
+
+
+backend_registry = BackendRegistry()
+
+
+def get_backend(name):
+    return backend_registry.get(name)
+
+
+def register_backend(name, backend):
+    backend_registry.register(name, backend)
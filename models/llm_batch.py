@@ -0,0 +1,274 @@
+import time
+import json
+import logging
+
+from models.llm_backends import get_backend, BATCH
+from models.llm_calls import LLMResponse, call_record
+from models.llm_engine import query_engine
+from models.llm_retry import is_retryable
+
+logger = logging.getLogger(__name__)
+
+# Seconds between status checks of a submitted batch, and how long to wait for
+# one before giving up on it (providers finish batches within 24 hours)
+BATCH_POLL_INTERVAL = 30
+BATCH_TIMEOUT = 24 * 3600
+
+# Batch states, as reported by BatchProvider.status
+BATCH_RUNNING = "running"
+BATCH_ENDED = "ended"
+BATCH_FAILED = "failed"
+
+
+class BatchError(Exception):
+    """A query in a batch had no successful result."""
+
+
+class OpenAIBatchProvider:
+    """Submits chat completions through the OpenAI Batch API.
+
+    The requests are uploaded as a JSONL file, run as one batch and their
+    results read back from the batch's output and error files.
+    """
+
+    ENDPOINT = "/v1/chat/completions"
+
+    def __init__(self, client, backend=None):
+        self.client = client
+        # Builds the request bodies, as for direct queries
+        self.backend = backend or get_backend("OpenAI")
+
+    def request(self, custom_id, llm, context, prompt):
+        return {"custom_id": custom_id, "method": "POST", "url": self.ENDPOINT,
+                "body": self.backend.request(llm, context, prompt)}
+
+    def submit(self, requests):
+        """Start a batch of requests and return its id."""
+        lines = "\n".join(json.dumps(request) for request in requests).encode("utf-8")
+        input_file = self.client.files.create(file=("batch.jsonl", lines), purpose="batch")
+        batch = self.client.batches.create(input_file_id=input_file.id, endpoint=self.ENDPOINT,
+                                           completion_window="24h")
+        return batch.id
+
+    def status(self, batch_id):
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status == "failed":
+            return BATCH_FAILED
+        # Expired and cancelled batches still have results for the requests that finished
+        if batch.status in ("completed", "expired", "cancelled"):
+            return BATCH_ENDED
+        return BATCH_RUNNING
+
+    def results(self, batch_id, llms):
+        """Map each custom_id to an LLMResponse, or to a BatchError if its request failed."""
+        batch = self.client.batches.retrieve(batch_id)
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                response = entry.get("response") or {}
+                body = response.get("body") or {}
+                if entry.get("error") or response.get("status_code") != 200:
+                    error = entry.get("error") or body.get("error")
+                    results[entry["custom_id"]] = BatchError(f"Batch request failed: {error}")
+                    continue
+                usage = body.get("usage") or {}
+                results[entry["custom_id"]] = LLMResponse(
+                    body["choices"][0]["message"]["content"].strip(),
+                    call_record(llms[entry["custom_id"]], usage.get("prompt_tokens"),
+                                usage.get("completion_tokens"),
+                                cached_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens")))
+        return results
+
+    def cancel(self, batch_id):
+        self.client.batches.cancel(batch_id)
+
+
+class AnthropicBatchProvider:
+    """Submits messages through the Anthropic Message Batches API.
+
+    The pinned SDK has no batch methods, so the endpoints are called through
+    the client's generic request methods, which reuse its auth and retries.
+    """
+
+    HEADERS = {"anthropic-beta": "message-batches-2024-09-24"}
+
+    def __init__(self, client, backend=None):
+        self.client = client
+        self.backend = backend or get_backend("Anthropic")
+
+    def request(self, custom_id, llm, context, prompt):
+        return {"custom_id": custom_id, "params": self.backend.request(llm, context, prompt)}
+
+    def submit(self, requests):
+        batch = self.client.post("/v1/messages/batches", cast_to=object, body={"requests": requests},
+                                 options={"headers": self.HEADERS})
+        return batch["id"]
+
+    def status(self, batch_id):
+        batch = self.client.get(f"/v1/messages/batches/{batch_id}", cast_to=object,
+                                options={"headers": self.HEADERS})
+        return BATCH_ENDED if batch["processing_status"] == "ended" else BATCH_RUNNING
+
+    def results(self, batch_id, llms):
+        import httpx
+        response = self.client.get(f"/v1/messages/batches/{batch_id}/results", cast_to=httpx.Response,
+                                   options={"headers": self.HEADERS})
+        results = {}
+        for line in response.text.splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            result = entry["result"]
+            if result["type"] != "succeeded":
+                results[entry["custom_id"]] = BatchError(
+                    f"Batch request {result['type']}: {result.get('error')}")
+                continue
+            message = result["message"]
+            usage = message.get("usage") or {}
+            # input_tokens excludes the tokens written to or read from the prompt cache
+            cache_read = usage.get("cache_read_input_tokens") or 0
+            prompt_tokens = (usage.get("input_tokens") or 0) + (usage.get("cache_creation_input_tokens") or 0) + cache_read
+            results[entry["custom_id"]] = LLMResponse(
+                message["content"][0]["text"],
+                call_record(llms[entry["custom_id"]], prompt_tokens, usage.get("output_tokens"),
+                            cached_tokens=cache_read))
+        return results
+
+    def cancel(self, batch_id):
+        self.client.post(f"/v1/messages/batches/{batch_id}/cancel", cast_to=object,
+                         options={"headers": self.HEADERS})
+
+
+class BatchEngine:
+    """Runs queries as provider batch jobs instead of one request each.
+
+    Batches are billed at a discount and have their own, much larger, rate
+    limits, but can take hours to finish, so this suits large non-interactive
+    runs. The queries for each provider with a batch API are submitted as one
+    batch, and all batches are polled until they end. Queries for other
+    providers go through the fallback engine meanwhile.
+
+    It has the run_queries interface of QueryEngine, so runners accept it as
+    their engine:
+        AnalysisRunner(db, analysis_run_id).run_parallel(engine=BatchEngine())
+    """
+
+    def __init__(self, providers=None, fallback=None, poll_interval=BATCH_POLL_INTERVAL,
+                 timeout=BATCH_TIMEOUT, clock=time.monotonic, sleep=time.sleep):
+        # Provider name to BatchProvider; the default ones are created on first use
+        self.providers = providers
+        self.fallback = fallback or query_engine
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+
+    def provider(self, provider_name):
+        """The batch provider for a provider name, or None if it has no batch API."""
+        if self.providers is not None:
+            return self.providers.get(provider_name)
+        try:
+            backend = get_backend(provider_name)
+        except ValueError:
+            return None
+        return backend.batch_provider() if BATCH in backend.capabilities else None
+
+    def run_queries(self, queries, on_result=None):
+        """Run (llm, context, prompt) queries, returning the responses in the same
+        order with an exception in place of any query that failed."""
+        responses = [None] * len(queries)
+
+        def finish(index, response):
+            responses[index] = response
+            if on_result is not None:
+                on_result(index, response)
+
+        providers = {}
+        groups = {}
+        unbatched = []
+        for index, (llm, context, prompt) in enumerate(queries):
+            if llm.type not in providers:
+                providers[llm.type] = self.provider(llm.type)
+            if providers[llm.type] is not None:
+                groups.setdefault(llm.type, []).append(index)
+            else:
+                unbatched.append(index)
+
+        # Submit every batch before waiting on any of them
+        batches = []
+        for provider_name, indexes in groups.items():
+            provider = providers[provider_name]
+            requests = []
+            llms = {}
+            try:
+                for index in indexes:
+                    llm, context, prompt = queries[index]
+                    llm._coerce_parameters()
+                    llms[f"query-{index}"] = llm
+                    requests.append(provider.request(f"query-{index}", llm, context, prompt))
+                batch_id = provider.submit(requests)
+            except Exception as e:
+                for index in indexes:
+                    finish(index, e)
+                continue
+            logger.info(f"Submitted {provider_name} batch {batch_id} with {len(requests)} queries")
+            batches.append((provider, batch_id, indexes, llms, self.clock()))
+
+        if unbatched:
+            fallback_responses = self.fallback.run_queries(
+                [queries[index] for index in unbatched],
+                on_result=lambda position, response: finish(unbatched[position], response))
+            for index, response in zip(unbatched, fallback_responses):
+                responses[index] = response
+
+        self._wait(batches, finish)
+        return responses
+
+    def _wait(self, batches, finish):
+        """Poll the batches until each has ended, failed or timed out, then collect its results.
+
+        A submitted batch is already paid for, so a transient error checking it
+        or fetching its results (a dropped connection, a 5xx) only skips that
+        poll; its queries fail when the batch fails, times out or a poll hits
+        an error that is not worth retrying.
+        """
+        while batches:
+            pending = []
+            for provider, batch_id, indexes, llms, submitted in batches:
+                try:
+                    status = provider.status(batch_id)
+                    if status == BATCH_RUNNING and self.clock() - submitted > self.timeout:
+                        provider.cancel(batch_id)
+                        raise BatchError(f"Batch {batch_id} did not finish within {self.timeout} seconds")
+                    if status == BATCH_RUNNING:
+                        pending.append((provider, batch_id, indexes, llms, submitted))
+                        continue
+                    if status == BATCH_FAILED:
+                        raise BatchError(f"Batch {batch_id} failed")
+                    results = provider.results(batch_id, llms)
+                except Exception as e:
+                    if is_retryable(e) and self.clock() - submitted <= self.timeout:
+                        logger.warning(f"Checking batch {batch_id} failed ({e}), trying again at the next poll")
+                        pending.append((provider, batch_id, indexes, llms, submitted))
+                        continue
+                    for index in indexes:
+                        finish(index, e)
+                    continue
+                turnaround = self.clock() - submitted
+                for index in indexes:
+                    response = results.get(f"query-{index}", BatchError(f"No result for query {index} in batch {batch_id}"))
+                    if isinstance(response, LLMResponse):
+                        # Latency of a batched query is the batch's turnaround
+                        response.call["latency"] = round(turnaround, 3)
+                    finish(index, response)
+            batches = pending
+            if batches:
+                self.sleep(self.poll_interval)
+
+
+batch_engine = BatchEngine()
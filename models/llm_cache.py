@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from app.config import load_llm_cache_path
+from app.sqlite_database import get_connection_pool
+from models.llm_backends import get_backend, SEED
+
+# Cached responses expire after a week, and the least recently used ones are
+# evicted once the cache holds more than CACHE_MAX_BYTES of response text
+CACHE_TTL = 7 * 24 * 3600
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_CACHE_PATH = os.path.expanduser('~/ae_config/llm_cache.db')
+
+# Values of the LLM response_cache property
+CACHE_OFF = "off"
+CACHE_ON = "on"          # cache deterministic queries only
+CACHE_FORCE = "force"    # cache every query, even sampled ones
+
+
+def request_key(llm, context, prompt):
+    """Hash of everything that determines an LLM's response to a query."""
+    request = {
+        "type": llm.type,
+        "model_name": llm.model_name,
+        "max_tokens": llm.max_tokens,
+        "temperature": llm.temperature,
+        "seed": llm.seed,
+        "context": context,
+        "prompt": prompt,
+    }
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def is_deterministic(llm):
+    """Whether repeating a query should give the same response: greedy decoding,
+    or a fixed seed on a provider that honours it."""
+    if llm.temperature is not None and float(llm.temperature) == 0:
+        return True
+    if llm.seed is None:
+        return False
+    try:
+        return SEED in get_backend(llm.type).capabilities
+    except ValueError:
+        return False
+
+
+class ResponseCache:
+    """On-disk cache of LLM responses keyed by a hash of the full request.
+
+    Entries older than ttl seconds are treated as misses and removed. When the
+    stored responses exceed max_bytes, the least recently read entries are
+    evicted. The cache is a SQLite file shared by every thread and process that
+    opens it; hit and miss counters are kept per instance.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.pool = get_connection_pool(path)
+        with self.pool.transaction() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+
+    def get(self, key):
+        """Return the cached response for key, or None on a miss."""
+        now = self.clock()
+        with self.pool.transaction() as conn:
+            row = conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ? AND created_at > ? "
+                               "RETURNING response", (now, key, now - self.ttl)).fetchone()
+            if row is None:
+                conn.execute("DELETE FROM responses WHERE key = ? AND created_at <= ?", (key, now - self.ttl))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return row[0] if row else None
+
+    def put(self, key, response):
+        """Store a response, evicting least recently used entries over max_bytes."""
+        now = self.clock()
+        size = len(response.encode("utf-8"))
+        with self.pool.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) "
+                         "VALUES (?, ?, ?, ?, ?)", (key, response, size, now, now))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk entries from the least recently read, dropping them until under the limit
+                conn.execute("""
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM (
+                            SELECT key, size, SUM(size) OVER (ORDER BY accessed_at, key) AS freed FROM responses
+                        ) WHERE freed - size < ?
+                    )
+                """, (total - self.max_bytes,))
+
+    def clear(self):
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        """Hit and miss counts of this instance, with the number and size of stored entries."""
+        with self.pool.transaction() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+def get_response_cache():
+    """The process-wide response cache at the configured path, opened on first use."""
+    global _response_cache
+    with _response_cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(load_llm_cache_path() or DEFAULT_CACHE_PATH)
+        return _response_cache
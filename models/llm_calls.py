@@ -0,0 +1,56 @@
+class LLMResponse(str):
+    """Response text carrying the call record of the query that produced it.
+
+    It is a str, so callers that only want the text use it as before; callers
+    that account for usage read response.call.
+    """
+
+    def __new__(cls, text, call=None):
+        response = super().__new__(cls, text)
+        response.call = call if call is not None else {}
+        return response
+
+
+def call_record(llm, prompt_tokens=None, completion_tokens=None, latency=None, retries=0, cached=False,
+                cached_tokens=None):
+    """The record of one LLM query; token counts are None when the provider does not report them.
+
+    cached_tokens are the prompt tokens the provider served from its prompt
+    cache, billed at a discount; cached is whether the whole response came
+    from our response cache.
+    """
+    return {
+        "provider": llm.type,
+        "model_name": llm.model_name,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "latency": round(latency, 3) if latency is not None else None,
+        "retries": retries,
+        "cached": cached,
+        "cached_tokens": cached_tokens,
+    }
+
+
+def _totals(calls):
+    latencies = [call["latency"] for call in calls if call.get("latency") is not None]
+    return {
+        "calls": len(calls),
+        "cached_calls": sum(1 for call in calls if call.get("cached")),
+        "prompt_tokens": sum(call.get("prompt_tokens") or 0 for call in calls),
+        "completion_tokens": sum(call.get("completion_tokens") or 0 for call in calls),
+        "cached_tokens": sum(call.get("cached_tokens") or 0 for call in calls),
+        "retries": sum(call.get("retries") or 0 for call in calls),
+        "latency": round(sum(latencies), 3),
+        "mean_latency": round(sum(latencies) / len(latencies), 3) if latencies else None,
+        "max_latency": max(latencies) if latencies else None,
+    }
+
+
+def summarize_calls(calls):
+    """Totals over a list of call records, overall and per provider and model."""
+    by_model = {}
+    for call in calls:
+        by_model.setdefault(f"{call.get('provider')} {call.get('model_name')}", []).append(call)
+    summary = _totals(calls)
+    summary["models"] = {model: _totals(model_calls) for model, model_calls in by_model.items()}
+    return summary
@@ -0,0 +1,86 @@
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# How long a provider's model list is used before it is refreshed
+CATALOG_TTL = 3600
+
+
+class ModelCatalog:
+    """TTL cache of the models each provider offers, shared by all LLM instances.
+
+    The lists come from each provider backend's list_models, or from fetchers,
+    a dictionary of provider name to fetch function, when given. The first
+    lookup for a provider and key fetches the list. After the TTL the cached
+    list is still returned while a background thread fetches a new one, so
+    queries never wait on the catalog once it is warm.
+    """
+
+    def __init__(self, fetchers=None, ttl=CATALOG_TTL, clock=time.monotonic):
+        self.fetchers = fetchers
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, provider, credential=None):
+        """Return the model names for a provider, or None if the provider cannot list them.
+
+        credential is the API key, or the server URL for the local provider.
+        """
+        if self.fetchers is not None and provider not in self.fetchers:
+            # A backend without a model list; its models are not checked
+            return None
+        key = (provider, credential)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[0] > self.ttl and key not in self._refreshing:
+                self._refreshing.add(key)
+                threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+        if entry is not None:
+            return entry[1]
+        models = self._fetch(provider, credential)
+        with self._lock:
+            self._entries[key] = (self.clock(), models)
+        return models
+
+    def check(self, provider, model_name, credential=None):
+        """Raise ValueError if the provider does not offer model_name."""
+        models = self.get(provider, credential)
+        if models is not None and model_name not in models:
+            raise ValueError(f"Unsupported model name: {model_name}, available models are: {models}")
+
+    def invalidate(self, provider=None):
+        """Drop cached lists so the next lookup fetches them again."""
+        with self._lock:
+            for key in [key for key in self._entries if provider is None or key[0] == provider]:
+                del self._entries[key]
+
+    def _fetch(self, provider, credential):
+        if self.fetchers is not None:
+            return self.fetchers[provider](credential)
+        # Imported here as the backend modules import this one
+        from models.llm_backends import get_backend
+        return get_backend(provider).list_models(credential)
+
+    def _refresh(self, key):
+        try:
+            models = self._fetch(*key)
+            with self._lock:
+                self._entries[key] = (self.clock(), models)
+        except Exception as e:
+            # Keep serving the previous list, dated now so that the next refresh
+            # is tried after another TTL rather than on every lookup
+            logger.warning(f"Failed to refresh the {key[0]} model list: {e}")
+            with self._lock:
+                if key in self._entries:
+                    self._entries[key] = (self.clock(), self._entries[key][1])
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+model_catalog = ModelCatalog()
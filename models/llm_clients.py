@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import weakref
+
+# Connections kept open per client, enough for the agents of a run querying at once
+POOL_SIZE = 20
+
+
+class ClientRegistry:
+    """Process-wide cache of provider clients keyed by provider and API key.
+
+    Each SDK client keeps its own pool of HTTP connections, so sharing one client
+    per key lets queries reuse open connections instead of paying for a new TLS
+    handshake on every call. Clients are created by the provider's backend
+    (see models.llm_backends), so a registered backend brings its own clients.
+    A dictionary of provider name to factory can be given to use instead.
+    """
+
+    # The backend method creating a client
+    backend_method = "create_client"
+
+    def __init__(self, factories=None):
+        self.factories = factories
+        self._clients = {}
+        self._google_key = None
+        self._lock = threading.Lock()
+
+    def factory(self, provider):
+        """The function creating a provider's clients from an API key."""
+        if self.factories is None:
+            from models.llm_backends import get_backend
+            return getattr(get_backend(provider), self.backend_method)
+        if provider not in self.factories:
+            raise ValueError(f"Unsupported llm type: {provider}")
+        return self.factories[provider]
+
+    def get(self, provider, api_key=None):
+        """Return the shared client for a provider and API key, creating it on first use."""
+        factory = self.factory(provider)
+        key = (provider, api_key)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None or (provider == "GoogleAI" and self._google_key != api_key):
+                client = factory(api_key)
+                self._clients[key] = client
+                if provider == "GoogleAI":
+                    self._google_key = api_key
+            return client
+
+    def clear(self):
+        """Close and forget all clients, e.g. after API keys are rotated."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._google_key = None
+        for client in clients:
+            close = getattr(client, "close", None)
+            if callable(close):
+                close()
+
+
+class AsyncClientRegistry:
+    """Cache of async provider clients keyed by event loop, provider and API key.
+
+    Async HTTP connections belong to the event loop that opened them, so each
+    loop gets its own clients. Call aclose in the loop before it ends.
+    """
+
+    backend_method = "create_async_client"
+
+    def __init__(self, factories=None, sync_registry=None):
+        self.factories = factories
+        # GoogleAI shares the sync registry's process-wide configuration
+        self.sync_registry = sync_registry
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    factory = ClientRegistry.factory
+
+    def get(self, provider, api_key=None):
+        """Return the async client for the running event loop, creating it on first use."""
+        factory = self.factory(provider)
+        if provider == "GoogleAI" and self.sync_registry is not None:
+            return self.sync_registry.get(provider, api_key)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._clients.setdefault(loop, {})
+            key = (provider, api_key)
+            if key not in clients:
+                clients[key] = factory(api_key)
+            return clients[key]
+
+    async def aclose(self):
+        """Close the running event loop's clients, before the loop itself is closed."""
+        with self._lock:
+            clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            # httpx clients have aclose, the provider SDK clients an async close
+            close = getattr(client, "aclose", None) or getattr(client, "close", None)
+            if callable(close):
+                await close()
+
+
+client_registry = ClientRegistry()
+async_client_registry = AsyncClientRegistry(sync_registry=client_registry)
+
+def get_client(provider, api_key=None):
+    return client_registry.get(provider, api_key)
+
+def get_async_client(provider, api_key=None):
+    return async_client_registry.get(provider, api_key)
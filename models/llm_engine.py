@@ -0,0 +1,205 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from models.llm_retry import retry_policy as default_retry_policy
+from models.llm_clients import async_client_registry
+
+# Queries allowed in flight at once, per provider and per model
+PROVIDER_CONCURRENCY = {
+    "OpenAI": 8,
+    "Anthropic": 4,
+    "Groq": 4,
+    "GoogleAI": 4,
+    "LocalModel": 1,
+}
+DEFAULT_CONCURRENCY = 4
+MODEL_CONCURRENCY = 4
+
+# Requests per minute, per provider; None means unlimited
+PROVIDER_REQUESTS_PER_MINUTE = {
+    "OpenAI": 500,
+    "Anthropic": 50,
+    "Groq": 30,
+    "GoogleAI": 60,
+    "LocalModel": None,
+}
+
+
+class TokenBucket:
+    """Rate limiter allowing `rate` requests per second on average, in bursts of up to `capacity`.
+
+    The bucket is shared by every thread and event loop in the process.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        """Take a token if one is available, otherwise return the seconds until one is."""
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class ConcurrencyLimit:
+    """Caps the queries in flight across every thread and event loop in the process.
+
+    An asyncio.Semaphore belongs to one event loop, and each job worker thread
+    runs its own, so this keeps the count under a thread lock and wakes
+    waiters on their own loops, passing a released slot straight to the
+    longest waiting query.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_use = 0
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise
+            # The slot was already handed over: give it back (_wake does if the future was cancelled)
+            if not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            while self._waiters:
+                loop, future = self._waiters.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._wake, future)
+                    return
+                except RuntimeError:
+                    # The waiter's loop has closed
+                    continue
+            self.in_use -= 1
+
+    def _wake(self, future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+class QueryEngine:
+    """Runs LLM queries concurrently within per-provider and per-model limits.
+
+    Each provider and each (provider, model) pair has a concurrency limit
+    capping the queries in flight and, when a rate is set, a token bucket
+    capping requests per minute. Both are shared by every thread, so job
+    workers running in parallel stay within one quota between them. Transient
+    provider errors are retried by the retry policy, the one shared with
+    synchronous queries by default; a query gives up its slot while it waits
+    to retry.
+
+    Usage:
+        results = query_engine.run_queries([(llm, context, prompt), ...])
+    """
+
+    def __init__(self, concurrency=None, model_concurrency=MODEL_CONCURRENCY,
+                 requests_per_minute=None, model_requests_per_minute=None, retry_policy=None):
+        self.concurrency = PROVIDER_CONCURRENCY if concurrency is None else concurrency
+        self.model_concurrency = model_concurrency
+        requests_per_minute = PROVIDER_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        self.buckets = {provider: TokenBucket(rpm / 60.0, capacity=max(1, rpm // 60))
+                        for provider, rpm in requests_per_minute.items() if rpm}
+        for (provider, model_name), rpm in (model_requests_per_minute or {}).items():
+            self.buckets[(provider, model_name)] = TokenBucket(rpm / 60.0, capacity=max(1, rpm // 60))
+        self.retry_policy = retry_policy or default_retry_policy
+        self._limits = {}
+        self._lock = threading.Lock()
+
+    def _limit(self, key, limit):
+        with self._lock:
+            if key not in self._limits:
+                self._limits[key] = ConcurrencyLimit(limit)
+            return self._limits[key]
+
+    async def query(self, llm, context, prompt):
+        """Query one LLM, waiting for a free slot and rate limit token for its provider and model."""
+        provider_limit = self.concurrency.get(llm.type, DEFAULT_CONCURRENCY)
+
+        async def attempt():
+            # Every attempt, retries included, takes a slot and a rate limit token,
+            # and the slot is free again while the retry policy backs off
+            async with self._limit(llm.type, provider_limit), \
+                    self._limit((llm.type, llm.model_name), self.model_concurrency):
+                for bucket_key in (llm.type, (llm.type, llm.model_name)):
+                    if bucket_key in self.buckets:
+                        await self.buckets[bucket_key].acquire()
+                return await llm.aquery_provider(context, prompt)
+
+        return await self.retry_policy.acall(llm.type, attempt)
+
+    async def query_many(self, queries, on_result=None):
+        """Run (llm, context, prompt) queries concurrently.
+
+        Returns the responses in the same order, with the exception in place of
+        any query that failed. If given, on_result(index, response) is called as
+        each query finishes.
+        """
+        async def run(index, llm, context, prompt):
+            try:
+                response = await llm.aquery(context, prompt, engine=self)
+            except Exception as e:
+                response = e
+            if on_result is not None:
+                on_result(index, response)
+            return response
+
+        return await asyncio.gather(*(run(index, *query) for index, query in enumerate(queries)))
+
+    def run_queries(self, queries, on_result=None):
+        """Blocking form of query_many for code that is not running in an event loop.
+
+        The queries run in a new event loop, whose async provider clients are
+        closed when they are done.
+        """
+        async def run():
+            try:
+                return await self.query_many(queries, on_result)
+            finally:
+                await async_client_registry.aclose()
+
+        return asyncio.run(run())
+
+
+query_engine = QueryEngine()
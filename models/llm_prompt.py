@@ -0,0 +1,56 @@
+from helpers.safe_dict import SafeDict
+
+# Between the shared prefix and the rest of a prompt, and between prefix sections
+PREFIX_SEPARATOR = "\n\n"
+
+
+class PrefixedPrompt(str):
+    """Prompt text that starts with a prefix shared by the other queries of a run.
+
+    All the agents of a run see the same dataset, so putting it first, in the
+    same words, lets providers serve that part of the prompt from their prompt
+    cache: Anthropic for a prefix marked with cache_control, OpenAI for any
+    repeated start of the messages of 1024 tokens or more. Chat backends send
+    the whole prompt as the user message after the agent's context, so the
+    prefix is reused across the agents that share a context. Cached input
+    tokens are cheaper and faster to process.
+
+    It is a str of the whole prompt, prefix then body, so providers without
+    prompt caching, the response cache and saved full prompts use it as before.
+    """
+
+    def __new__(cls, prefix, body):
+        prompt = super().__new__(cls, prefix + PREFIX_SEPARATOR + body if prefix else body)
+        prompt.prefix = prefix
+        prompt.body = body
+        return prompt
+
+
+def split_prompt(prompt):
+    """The (prefix, body) of a prompt; a plain str has no prefix."""
+    if isinstance(prompt, PrefixedPrompt):
+        return prompt.prefix, prompt.body
+    return "", prompt
+
+
+def format_prompt(template, values, shared, suffix=""):
+    """Fill in a prompt template, moving the shared values it uses into a prefix.
+
+    values maps placeholders to the text of this query. shared is a list of
+    (placeholder, title, text) for values that are the same for every query of
+    a run. Each shared value the template uses becomes a titled section of the
+    prefix, always in the order of shared, and the placeholder in the template
+    points to that section instead. suffix is appended to the body.
+    """
+    used = [(key, title, text) for key, title, text in shared if "{" + key + "}" in template]
+    prefix = PREFIX_SEPARATOR.join(f"{title}:\n{text}" for key, title, text in used)
+    mapping = SafeDict(values)
+    for key, title, text in used:
+        mapping[key] = f"({title[0].lower() + title[1:]}, given above)"
+    return PrefixedPrompt(prefix, template.format_map(mapping) + suffix)
+
+
+def dataset_sections(dataset):
+    """The shared prefix sections for a dataset's placeholders, as format_prompt takes them."""
+    return [("experiment_description", "Experiment description", dataset.experiment_description),
+            ("data", "Data", dataset.data)]
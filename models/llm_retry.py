@@ -0,0 +1,246 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: dropped connections, timeouts, rate limits and server
+# side failures. Matched by class name so the check works across the provider
+# SDKs, requests and httpx.
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError", "InternalServerError", "RateLimitError",
+                    "TransportError", "ServiceUnavailable", "ResourceExhausted", "DeadlineExceeded",
+                    "ConnectionError", "Timeout", "TimeoutError")
+RETRYABLE_STATUS_CODES = (408, 429, 500, 502, 503, 504)
+
+# Rate limits mean the provider is up, so they do not count against its circuit breaker
+RATE_LIMIT_ERRORS = ("RateLimitError", "ResourceExhausted")
+RATE_LIMIT_STATUS_CODE = 429
+
+
+def status_code(error):
+    """The HTTP status of a provider error, wherever its SDK keeps it, or None."""
+    code = getattr(error, "status_code", None)
+    if code is None:
+        code = getattr(getattr(error, "response", None), "status_code", None)
+    if code is None and isinstance(getattr(error, "code", None), int):
+        # google.api_core exceptions
+        code = error.code
+    return code
+
+
+def is_retryable(error):
+    if status_code(error) in RETRYABLE_STATUS_CODES:
+        return True
+    return any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__)
+
+
+def is_rate_limit(error):
+    if status_code(error) == RATE_LIMIT_STATUS_CODE:
+        return True
+    return any(cls.__name__ in RATE_LIMIT_ERRORS for cls in type(error).__mro__)
+
+
+def retry_after(error):
+    """Seconds the provider asked us to wait in a Retry-After header, or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        milliseconds = headers.get("retry-after-ms")
+        if milliseconds is not None:
+            return max(0.0, float(milliseconds) / 1000)
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            # An HTTP date rather than a number of seconds
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryError(Exception):
+    """A query still failed after all the attempts its retry policy allows."""
+
+    def __init__(self, message, last_error=None):
+        super().__init__(message)
+        self.last_error = last_error
+
+
+class CircuitOpenError(Exception):
+    """A provider's circuit breaker is open, so the query was not sent."""
+
+
+class CircuitBreaker:
+    """Stops sending queries to a provider that keeps failing.
+
+    After failure_threshold consecutive failures the circuit opens and queries
+    fail at once for reset_timeout seconds. Then a single trial query is let
+    through: its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "open" if self.clock() - self.opened_at < self.reset_timeout else "half_open"
+
+    def allow(self):
+        """Whether a query may be sent now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at < self.reset_timeout or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def remaining(self):
+        """Seconds until the open circuit lets a trial query through."""
+        with self._lock:
+            if self.opened_at is None:
+                return 0
+            return max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self):
+        """Give up a trial query that ended without an answer, e.g. because it was cancelled."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+
+class RetryPolicy:
+    """Shared retry behaviour for provider queries.
+
+    Failed attempts are retried after a jittered exponential backoff, a random
+    delay between 0 and base_delay * 2 ** attempt capped at max_delay, unless
+    the provider sent Retry-After, which is honoured instead. A query makes at
+    most max_attempts attempts and sleeps at most budget seconds in total, so a
+    degraded provider cannot hold a run up indefinitely. Each provider also has
+    a circuit breaker that fails queries at once while it is down.
+
+    Usage:
+        response = retry_policy.call("OpenAI", lambda: client.chat.completions.create(...))
+        response = await retry_policy.acall("OpenAI", lambda: client.chat.completions.create(...))
+    """
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=60.0, budget=120.0,
+                 failure_threshold=5, reset_timeout=30, random=random.random):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.random = random
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, provider):
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._breakers[provider]
+
+    def delay(self, attempt, error):
+        """Seconds to wait before retrying after the given (0 based) failed attempt."""
+        requested = retry_after(error)
+        if requested is not None:
+            return requested
+        return self.random() * min(self.max_delay, self.base_delay * 2 ** attempt)
+
+    def _before_attempt(self, provider):
+        breaker = self.breaker(provider)
+        if not breaker.allow():
+            raise CircuitOpenError(f"{provider} is failing; queries are paused for another "
+                                   f"{breaker.remaining():.0f} seconds")
+        return breaker
+
+    def _after_failure(self, provider, breaker, attempt, error, waited):
+        """Record a failed attempt and return the delay before the next one, or raise if there is none."""
+        if not is_retryable(error):
+            # The provider answered, it just rejected the query
+            breaker.record_success()
+            raise error
+        if is_rate_limit(error):
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        if attempt == self.max_attempts - 1:
+            raise RetryError(f"Max retries exceeded. Last exception: {error}", error) from error
+        delay = self.delay(attempt, error)
+        if waited + delay > self.budget:
+            raise RetryError(f"Retry budget of {self.budget} seconds exceeded. Last exception: {error}",
+                             error) from error
+        logger.warning(f"{provider} query failed ({error}), retrying in {delay:.1f} seconds...")
+        return delay
+
+    @staticmethod
+    def _count_retries(response, attempt):
+        # Call records (see models.llm_calls) note how many retries the query took
+        if attempt and isinstance(getattr(response, "call", None), dict):
+            response.call["retries"] = attempt
+        return response
+
+    def call(self, provider, attempt_query):
+        """Run attempt_query() until it succeeds or the policy gives up."""
+        waited = 0.0
+        for attempt in range(self.max_attempts):
+            breaker = self._before_attempt(provider)
+            try:
+                response = attempt_query()
+            except Exception as e:
+                delay = self._after_failure(provider, breaker, attempt, e, waited)
+                time.sleep(delay)
+                waited += delay
+                continue
+            breaker.record_success()
+            return self._count_retries(response, attempt)
+
+    async def acall(self, provider, attempt_query):
+        """Async form of call: attempt_query() returns an awaitable."""
+        waited = 0.0
+        for attempt in range(self.max_attempts):
+            breaker = self._before_attempt(provider)
+            try:
+                response = await attempt_query()
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+            except Exception as e:
+                delay = self._after_failure(provider, breaker, attempt, e, waited)
+                await asyncio.sleep(delay)
+                waited += delay
+                continue
+            breaker.record_success()
+            return self._count_retries(response, attempt)
+
+
+retry_policy = RetryPolicy()
@@ -0,0 +1,31 @@
+class LoadManyMixin:
+    """Adds a batch load_many to a model class.
+
+    Objects are built from their stored properties as cls(db, **properties),
+    or as cls(**properties) for models that do not keep the database
+    (load_with_db False). Models whose large properties are LazyBlobs set
+    resolve_blobs False, so blob contents are only read when used. Models
+    updated with optimistic concurrency set versioned, and get the version
+    read with their properties.
+    """
+
+    load_with_db = True
+    resolve_blobs = True
+    versioned = False
+
+    @classmethod
+    def from_properties(cls, db, properties, version=None):
+        obj = cls(db, **properties) if cls.load_with_db else cls(**properties)
+        if cls.versioned:
+            obj.version = version
+        return obj
+
+    @classmethod
+    def load_many(cls, db, object_ids):
+        """Load several objects from the database with one query.
+
+        Returns None in place of any ID that is not found.
+        """
+        return [cls.from_properties(db, properties, version) if properties else None
+                for properties, _, version in db.load_many(object_ids, resolve_blobs=cls.resolve_blobs,
+                                                           with_version=True)]
@@ -1,11 +1,16 @@
- 
+from helpers.lazy_blob import LazyBlob
+from models.load_many import LoadManyMixin
+
+class Review(LoadManyMixin):
+    resolve_blobs = False
+    data = LazyBlob()
+    hypotheses_text = LazyBlob()
 
-class Review:
     def __init__(self, db, data=None, hypotheses_text=None, review_text=None, 
                  ranking_data=None, summary_review=None,
                  agent_id=None,  ##### May have to add a hypotheses section
                  analysis_run_id=None, description=None, review_set_id=None, 
-                 object_id=None, name="unnamed", created=None):
+                 object_id=None, name="unnamed", created=None, llm_call=None):
         self.db = db
         self.data = data
         self.hypotheses_text = hypotheses_text
@@ -19,9 +24,11 @@ class Review:
         self.object_id = object_id
         self.name = name
         self.created = created
+        # Provider, model, tokens, latency and retries of the query that generated the review
+        self.llm_call = llm_call
 
     @classmethod
-    def create(cls, db, data, hypotheses_text, review_text, ranking_data, summary_review, agent_id, analysis_run_id, description, review_set_id, name=None):
+    def create(cls, db, data, hypotheses_text, review_text, ranking_data, summary_review, agent_id, analysis_run_id, description, review_set_id, name=None, llm_call=None):
         properties = {
             "data": data,
             "hypotheses_text": hypotheses_text,
@@ -32,7 +39,8 @@ class Review:
             "analysis_run_id": analysis_run_id,
             "description": description,
             "review_set_id": review_set_id,
-            "name": name
+            "name": name,
+            "llm_call": llm_call
         }
         object_id, created, _ = db.add(object_id=None, properties=properties, object_type="review")
         
@@ -43,7 +51,7 @@ class Review:
 
     @classmethod
     def load(cls, db, object_id):
-        properties, _ = db.load(object_id)
+        properties, _ = db.load(object_id, resolve_blobs=False)
         if properties:
             return cls(db, **properties)
         return None
@@ -1,6 +1,7 @@
 from models.review_set import ReviewSet
+from models.load_many import LoadManyMixin
 
-class ReviewPlan:
+class ReviewPlan(LoadManyMixin):
     def __init__(self, db, name=None, agent_ids=None, analysis_run_id=None, 
                  description=None, object_id=None, created=None):
         self.db = db
@@ -1,8 +1,15 @@
 
-class ReviewSet:
+from app.sqlite_database import StaleObjectError
+from models.llm_calls import summarize_calls
+from models.load_many import LoadManyMixin
+from helpers.run_log import merge_run_logs
+
+class ReviewSet(LoadManyMixin):
+    versioned = True
+
     def __init__(self, db, review_plan_id, agent_ids=None, analysis_run_id=None, 
                  review_ids=None, description=None, run_log=None, attempts=None,
-                 status='pending', object_id=None, name=None, created=None):
+                 status='pending', object_id=None, name=None, created=None, llm_calls=None, llm_usage=None):
         self.db = db
         self.review_plan_id = review_plan_id
         self.agent_ids = agent_ids if agent_ids else []
@@ -15,6 +22,11 @@ class ReviewSet:
         self.object_id = object_id
         self.name = name if name else "none"
         self.created = created
+        # Call records of each agent's LLM queries; llm_usage is stored with them and
+        # recomputed from them when it is missing or a call is recorded
+        self.llm_calls = llm_calls if llm_calls else {}
+        self._llm_usage = llm_usage
+        self.version = None
 
     @classmethod
     def create(cls, db, review_plan_id, agent_ids, analysis_run_id, description, name):
@@ -33,24 +45,72 @@ class ReviewSet:
         # Remove 'created' from properties to avoid passing it twice
         properties.pop('created', None)
         
-        return cls(db=db, object_id=object_id, created=created, **properties)
+        review_set = cls(db=db, object_id=object_id, created=created, **properties)
+        # A new node starts at version 0, so the first update already checks it
+        review_set.version = 0
+        return review_set
     
 
     @classmethod
     def load(cls, db, object_id):
-        properties, _ = db.load(object_id)
+        properties, _, version = db.load(object_id, with_version=True)
         if properties:
-            return cls(db, **properties)
+            return cls.from_properties(db, properties, version)
         return None
 
     def update(self):
-        properties = {
-            "review_ids": self.review_ids,
-            "attempts": self.attempts,
-            "status": self.status,
-            "run_log": self.run_log
-        }
-        self.db.update(self.object_id, properties)
+        # If another writer changed the set since it was loaded, merge in its
+        # progress and try again rather than overwriting it
+        while True:
+            properties = {
+                "review_ids": self.review_ids,
+                "attempts": self.attempts,
+                "status": self.status,
+                "run_log": self.run_log,
+                "llm_calls": self.llm_calls,
+                "llm_usage": self.llm_usage
+            }
+            try:
+                self.version = self.db.update(self.object_id, properties, expected_version=self.version)
+                return
+            except StaleObjectError:
+                self.merge_stored_progress()
+
+    def merge_stored_progress(self):
+        stored = ReviewSet.load(self.db, self.object_id)
+        if stored is None:
+            raise ValueError(f"ReviewSet with object_id {self.object_id} not found.")
+        self.review_ids = stored.review_ids + [review_id for review_id in self.review_ids
+                                               if review_id not in stored.review_ids]
+        for agent_id, attempts in stored.attempts.items():
+            if len(attempts) > len(self.attempts.get(agent_id, [])):
+                self.attempts[agent_id] = attempts
+        for agent_id, calls in stored.llm_calls.items():
+            if len(calls) > len(self.llm_calls.get(agent_id, [])):
+                self.llm_calls[agent_id] = calls
+                self._llm_usage = None
+        if stored.status == 'done':
+            self.status = 'done'
+        self.run_log = merge_run_logs(stored.run_log, self.run_log)
+        self.version = stored.version
+
+    def record_call(self, agent_id, response):
+        """ Keep the call record of an agent's LLM response, if it has one """
+        call = getattr(response, "call", None)
+        if call:
+            self.llm_calls.setdefault(agent_id, []).append(call)
+            self._llm_usage = None
+
+    @property
+    def llm_usage(self):
+        """ Token, latency and retry totals over all the agents' LLM calls, overall and per model """
+        if self._llm_usage is None:
+            self._llm_usage = summarize_calls([call for calls in self.llm_calls.values() for call in calls])
+        return self._llm_usage
+
+    @llm_usage.setter
+    def llm_usage(self, llm_usage):
+        self._llm_usage = llm_usage
 
     def delete(self):
         self.db.remove(self.object_id)
@@ -14,7 +14,7 @@ const ObjectList = ({objectType, ...props}) => {
   const [rowData, setRowData] = useState([])
   const gridRef = useRef()
   
-  const colKeys = Object.keys(objectSpec).length> 0 ? Object.keys(objectSpec.properties) : []
+  const colKeys = Object.keys(objectSpec).length> 0 ? Object.keys(objectSpec.properties).filter(key => objectSpec.properties[key].list_view !== false) : []
   colKeys.splice(1, 0, "created")
   colKeys.splice(2, 0, "id")
 
@@ -16,6 +16,7 @@ const ObjectView = ({objectType, ...props}) => {
 
     const [loading, setLoading] = useState(true)
     const [executing, setExecuting] = useState(false)
+    const [progress, setProgress] = useState(null)
     const [object, setObject] = useState({})
     const [objectSpec, setObjectSpec] = useState({})
     const [linkNames, setLinkNames] = useState([])
@@ -49,12 +50,32 @@ const ObjectView = ({objectType, ...props}) => {
         axios.post(api_base+`/objects/${objectType}/${objectId}/execute`)
             .then(response => {
                 // Handle the response data
-                setExecuting(false)
-                
-                if (response.data.error)
+                if (response.data.error) {
+                    setExecuting(false)
                     alert(response.data.error)
-                else
-                    navigate(response.data.url)
+                    return
+                }
+
+                // The run is queued; follow its progress until it is done
+                const events = new EventSource(api_base + response.data.events_url)
+                let finished = 0
+                events.addEventListener("progress", event => {
+                    const data = JSON.parse(event.data)
+                    if (data.status === "success" || data.status === "failed") {
+                        finished += 1
+                        setProgress(`${finished}/${data.total}`)
+                    }
+                })
+                events.addEventListener("done", event => {
+                    events.close()
+                    setExecuting(false)
+                    setProgress(null)
+                    const data = JSON.parse(event.data)
+                    if (data.status === "failed")
+                        alert(data.error)
+                    else
+                        navigate(response.data.url)
+                })
             })
             .catch(error => {
                 // Handle any errors
@@ -180,7 +201,10 @@ const ObjectView = ({objectType, ...props}) => {
                                     { !executing ? 
                                         "Execute"
                                     :
-                                        <i className="fa-solid fa-spinner fa-spin-pulse fa-lg"></i>
+                                        <>
+                                            <i className="fa-solid fa-spinner fa-spin-pulse fa-lg"></i>
+                                            { progress && ` ${progress}` }
+                                        </>
                                     }
                                     
                                 </button>
@@ -0,0 +1,88 @@
+# Benchmark SqliteDatabase operations per second
+#
+# Compares the pooled, WAL-mode SqliteDatabase against the previous behaviour of
+# opening a fresh rollback-journal connection for every call.
+#
+# usage: python scripts/benchmark_database.py [--ops N] [--threads N]
+import sys
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import argparse
+import threading
+from contextlib import contextmanager
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.sqlite_database import SqliteDatabase
+
+class UnpooledSqliteDatabase(SqliteDatabase):
+    """ SqliteDatabase with the old connection handling: one new connection per call. """
+
+    @contextmanager
+    def _get_connection(self):
+        conn = sqlite3.connect(self.uri)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+def timed(label, n_ops, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {n_ops / elapsed:>10.0f} ops/sec")
+
+def run_benchmark(db_class, n_ops, n_threads):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        db = db_class(os.path.join(tmp_dir, "benchmark.db"))
+        ids = []
+
+        def add():
+            for i in range(n_ops):
+                object_id, _, _ = db.add(None, {"name": f"object {i}", "status": "pending"}, "benchmark")
+                ids.append(object_id)
+
+        def load():
+            for object_id in ids:
+                db.load(object_id)
+
+        def update():
+            for object_id in ids:
+                db.update(object_id, {"status": "done"})
+
+        def find():
+            for i in range(n_ops // 10):
+                db.find("benchmark", {"name": f"object {i}"})
+
+        def concurrent_mixed():
+            def worker(offset):
+                for object_id in ids[offset::n_threads]:
+                    db.load(object_id)
+                    db.update(object_id, {"status": "in_progress"})
+            threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        print(db_class.__name__)
+        timed("add", n_ops, add)
+        timed("load", n_ops, load)
+        timed("update", n_ops, update)
+        timed("find (filtered)", n_ops // 10, find)
+        timed(f"load+update x{n_threads} threads", 2 * n_ops, concurrent_mixed)
+        db.close()
+    finally:
+        shutil.rmtree(tmp_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SqliteDatabase operations.")
+    parser.add_argument("--ops", type=int, default=2000, help="number of objects to write and read")
+    parser.add_argument("--threads", type=int, default=4, help="number of threads in the concurrent run")
+    args = parser.parse_args()
+
+    run_benchmark(UnpooledSqliteDatabase, args.ops, args.threads)
+    run_benchmark(SqliteDatabase, args.ops, args.threads)
@@ -0,0 +1,25 @@
+# Move large inline properties (dataset data, prompt and hypothesis copies) of
+# existing objects into the content-addressed blobs table, delete the blobs no
+# object references any more, then compact the file.
+#
+# Blobs are never deleted when objects are updated or removed, so the blobs
+# table only grows between runs of this script; run it periodically.
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.sqlite_database import SqliteDatabase
+from app.config import load_database_uri
+
+if __name__ == "__main__":
+    database_uri = load_database_uri()
+    print(f"Database URI: {database_uri}")
+    db = SqliteDatabase(database_uri)
+    try:
+        n_rewritten = db.externalize_blobs()
+        print(f"Moved large properties of {n_rewritten} objects into the blobs table")
+        n_deleted = db.collect_blobs()
+        print(f"Deleted {n_deleted} unreferenced blobs")
+        with db._get_connection() as conn:
+            conn.execute("VACUUM")
+    finally:
+        db.close()
@@ -0,0 +1,236 @@
+"""A local stand-in for the OpenAI and Anthropic batch APIs.
+
+Implements just enough of the files, batches and message batches endpoints
+for the OpenAI and Anthropic SDKs to submit a batch, poll it and download its
+results. Every request is answered with a canned JSON response, except that a
+prompt containing FAIL gets an error result. A batch completes after it has
+been polled polls_to_complete times.
+
+Run it standalone and point a client at it:
+    python -m scripts.fake_batch_server --port 8765
+    OpenAI(api_key="test", base_url="http://127.0.0.1:8765/v1")
+    anthropic.Anthropic(api_key="test", base_url="http://127.0.0.1:8765")
+
+or from a test:
+    server = FakeBatchServer().start()
+    ...
+    server.stop()
+"""
+import json
+import time
+import uuid
+import argparse
+import threading
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAIL_MARKER = "FAIL"
+
+
+def fake_answer(prompt):
+    return json.dumps({"hypotheses": [{"description": f"Fake answer to: {prompt[:40]}"}]})
+
+
+def _count_tokens(text):
+    return len(text.split())
+
+
+class FakeBatchServer:
+    def __init__(self, host="127.0.0.1", port=0, polls_to_complete=1):
+        self.polls_to_complete = polls_to_complete
+        self.files = {}
+        self.batches = {}
+        self.message_batches = {}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    # OpenAI: files and batches
+
+    def create_file(self, content, filename, purpose):
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed"}
+
+    def create_batch(self, body):
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        requests = [json.loads(line) for line in self.files[body["input_file_id"]].decode("utf-8").splitlines()
+                    if line.strip()]
+        self.batches[batch_id] = {"batch": {"id": batch_id, "object": "batch", "endpoint": body["endpoint"],
+                                            "input_file_id": body["input_file_id"],
+                                            "completion_window": body["completion_window"],
+                                            "status": "validating", "created_at": int(time.time()),
+                                            "output_file_id": None, "error_file_id": None,
+                                            "request_counts": {"total": len(requests), "completed": 0,
+                                                               "failed": 0}},
+                                  "requests": requests, "polls": 0}
+        return self.batches[batch_id]["batch"]
+
+    def poll_batch(self, batch_id):
+        entry = self.batches[batch_id]
+        batch = entry["batch"]
+        entry["polls"] += 1
+        if batch["status"] in ("validating", "in_progress") and entry["polls"] >= self.polls_to_complete:
+            self._complete_batch(entry)
+        elif batch["status"] == "validating":
+            batch["status"] = "in_progress"
+        return batch
+
+    def _complete_batch(self, entry):
+        outputs, errors = [], []
+        for request in entry["requests"]:
+            prompt = request["body"]["messages"][-1]["content"]
+            if FAIL_MARKER in prompt:
+                errors.append({"id": f"req_{uuid.uuid4().hex}", "custom_id": request["custom_id"],
+                               "response": {"status_code": 400, "body": {"error": {
+                                   "message": "Fake request failure", "type": "invalid_request_error"}}},
+                               "error": None})
+                continue
+            answer = fake_answer(prompt)
+            outputs.append({"id": f"req_{uuid.uuid4().hex}", "custom_id": request["custom_id"],
+                            "response": {"status_code": 200, "body": {
+                                "id": f"chatcmpl-{uuid.uuid4().hex}", "object": "chat.completion",
+                                "model": request["body"]["model"],
+                                "choices": [{"index": 0, "finish_reason": "stop",
+                                             "message": {"role": "assistant", "content": answer}}],
+                                "usage": {"prompt_tokens": _count_tokens(prompt),
+                                          "completion_tokens": _count_tokens(answer)}}},
+                            "error": None})
+        batch = entry["batch"]
+        batch["status"] = "completed"
+        batch["request_counts"].update({"completed": len(outputs), "failed": len(errors)})
+        if outputs:
+            content = "\n".join(json.dumps(line) for line in outputs).encode("utf-8")
+            batch["output_file_id"] = self.create_file(content, "output.jsonl", "batch_output")["id"]
+        if errors:
+            content = "\n".join(json.dumps(line) for line in errors).encode("utf-8")
+            batch["error_file_id"] = self.create_file(content, "errors.jsonl", "batch_output")["id"]
+
+    # Anthropic: message batches
+
+    def create_message_batch(self, body):
+        batch_id = f"msgbatch_{uuid.uuid4().hex}"
+        self.message_batches[batch_id] = {"batch": {"id": batch_id, "type": "message_batch",
+                                                    "processing_status": "in_progress",
+                                                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                                                    "results_url": None},
+                                          "requests": body["requests"], "polls": 0}
+        return self.message_batches[batch_id]["batch"]
+
+    def poll_message_batch(self, batch_id):
+        entry = self.message_batches[batch_id]
+        entry["polls"] += 1
+        if entry["polls"] >= self.polls_to_complete:
+            entry["batch"].update({"processing_status": "ended",
+                                   "results_url": f"{self.url}/v1/messages/batches/{batch_id}/results"})
+        return entry["batch"]
+
+    def message_batch_results(self, batch_id):
+        lines = []
+        for request in self.message_batches[batch_id]["requests"]:
+            prompt = request["params"]["messages"][-1]["content"]
+            if FAIL_MARKER in prompt:
+                result = {"type": "errored", "error": {"type": "invalid_request_error",
+                                                       "message": "Fake request failure"}}
+            else:
+                answer = fake_answer(prompt)
+                result = {"type": "succeeded", "message": {
+                    "id": f"msg_{uuid.uuid4().hex}", "type": "message", "role": "assistant",
+                    "model": request["params"]["model"], "content": [{"type": "text", "text": answer}],
+                    "stop_reason": "end_turn",
+                    "usage": {"input_tokens": _count_tokens(prompt), "output_tokens": _count_tokens(answer)}}}
+            lines.append(json.dumps({"custom_id": request["custom_id"], "result": result}))
+        return "\n".join(lines).encode("utf-8")
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+            def _send(self, status, payload, content_type="application/json"):
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _not_found(self):
+                self._send(404, {"error": {"type": "not_found_error", "message": f"No route for {self.path}"}})
+
+            def do_POST(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                body = self._body()
+                with server.lock:
+                    if parts == ["v1", "files"]:
+                        # The SDK uploads the file as multipart/form-data
+                        message = BytesParser().parsebytes(
+                            b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body)
+                        fields = {part.get_param("name", header="content-disposition"): part
+                                  for part in message.get_payload()}
+                        file_part = fields["file"]
+                        self._send(200, server.create_file(file_part.get_payload(decode=True),
+                                                           file_part.get_filename(),
+                                                           fields["purpose"].get_payload()))
+                    elif parts == ["v1", "batches"]:
+                        self._send(200, server.create_batch(json.loads(body)))
+                    elif parts == ["v1", "messages", "batches"]:
+                        self._send(200, server.create_message_batch(json.loads(body)))
+                    elif parts[:2] == ["v1", "batches"] and parts[-1] == "cancel" and parts[2] in server.batches:
+                        server.batches[parts[2]]["batch"]["status"] = "cancelled"
+                        self._send(200, server.batches[parts[2]]["batch"])
+                    elif parts[:3] == ["v1", "messages", "batches"] and parts[-1] == "cancel" \
+                            and parts[3] in server.message_batches:
+                        server.message_batches[parts[3]]["batch"]["processing_status"] = "canceling"
+                        self._send(200, server.message_batches[parts[3]]["batch"])
+                    else:
+                        self._not_found()
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                with server.lock:
+                    if parts[:2] == ["v1", "files"] and parts[-1] == "content" and parts[2] in server.files:
+                        self._send(200, server.files[parts[2]], "application/octet-stream")
+                    elif parts[:2] == ["v1", "batches"] and len(parts) == 3 and parts[2] in server.batches:
+                        self._send(200, server.poll_batch(parts[2]))
+                    elif parts[:3] == ["v1", "messages", "batches"] and parts[3:4] \
+                            and parts[3] in server.message_batches:
+                        if parts[-1] == "results":
+                            self._send(200, server.message_batch_results(parts[3]), "application/x-jsonl")
+                        else:
+                            self._send(200, server.poll_message_batch(parts[3]))
+                    else:
+                        self._not_found()
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI / Anthropic batch API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--polls", type=int, default=1, help="Polls before a batch completes")
+    args = parser.parse_args()
+    server = FakeBatchServer(args.host, args.port, args.polls)
+    print(f"Fake batch server listening on {server.url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,37 @@
+# Run queued agent, analysis and review tasks in extra worker processes
+#
+# The API server runs one worker itself; start this alongside it (on the same
+# database) to process more tasks at once.
+#
+# usage: python scripts/run_job_workers.py [--processes N] [--threads N]
+import sys
+import os
+import time
+import argparse
+import multiprocessing
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.task_management import start_job_worker
+
+def run_worker(threads):
+    worker = start_job_worker(concurrency=threads)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        worker.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run job queue workers.")
+    parser.add_argument("--processes", type=int, default=2, help="number of worker processes")
+    parser.add_argument("--threads", type=int, default=4, help="worker threads per process")
+    args = parser.parse_args()
+
+    processes = [multiprocessing.Process(target=run_worker, args=(args.threads,)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
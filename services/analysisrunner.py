@@ -1,9 +1,14 @@
 from models.analysis_run import AnalysisRun
+from models.dataset import Dataset
+from models.llm_engine import query_engine
+from models.llm_batch import batch_engine
 from services.hypothesis_generation import HypothesisGenerator
 
 class AnalysisRunner:
-    def __init__(self, db, analysis_run_id):
+    def __init__(self, db, analysis_run_id, progress=None):
         self.db = db
+        # Called with a progress event dictionary as each agent finishes
+        self.progress = progress
         self.analysis_run = AnalysisRun.load(db, analysis_run_id)
         if not self.analysis_run:
             raise ValueError("AnalysisRun not found with the given ID.")
@@ -16,23 +21,42 @@ class AnalysisRunner:
             if len(self.analysis_run.attempts.get(agent_id, [])) < 1: #int(self.analysis_run.n_hypotheses_per_agent):
                 try:
                     generator = HypothesisGenerator(self.db)
-                    hypothesis_ids = generator.generate_hypothesis(agent_id, self.analysis_run.object_id, int(self.analysis_run.n_hypotheses_per_agent))
+                    n_hypotheses_per_agent = int(self.analysis_run.n_hypotheses_per_agent)
+                    query = generator.prepare_query(agent_id, self.analysis_run, n_hypotheses_per_agent)
+                    response = query["llm"].query(query["agent"].context, query["prompt"])
+                    self.analysis_run.record_call(agent_id, response)
+                    hypothesis_ids = generator.save_hypotheses(query, response, self.analysis_run, n_hypotheses_per_agent,
+                                                               len(self.analysis_run.hypothesis_ids))
                     for hypothesis_id in hypothesis_ids:
                         self.analysis_run.hypothesis_ids.append(hypothesis_id)
                         self.analysis_run.attempts[agent_id].append('success')
-                        self.analysis_run.update()
-                        
-                    return f"{len(hypothesis_ids)} new hypothesis generated by agent {agent_id}."
+                    self.analysis_run.update()
+                    message = f"{len(hypothesis_ids)} new hypothesis generated by agent {agent_id}."
+                    self.report(agent_id, 'success', message)
+                    return message
                 except Exception as e:
                     self.analysis_run.attempts[agent_id].append('failed')
                     self.analysis_run.update()
-                    return f"Failed to generate hypothesis for agent {agent_id}: {str(e)}"
+                    message = f"Failed to generate hypothesis for agent {agent_id}: {str(e)}"
+                    self.report(agent_id, 'failed', message)
+                    return message
 
         self.analysis_run.status = 'done'
         self.analysis_run.update()
         return "No more hypotheses needed."
 
-    def run(self):
+    def report(self, agent_id, status, message=None):
+        """ Send a progress event for an agent to the progress callback, if any """
+        if self.progress is not None:
+            self.progress({"agent_id": agent_id, "status": status, "message": message,
+                           "total": len(self.analysis_run.agent_ids)})
+
+    def run(self, parallel=False, batch=False):
+        if batch:
+            # Submitted as provider batch jobs: cheaper, but may take hours
+            return self.run_parallel(engine=batch_engine)
+        if parallel:
+            return self.run_parallel()
         run_outputs = ""
         result = self.next_hypothesis()
         run_outputs += result + "\n"
@@ -41,3 +65,87 @@ class AnalysisRunner:
             run_outputs += result + "\n"
         self.analysis_run.update_run_log(run_outputs)
         return run_outputs
+
+    def run_parallel(self, engine=None):
+        """ Generate hypotheses for all pending agents at once.
+
+        The LLM queries run concurrently through the query engine, within its
+        per-provider limits. Results are saved in agent order, so hypothesis
+        names and the order of hypothesis_ids match a sequential run whichever
+        query finishes first: as queries finish, the finished agents with no
+        unfinished agent before them are saved and their attempts and
+        hypothesis_ids written in one update. A run that is interrupted and
+        resumed therefore does not query the saved agents again.
+        """
+        if self.analysis_run.status == 'done':
+            return "Analysis is already completed."
+
+        analysis_run = self.analysis_run
+        n_hypotheses_per_agent = int(analysis_run.n_hypotheses_per_agent)
+        pending_agent_ids = [agent_id for agent_id in analysis_run.agent_ids
+                             if len(analysis_run.attempts.get(agent_id, [])) < 1]
+        generator = HypothesisGenerator(self.db)
+        # A resumed run keeps the log lines of the agents that finished before
+        previous_log = analysis_run.run_log or ""
+        run_outputs = ""
+        queries = {}
+        outcomes = {}
+        saved = 0
+
+        def save(agent_id, response):
+            attempts = analysis_run.attempts.setdefault(agent_id, [])
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                analysis_run.record_call(agent_id, response)
+                hypothesis_ids = generator.save_hypotheses(queries[agent_id], response, analysis_run,
+                                                           n_hypotheses_per_agent, len(analysis_run.hypothesis_ids))
+                for hypothesis_id in hypothesis_ids:
+                    analysis_run.hypothesis_ids.append(hypothesis_id)
+                    attempts.append('success')
+                message = f"{len(hypothesis_ids)} new hypothesis generated by agent {agent_id}."
+                self.report(agent_id, 'success', message)
+            except Exception as e:
+                attempts.append('failed')
+                message = f"Failed to generate hypothesis for agent {agent_id}: {str(e)}"
+                self.report(agent_id, 'failed', message)
+            return message + "\n"
+
+        def flush():
+            nonlocal saved, run_outputs
+            start = saved
+            while saved < len(pending_agent_ids) and pending_agent_ids[saved] in outcomes:
+                agent_id = pending_agent_ids[saved]
+                run_outputs += save(agent_id, outcomes[agent_id])
+                saved += 1
+            if saved > start:
+                analysis_run.run_log = previous_log + run_outputs
+                analysis_run.update()
+
+        # Build every prompt first, loading the shared dataset once
+        dataset = Dataset.load(self.db, analysis_run.dataset_id)
+        for agent_id in pending_agent_ids:
+            try:
+                queries[agent_id] = generator.prepare_query(agent_id, analysis_run, n_hypotheses_per_agent, dataset)
+            except Exception as e:
+                outcomes[agent_id] = e
+        flush()
+
+        query_agent_ids = list(queries.keys())
+
+        def on_result(index, response):
+            outcomes[query_agent_ids[index]] = response
+            flush()
+
+        responses = (engine or query_engine).run_queries(
+            [(query["llm"], query["agent"].context, query["prompt"]) for query in queries.values()],
+            on_result=on_result)
+        for agent_id, response in zip(query_agent_ids, responses):
+            outcomes.setdefault(agent_id, response)
+        flush()
+
+        analysis_run.status = 'done'
+        run_outputs += "No more hypotheses needed.\n"
+        analysis_run.run_log = previous_log + run_outputs
+        analysis_run.update()
+        return run_outputs
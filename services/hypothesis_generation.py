@@ -3,7 +3,11 @@ from models.agent import Agent
 from models.llm import LLM
 from models.hypothesis import Hypothesis
 from models.analysis_run import AnalysisRun
-from helpers.safe_dict import SafeDict
+from models.llm_prompt import format_prompt, dataset_sections
+from helpers.lazy_blob import stored_value
+
+# Separates the hypotheses when an agent is asked for more than one
+SEPARATION_SYMBOL = "&&&&&"
 
 class HypothesisGenerator:
     def __init__(self, db):
@@ -14,39 +18,55 @@ class HypothesisGenerator:
         analysis_run = AnalysisRun.load(self.db, analysis_run_id)
         if not analysis_run:
             raise ValueError("AnalysisRun to which to add the hypothesis was provided but not found in generate_hypothesis")
-        
-        dataset = Dataset.load(self.db, analysis_run.dataset_id)
+
+        query = self.prepare_query(agent_id, analysis_run, n_hypotheses_per_agent)
+
+        # Generate hypothesis text using the LLM
+        hypothesis_text = query["llm"].query(query["agent"].context, query["prompt"])
+        num_hypotheses = len(analysis_run.hypothesis_ids)
+        return self.save_hypotheses(query, hypothesis_text, analysis_run, n_hypotheses_per_agent,
+                                    num_hypotheses, description)
+
+    def prepare_query(self, agent_id, analysis_run, n_hypotheses_per_agent, dataset=None):
+        """ Load the agent, LLM and dataset for one agent of a run and build its prompt.
+
+        Pass dataset to reuse one already loaded for the run.
+        """
+        dataset = dataset or Dataset.load(self.db, analysis_run.dataset_id)
         agent = Agent.load(self.db, agent_id)
         if not dataset or not agent:
             raise ValueError("Dataset or Agent not found in generate_hypothesis")
-       
-        separation_symbol = "&&&&&"
 
-        # Use properties directly from the loaded objects
-        data = dataset.data
-        safe_dict = SafeDict({
-            'data': data,
-            'experiment_description': dataset.experiment_description,
-            'biological_context': analysis_run.biological_context
-        })
-        
-        prompt = agent.prompt_template.format_map(safe_dict)
-        
+        # The dataset is the same for every agent of the run, so it goes in the
+        # prompt prefix that providers can cache
+        suffix = ""
         if (n_hypotheses_per_agent > 1):
-            prompt += f"\n\nGenerate {n_hypotheses_per_agent} hypotheses without explicitly mention the number of hypotheses in the response text. Separate the text between each hypothesis with the following symbols: {separation_symbol}."
+            suffix = f"\n\nGenerate {n_hypotheses_per_agent} hypotheses without explicitly mention the number of hypotheses in the response text. Separate the text between each hypothesis with the following symbols: {SEPARATION_SYMBOL}."
+        prompt = format_prompt(agent.prompt_template,
+                               {'biological_context': analysis_run.biological_context},
+                               dataset_sections(dataset), suffix)
 
         # Load the LLM associated with the agent
         llm = LLM.load(self.db, agent.llm_id)
         if not llm:
             raise ValueError("LLM not found")
 
-        # Generate hypothesis text using the LLM
-        hypothesis_text = llm.query(agent.context, prompt)
-        num_hypotheses = len(analysis_run.hypothesis_ids)
+        return {"agent_id": agent_id, "agent": agent, "llm": llm, "dataset": dataset, "prompt": prompt}
+
+    def save_hypotheses(self, query, hypothesis_text, analysis_run, n_hypotheses_per_agent,
+                        num_hypotheses, description=""):
+        """ Create the hypotheses from one LLM response, numbering their names after num_hypotheses.
+
+        Returns the new hypothesis ids.
+        """
+        agent, llm, dataset, prompt = query["agent"], query["llm"], query["dataset"], query["prompt"]
+        # The dataset's blob reference, so the data is not read and hashed again to save it
+        data = stored_value(dataset, "data")
+        llm_call = getattr(hypothesis_text, "call", None)
         
         if (n_hypotheses_per_agent > 1):
             ids = []
-            hypothesis_arr = hypothesis_text.split(separation_symbol)
+            hypothesis_arr = hypothesis_text.split(SEPARATION_SYMBOL)
             for (index, hypothesis_text) in enumerate(hypothesis_arr):
                 # Strip leading and trailing whitespace
                 cleaned_text = hypothesis_text.strip()
@@ -64,15 +84,16 @@ class HypothesisGenerator:
                         hypothesis_text=cleaned_text.strip(),
                         data=data,
                         biological_context=analysis_run.biological_context,
-                        agent_id=agent_id,
+                        agent_id=query["agent_id"],
                         dataset_id=dataset.object_id,
                         description=description, 
-                        analysis_run_id=analysis_run_id, 
+                        analysis_run_id=analysis_run.object_id, 
                         full_prompt = prompt,
                         name=f"{analysis_run.name}-{agent.name}-h{num_hypotheses + index + 1}",
                         agent_copy=agent.to_json(),
                         llm_copy=llm.to_json(),
-                        dataset_copy=dataset.to_json()
+                        dataset_copy=dataset.to_json(),
+                        llm_call=llm_call
                     )
                     ids.append(hypothesis.object_id)
             return ids
@@ -85,16 +106,16 @@ class HypothesisGenerator:
                 hypothesis_text=hypothesis_text,
                 data=data,
                 biological_context=analysis_run.biological_context,
-                agent_id=agent_id,
+                agent_id=query["agent_id"],
                 dataset_id=dataset.object_id,
                 description=description, 
-                analysis_run_id=analysis_run_id, 
+                analysis_run_id=analysis_run.object_id, 
                 full_prompt = prompt,
                 name=f"{analysis_run.name}-{agent.name}-h{num_hypotheses + 1}",
                 agent_copy=agent.to_json(),
                 llm_copy=llm.to_json(),
-                dataset_copy=dataset.to_json()
-
+                dataset_copy=dataset.to_json(),
+                llm_call=llm_call
             )
 
             return [hypothesis.object_id]
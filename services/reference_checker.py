@@ -1,7 +1,5 @@
 from Bio import Entrez
-import openai
 import requests
-import pandas as pd
 import urllib.request
 from urllib import request
 import urllib.parse as parse
@@ -4,7 +4,8 @@ from models.analysis_run import AnalysisRun
 from models.llm import LLM
 from models.review import Review
 from models.review_set import ReviewSet
-from helpers.safe_dict import SafeDict
+from models.llm_prompt import format_prompt, dataset_sections
+from helpers.lazy_blob import stored_value
 import re
 import json
 
@@ -65,41 +66,46 @@ class ReviewGenerator:
     def generate_review(self, agent_id, dataset_id, hypotheses_text, analysis_run_id, review_set_id):
         # Load the dataset and agent using the newly created classes
         dataset = Dataset.load(self.db, dataset_id)
-        agent = Agent.load(self.db, agent_id)
-        if not dataset or not agent:
-            raise ValueError("Dataset or Agent not found in generate_hypothesis")
-        
+        review_set = None
         if review_set_id:
             # Load the ReviewSet using the newly created class
             review_set = ReviewSet.load(self.db, review_set_id)
             if not review_set:
                 raise ValueError("ReviewSet to which to add the hypothesis was provided but not found in generate_hypothesis")
 
-        # Use properties directly from the loaded objects
-        data = dataset.data
-
         # check the number of hypotheses loaded 
         analysis_run = AnalysisRun.load(self.db, analysis_run_id)
+        query = self.prepare_query(agent_id, dataset, hypotheses_text, analysis_run)
+
+        # Generate hypothesis text using the LLM
+        review_text = query["llm"].query(query["agent"].context, query["prompt"])
+        return self.save_review(query, review_text, hypotheses_text, analysis_run, review_set)
+
+    def prepare_query(self, agent_id, dataset, hypotheses_text, analysis_run):
+        """ Load the agent and LLM for one reviewer and build its prompt from the shared context """
+        agent = Agent.load(self.db, agent_id)
+        if not dataset or not agent:
+            raise ValueError("Dataset or Agent not found in generate_hypothesis")
+
         n_hypotheses = len(analysis_run.hypothesis_ids)
         if n_hypotheses == 0:
             raise ValueError("No hypotheses found in AnalysisRun")
 
-        safe_dict = SafeDict({
-            'n': n_hypotheses, 
-            'data': data,
-            'experiment_description': dataset.experiment_description,
-            'hypotheses_text': hypotheses_text
-        })
-        
-        prompt = agent.prompt_template.format_map(safe_dict)
+        # Every reviewer of the set sees the same dataset and hypotheses, so they
+        # go in the prompt prefix that providers can cache
+        prompt = format_prompt(agent.prompt_template, {'n': n_hypotheses},
+                               dataset_sections(dataset) + [('hypotheses_text', 'Hypotheses', hypotheses_text)])
 
         # Load the LLM associated with the agent
         llm = LLM.load(self.db, agent.llm_id)
         if not llm:
             raise ValueError("LLM not found")
 
-        # Generate hypothesis text using the LLM
-        review_text = llm.query(agent.context, prompt)
+        return {"agent_id": agent_id, "agent": agent, "llm": llm, "dataset": dataset, "prompt": prompt}
+
+    def save_review(self, query, review_text, hypotheses_text, analysis_run, review_set):
+        """ Create the review from one LLM response and return its id """
+        agent_id, agent = query["agent_id"], query["agent"]
         summary_review = extract_summary_review(review_text)
         ranking_tuples = extract_final_rankings(review_text)
         ranking_data = ""
@@ -108,7 +114,6 @@ class ReviewGenerator:
             # Combine the tuples with the agent_id and the hypothesis_ids in the AnalysisRun 
             # to generate the ranking datastructure
             ranking = {"user_id": agent_id, "status": "done"}
-            analysis_run = AnalysisRun.load(self.db, analysis_run_id)
             r = {}
             for order, rank in ranking_tuples:
                 hypothesis_id = analysis_run.hypothesis_ids[order - 1]
@@ -120,16 +125,17 @@ class ReviewGenerator:
         # Create and save the hypothesis
         review = Review.create(
             self.db,
-            data=data,
+            data=stored_value(query["dataset"], "data"),
             hypotheses_text=hypotheses_text,
             review_text=review_text,
             ranking_data=ranking_data,
             summary_review=summary_review,
             agent_id=agent_id,
-            analysis_run_id=analysis_run_id,
+            analysis_run_id=analysis_run.object_id,
             description=None, # Not sure why this is here
-            review_set_id=review_set_id,
-            name=f"{review_set.name} - {agent.name}"  
+            review_set_id=review_set.object_id if review_set else None,
+            name=f"{review_set.name} - {agent.name}",
+            llm_call=getattr(review_text, "call", None)
         )
 
         return review.object_id
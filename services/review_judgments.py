@@ -91,8 +91,8 @@ def create_reviewer_judgment_dict_for_review_set(db, review_set_id):
         raise AttributeError("ReviewSet object must have a 'review_ids' attribute")
 
     reviewer_judgment_dict = {}
-    for review_id in review_set.review_ids:
-        review = Review.load(db, review_id)
+    reviews = Review.load_many(db, review_set.review_ids)
+    for review_id, review in zip(review_set.review_ids, reviews):
         if not review:
             raise ValueError(f"Failed to load review with ID {review_id}")
         reviewer_judgment_dict[review.agent_id] = create_judgment_vector_for_review(review)
@@ -147,8 +147,8 @@ def get_review(db, review_set, reviewer_id):
         raise AttributeError("ReviewSet object must have a 'review_ids' attribute")
 
     reviewer_ids = []
-    for review_id in review_set.review_ids:
-        review = Review.load(db, review_id)
+    reviews = Review.load_many(db, review_set.review_ids)
+    for review_id, review in zip(review_set.review_ids, reviews):
         if not review:
             raise ValueError(f"Failed to load review with ID {review_id}")
         reviewer_ids.append(review.agent_id)
@@ -2,11 +2,16 @@ from models.review_set import ReviewSet
 from models.review_plan import ReviewPlan
 from models.analysis_run import AnalysisRun
 from models.hypothesis import Hypothesis
+from models.dataset import Dataset
+from models.llm_engine import query_engine
+from models.llm_batch import batch_engine
 from services.review_generation import ReviewGenerator
 
 class ReviewRunner:
-    def __init__(self, db, review_set_id):
+    def __init__(self, db, review_set_id, progress=None):
         self.db = db
+        # Called with a progress event dictionary as each agent finishes
+        self.progress = progress
         self.review_set = ReviewSet.load(db, review_set_id)
         if not self.review_set:
             raise ValueError("ReviewSet not found with the given ID.")
@@ -21,8 +26,8 @@ class ReviewRunner:
         
         self.hypotheses_text = ""
         
-        for index, hypothesis_id in enumerate(self.analysis_run.hypothesis_ids):
-            hypothesis = Hypothesis.load(db, hypothesis_id)
+        hypotheses = Hypothesis.load_many(db, self.analysis_run.hypothesis_ids)
+        for index, hypothesis in enumerate(hypotheses):
             if not hypothesis:
                 raise ValueError("Hypothesis not found with the given ID.")
             self.hypotheses_text += f"Hypothesis #{index+1}:\n\n" + hypothesis.hypothesis_text + "\n\n\n"
@@ -35,21 +40,41 @@ class ReviewRunner:
             if len(self.review_set.attempts.get(agent_id, [])) < 1:
                 try:
                     generator = ReviewGenerator(self.db)
-                    review_id = generator.generate_review(agent_id, self.analysis_run.dataset_id, self.hypotheses_text, self.analysis_run.object_id, self.review_set.object_id)
+                    dataset = Dataset.load(self.db, self.analysis_run.dataset_id)
+                    query = generator.prepare_query(agent_id, dataset, self.hypotheses_text, self.analysis_run)
+                    response = query["llm"].query(query["agent"].context, query["prompt"])
+                    self.review_set.record_call(agent_id, response)
+                    review_id = generator.save_review(query, response, self.hypotheses_text, self.analysis_run,
+                                                      self.review_set)
                     self.review_set.review_ids.append(review_id)
                     self.review_set.attempts[agent_id].append('success')
                     self.review_set.update()
-                    return f"New review generated by agent {agent_id}."
+                    message = f"New review generated by agent {agent_id}."
+                    self.report(agent_id, 'success', message)
+                    return message
                 except Exception as e:
                     self.review_set.attempts[agent_id].append('failed')
                     self.review_set.update()
-                    return f"Failed to generate review for agent {agent_id}: {str(e)}"
+                    message = f"Failed to generate review for agent {agent_id}: {str(e)}"
+                    self.report(agent_id, 'failed', message)
+                    return message
 
         self.review_set.status = 'done'
         self.review_set.update()
         return "No more reviews needed."
 
-    def run(self):
+    def report(self, agent_id, status, message=None):
+        """ Send a progress event for an agent to the progress callback, if any """
+        if self.progress is not None:
+            self.progress({"agent_id": agent_id, "status": status, "message": message,
+                           "total": len(self.review_plan.agent_ids)})
+
+    def run(self, parallel=False, batch=False):
+        if batch:
+            # Submitted as provider batch jobs: cheaper, but may take hours
+            return self.run_parallel(engine=batch_engine)
+        if parallel:
+            return self.run_parallel()
         run_outputs = ""
         result = self.next_review()
         run_outputs += result + "\n"
@@ -58,4 +83,84 @@ class ReviewRunner:
             run_outputs += result + "\n"
         self.review_set.update_run_log(run_outputs)
         return run_outputs
-    
+
+    def run_parallel(self, engine=None):
+        """ Generate the reviews of all pending reviewer agents at once.
+
+        The hypotheses text, dataset and analysis run are loaded once and shared
+        by every reviewer. The LLM queries run concurrently through the query
+        engine. Reviews are saved in agent order: as queries finish, the
+        finished agents with no unfinished agent before them are saved and
+        their review_ids and attempts committed in one update, so review_ids
+        keep the agent order and a resumed review set does not query the
+        saved agents again.
+        """
+        if self.review_set.status == 'done':
+            return "Review is already completed."
+
+        review_set = self.review_set
+        pending_agent_ids = [agent_id for agent_id in self.review_plan.agent_ids
+                             if len(review_set.attempts.get(agent_id, [])) < 1]
+        generator = ReviewGenerator(self.db)
+        dataset = Dataset.load(self.db, self.analysis_run.dataset_id)
+        # A resumed run keeps the log lines of the agents that finished before
+        previous_log = review_set.run_log or ""
+        run_outputs = ""
+        queries = {}
+        outcomes = {}
+        saved = 0
+
+        def save(agent_id, response):
+            attempts = review_set.attempts.setdefault(agent_id, [])
+            try:
+                if isinstance(response, Exception):
+                    raise response
+                review_set.record_call(agent_id, response)
+                review_id = generator.save_review(queries[agent_id], response, self.hypotheses_text,
+                                                  self.analysis_run, review_set)
+                review_set.review_ids.append(review_id)
+                attempts.append('success')
+                message = f"New review generated by agent {agent_id}."
+                self.report(agent_id, 'success', message)
+            except Exception as e:
+                attempts.append('failed')
+                message = f"Failed to generate review for agent {agent_id}: {str(e)}"
+                self.report(agent_id, 'failed', message)
+            return message + "\n"
+
+        def flush():
+            nonlocal saved, run_outputs
+            start = saved
+            while saved < len(pending_agent_ids) and pending_agent_ids[saved] in outcomes:
+                agent_id = pending_agent_ids[saved]
+                run_outputs += save(agent_id, outcomes[agent_id])
+                saved += 1
+            if saved > start:
+                review_set.run_log = previous_log + run_outputs
+                review_set.update()
+
+        for agent_id in pending_agent_ids:
+            try:
+                queries[agent_id] = generator.prepare_query(agent_id, dataset, self.hypotheses_text, self.analysis_run)
+            except Exception as e:
+                outcomes[agent_id] = e
+        flush()
+
+        query_agent_ids = list(queries.keys())
+
+        def on_result(index, response):
+            outcomes[query_agent_ids[index]] = response
+            flush()
+
+        responses = (engine or query_engine).run_queries(
+            [(query["llm"], query["agent"].context, query["prompt"]) for query in queries.values()],
+            on_result=on_result)
+        for agent_id, response in zip(query_agent_ids, responses):
+            outcomes.setdefault(agent_id, response)
+        flush()
+
+        review_set.status = 'done'
+        run_outputs += "No more reviews needed.\n"
+        review_set.run_log = previous_log + run_outputs
+        review_set.update()
+        return run_outputs
@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.sqlite_database import SqliteDatabase
+from models.analysis_run import AnalysisRun
+from models.llm_calls import LLMResponse, call_record
+
+class TestAnalysisRun(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = SqliteDatabase(os.path.join(self.tmp_dir, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_concurrent_updates_are_merged(self):
+        created = AnalysisRun.create(self.db, "analysis_plan_1", ["agent_1", "agent_2"], "dataset_1",
+                                     1, "context", "description", "run")
+        first = AnalysisRun.load(self.db, created.object_id)
+        second = AnalysisRun.load(self.db, created.object_id)
+
+        first.hypothesis_ids.append("hypothesis_1")
+        first.attempts["agent_1"].append("success")
+        first.update()
+
+        second.hypothesis_ids.append("hypothesis_2")
+        second.attempts["agent_2"].append("success")
+        second.update()
+
+        stored = AnalysisRun.load(self.db, created.object_id)
+        self.assertEqual(stored.hypothesis_ids, ["hypothesis_1", "hypothesis_2"])
+        self.assertEqual(stored.attempts, {"agent_1": ["success"], "agent_2": ["success"]})
+
+    def test_version_is_loaded_with_properties(self):
+        created = AnalysisRun.create(self.db, "analysis_plan_1", ["agent_1", "agent_2"], "dataset_1",
+                                     1, "context", "description", "run")
+        # A write landing between reading the properties and the version would
+        # pair new versions with old properties; both come from one query
+        with mock.patch.object(self.db, "get_version", side_effect=AssertionError):
+            first = AnalysisRun.load(self.db, created.object_id)
+            second, = AnalysisRun.load_many(self.db, [created.object_id])
+        self.assertEqual((first.version, second.version), (0, 0))
+
+        first.run_log = "agent_1 done\n"
+        first.update()
+        second.run_log = "agent_2 done\n"
+        second.update()
+        self.assertEqual(AnalysisRun.load(self.db, created.object_id).run_log, "agent_1 done\nagent_2 done\n")
+
+    def test_first_update_of_created_run_is_checked(self):
+        created = AnalysisRun.create(self.db, "analysis_plan_1", ["agent_1", "agent_2"], "dataset_1",
+                                     1, "context", "description", "run")
+        self.assertEqual(created.version, 0)
+        other = AnalysisRun.load(self.db, created.object_id)
+        other.attempts["agent_1"].append("success")
+        other.update()
+
+        created.attempts["agent_2"].append("success")
+        created.update()
+        stored = AnalysisRun.load(self.db, created.object_id)
+        self.assertEqual(stored.attempts, {"agent_1": ["success"], "agent_2": ["success"]})
+
+        self.db.remove(created.object_id)
+        with self.assertRaisesRegex(ValueError, "not found"):
+            created.merge_stored_progress()
+
+    def test_llm_usage_is_stored_and_recomputed_on_new_calls(self):
+        created = AnalysisRun.create(self.db, "analysis_plan_1", ["agent_1"], "dataset_1",
+                                     1, "context", "description", "run")
+        created.update_properties(llm_usage={"calls": 7})
+        loaded = AnalysisRun.load(self.db, created.object_id)
+        self.assertEqual(loaded.llm_usage, {"calls": 7})
+
+        llm = mock.Mock(type="Groq", model_name="llama3-8b-8192")
+        loaded.record_call("agent_1", LLMResponse("text", call_record(llm, 100, 20, 1.5)))
+        loaded.update()
+        stored = AnalysisRun.load(self.db, created.object_id)
+        self.assertEqual((stored.llm_usage["calls"], stored.llm_usage["prompt_tokens"]), (1, 100))
+
+if __name__ == '__main__':
+    unittest.main()
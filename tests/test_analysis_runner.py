@@ -0,0 +1,127 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.sqlite_database import SqliteDatabase
+from models.agent import Agent
+from models.analysis_run import AnalysisRun
+from models.dataset import Dataset
+from models.hypothesis import Hypothesis
+from models.llm import LLM
+from models.llm_calls import LLMResponse, call_record
+from services.analysisrunner import AnalysisRunner
+
+class FakeEngine:
+    """Answers queries without calling a provider, failing for prompts containing 'fail' and stopping at 'crash'.
+
+    With reverse set the last query finishes first.
+    """
+    def __init__(self, reverse=False):
+        self.batches = []
+        self.reverse = reverse
+
+    def run_queries(self, queries, on_result=None):
+        self.batches.append(queries)
+        responses = [None] * len(queries)
+        order = reversed(range(len(queries))) if self.reverse else range(len(queries))
+        for index in order:
+            llm, context, prompt = queries[index]
+            if "crash" in prompt:
+                raise KeyboardInterrupt
+            responses[index] = (ValueError("provider error") if "fail" in prompt else
+                                LLMResponse(f"Hypothesis from {prompt}", call_record(llm, 100, 20, 1.5, retries=1)))
+            if on_result is not None:
+                on_result(index, responses[index])
+        return responses
+
+class TestAnalysisRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = SqliteDatabase(os.path.join(self.tmp_dir, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parallel_run_records_agents_in_order(self):
+        llm = LLM.create(self.db, type="Groq", model_name="llama3-8b-8192", seed=42)
+        dataset = Dataset.create(self.db, "dataset", "gene,score\nABC1,0.5\n", "experiment")
+        prompts = ["agent one {data}", "agent two fail", "agent three {experiment_description}"]
+        agent_ids = [Agent.create(self.db, llm.object_id, "context", prompt, name=f"a{i}").object_id
+                     for i, prompt in enumerate(prompts)]
+        run = AnalysisRun.create(self.db, "analysis_plan_1", agent_ids, dataset.object_id, 1,
+                                 "context", "description", "run")
+
+        engine = FakeEngine()
+        events = []
+        output = AnalysisRunner(self.db, run.object_id, progress=events.append).run_parallel(engine=engine)
+
+        self.assertEqual(len(engine.batches), 1)
+        self.assertEqual(len(engine.batches[0]), 3)
+        stored = AnalysisRun.load(self.db, run.object_id)
+        self.assertEqual(stored.status, "done")
+        self.assertEqual(stored.attempts, {agent_ids[0]: ["success"], agent_ids[1]: ["failed"],
+                                           agent_ids[2]: ["success"]})
+        hypotheses = Hypothesis.load_many(self.db, stored.hypothesis_ids)
+        self.assertEqual([hypothesis.agent_id for hypothesis in hypotheses], [agent_ids[0], agent_ids[2]])
+        self.assertEqual([hypothesis.name for hypothesis in hypotheses], ["run-a0-h1", "run-a2-h2"])
+        self.assertIn("Failed to generate hypothesis for agent", output)
+        self.assertEqual(stored.run_log, output)
+        self.assertEqual([(event["agent_id"], event["status"]) for event in events],
+                         [(agent_ids[0], "success"), (agent_ids[1], "failed"), (agent_ids[2], "success")])
+        self.assertTrue(all(event["total"] == 3 for event in events))
+        self.assertEqual(hypotheses[0].llm_call["prompt_tokens"], 100)
+        usage = stored.llm_usage
+        self.assertEqual((usage["calls"], usage["prompt_tokens"], usage["completion_tokens"], usage["retries"]),
+                         (2, 200, 40, 2))
+        self.assertEqual(usage["mean_latency"], 1.5)
+        self.assertEqual(list(usage["models"]), ["Groq llama3-8b-8192"])
+
+    def test_out_of_order_results_are_saved_in_agent_order(self):
+        llm = LLM.create(self.db, type="Groq", model_name="llama3-8b-8192", seed=42)
+        dataset = Dataset.create(self.db, "dataset", "gene,score\nABC1,0.5\n", "experiment")
+        agent_ids = [Agent.create(self.db, llm.object_id, "context", f"agent {i}", name=f"a{i}").object_id
+                     for i in range(3)]
+        run = AnalysisRun.create(self.db, "analysis_plan_1", agent_ids, dataset.object_id, 1,
+                                 "context", "description", "run")
+
+        events = []
+        AnalysisRunner(self.db, run.object_id, progress=events.append).run_parallel(engine=FakeEngine(reverse=True))
+
+        stored = AnalysisRun.load(self.db, run.object_id)
+        hypotheses = Hypothesis.load_many(self.db, stored.hypothesis_ids)
+        self.assertEqual([hypothesis.agent_id for hypothesis in hypotheses], agent_ids)
+        self.assertEqual([hypothesis.name for hypothesis in hypotheses], ["run-a0-h1", "run-a1-h2", "run-a2-h3"])
+        self.assertEqual([event["agent_id"] for event in events], agent_ids)
+
+    def test_interrupted_run_resumes_with_unfinished_agents(self):
+        llm = LLM.create(self.db, type="Groq", model_name="llama3-8b-8192", seed=42)
+        dataset = Dataset.create(self.db, "dataset", "gene,score\nABC1,0.5\n", "experiment")
+        agent_ids = [Agent.create(self.db, llm.object_id, "context", prompt, name=f"a{i}").object_id
+                     for i, prompt in enumerate(["agent one", "agent two crash"])]
+        run = AnalysisRun.create(self.db, "analysis_plan_1", agent_ids, dataset.object_id, 1,
+                                 "context", "description", "run")
+
+        with self.assertRaises(KeyboardInterrupt):
+            AnalysisRunner(self.db, run.object_id).run_parallel(engine=FakeEngine())
+
+        # The first agent's hypothesis was committed before the run stopped
+        stored = AnalysisRun.load(self.db, run.object_id)
+        self.assertEqual(stored.attempts, {agent_ids[0]: ["success"], agent_ids[1]: []})
+        self.assertEqual(len(stored.hypothesis_ids), 1)
+        self.assertEqual(stored.llm_usage["calls"], 1)
+
+        self.db.update(agent_ids[1], {"prompt_template": "agent two"})
+        engine = FakeEngine()
+        output = AnalysisRunner(self.db, run.object_id).run_parallel(engine=engine)
+        self.assertEqual([prompt for _, _, prompt in engine.batches[0]], ["agent two"])
+        stored = AnalysisRun.load(self.db, run.object_id)
+        self.assertEqual(stored.attempts, {agent_ids[0]: ["success"], agent_ids[1]: ["success"]})
+        self.assertEqual(len(stored.hypothesis_ids), 2)
+        self.assertTrue(stored.run_log.endswith(output))
+        self.assertEqual(stored.run_log.count("new hypothesis generated"), 2)
+
+if __name__ == '__main__':
+    unittest.main()
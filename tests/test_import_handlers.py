@@ -0,0 +1,65 @@
+import unittest
+import asyncio
+import sys
+import os
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.sqlite_database import SqliteDatabase
+from app.view_edit_specs import object_specifications
+from app.handlers.import_handlers import import_jsonl
+
+class TestImportJsonl(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = SqliteDatabase(os.path.join(self.tmp_dir, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def run_import(self, body, object_type="hypothesis", chunk_size=7, batch_size=2):
+        async def chunks():
+            # Small chunks split lines and multi-byte characters across reads
+            for start in range(0, len(body), chunk_size):
+                yield body[start:start + chunk_size]
+        return asyncio.run(import_jsonl(self.db, object_type, chunks(), object_specifications, batch_size))
+
+    def test_imports_valid_lines_and_reports_errors(self):
+        body = "\n".join([
+            '{"name": "h1", "data": [["gene", "score"], ["ABC1", "0.5"]], "object_id": "old_id"}',
+            '',
+            'not json',
+            '{"name": 5}',
+            '["not", "an", "object"]',
+            '{"name": "hé"}',
+            '{"name": "h3", "agent_id": "agent_1"}',
+            '{"name": "h1"}',
+        ]).encode("utf-8")
+        result = self.run_import(body)
+
+        self.assertEqual(result["imported"], 3)
+        self.assertEqual([error["line"] for error in result["errors"]], [3, 4, 5, 8])
+        self.assertIn("'name'", result["errors"][1]["error"])
+        self.assertIn("already used", result["errors"][3]["error"])
+        loaded = self.db.load_many(result["object_ids"])
+        self.assertEqual([properties["name"] for properties, _ in loaded], ["h1", "hé", "h3"])
+        self.assertEqual(loaded[0][0]["data"], "gene,score\r\nABC1,0.5\r\n")
+        self.assertNotEqual(result["object_ids"][0], "old_id")
+
+    def test_datasets_are_normalized_like_form_submissions(self):
+        self.db.add(None, {"name": "existing"}, "dataset")
+        body = "\n".join([
+            '{"name": "d1", "data": [["gene", "score"], ["ABC1", 0.5]]}',
+            '{"name": "d2", "data": "gene,score\\nABC1,0.456\\n"}',
+            '{"name": "existing", "data": "gene\\n"}',
+        ]).encode("utf-8")
+        result = self.run_import(body, object_type="dataset")
+
+        self.assertEqual([error["line"] for error in result["errors"]], [3])
+        loaded = self.db.load_many(result["object_ids"])
+        self.assertEqual([properties["data"] for properties, _ in loaded],
+                         ["gene,score\r\nABC1,0.50\r\n", "gene,score\r\nABC1,0.46\r\n"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import subprocess
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What the server, the job workers and the CLI scripts import at startup
+STARTUP_MODULES = ["app.routes.object_routes", "app.routes.agent_routes", "app.routes.task_routes",
+                   "app.task_management", "services.analysisrunner", "services.reviewrunner",
+                   "models.llm", "models.judgment_space", "app.analysis", "models.hierarchy"]
+
+# Plotting, ML and provider SDK packages, which must load only when first used
+HEAVY_PACKAGES = ["matplotlib", "seaborn", "scipy", "sklearn", "umap", "pandas",
+                  "openai", "anthropic", "groq", "google.generativeai"]
+
+# Generous, so the test only fails when a heavy import creeps back in; umap
+# alone took over ten seconds
+IMPORT_BUDGET = 5.0
+
+
+def import_times(modules):
+    """Run python -X importtime on the modules in a fresh interpreter and return
+    {module: (self, cumulative) microseconds} for every module it imported."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_time, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_time), int(cumulative))
+    return times
+
+
+class TestImportTime(unittest.TestCase):
+    def test_startup_skips_heavy_packages(self):
+        times = import_times(STARTUP_MODULES)
+        loaded = [package for package in HEAVY_PACKAGES if package in times]
+        self.assertEqual(loaded, [], f"Imported at startup: {loaded}")
+        total = sum(self_time for self_time, cumulative in times.values()) / 1e6
+        slowest = sorted(times, key=lambda module: -times[module][1])[:10]
+        self.assertLess(total, IMPORT_BUDGET, f"Startup imports took {total:.2f}s; slowest: {slowest}")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.job_queue import JobQueue, JobWorker
+
+class TestJobQueue(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.queue = JobQueue(os.path.join(self.tmp_dir, "test.db"))
+
+    def tearDown(self):
+        self.queue.pool.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_claims_by_priority_and_completes(self):
+        low = self.queue.enqueue("run_agent", {"agent_id": "agent_1"})
+        high = self.queue.enqueue("run_agent", {"agent_id": "agent_2"}, priority=5)
+
+        job = self.queue.claim("worker_1")
+        self.assertEqual(job["job_id"], high)
+        self.assertEqual(job["payload"], {"agent_id": "agent_2"})
+        self.assertEqual(self.queue.claim("worker_2")["job_id"], low)
+        self.assertIsNone(self.queue.claim("worker_3"))
+
+        self.queue.complete(high, "worker_1", {"result": "ok"})
+        stored = self.queue.get(high)
+        self.assertEqual((stored["status"], stored["result"]), ("completed", {"result": "ok"}))
+
+    def test_expired_lease_is_reclaimed_and_failures_retry(self):
+        job_id = self.queue.enqueue("analysis_run", {"analysis_run_id": "run_1"}, max_attempts=2)
+        self.queue.claim("dead_worker", lease_seconds=-1)
+
+        # The first worker's lease has expired, so another worker resumes the job
+        job = self.queue.claim("worker_2")
+        self.assertEqual((job["job_id"], job["attempts"]), (job_id, 2))
+        self.assertFalse(self.queue.renew_lease(job_id, "dead_worker"))
+        self.queue.complete(job_id, "dead_worker", {"result": "stale"})
+        self.assertEqual(self.queue.get(job_id)["status"], "running")
+
+        self.queue.fail(job_id, "worker_2", "provider error")
+        stored = self.queue.get(job_id)
+        self.assertEqual((stored["status"], stored["error"]), ("failed", "provider error"))
+
+        retried = self.queue.enqueue("analysis_run", max_attempts=3)
+        self.queue.claim("worker_2")
+        self.queue.fail(retried, "worker_2", "timeout")
+        self.assertEqual(self.queue.get(retried)["status"], "pending")
+        self.assertIsNone(self.queue.claim("worker_2"))
+
+    def test_expired_lease_on_last_attempt_fails_job(self):
+        job_id = self.queue.enqueue("analysis_run", {"analysis_run_id": "run_1"}, max_attempts=1)
+        self.queue.claim("dead_worker", lease_seconds=-1)
+
+        self.assertIsNone(self.queue.claim("worker_2"))
+        stored = self.queue.get(job_id)
+        self.assertEqual((stored["status"], stored["attempts"]), ("failed", 1))
+        self.assertIsNone(stored["lease_owner"])
+
+    def test_worker_runs_jobs(self):
+        done = threading.Event()
+
+        def handler(payload, report):
+            report({"type": "agent", "status": "success"})
+            done.set()
+            return {"result": payload["value"] * 2}
+
+        job_id = self.queue.enqueue("double", {"value": 21})
+        worker = JobWorker(self.queue, {"double": handler}, poll_interval=0.01)
+        worker.start()
+        self.assertTrue(done.wait(5))
+        worker.stop(timeout=5)
+        self.assertEqual(self.queue.get(job_id)["result"], {"result": 42})
+        events = self.queue.events(job_id)
+        self.assertEqual([event for _, event in events], [{"type": "agent", "status": "success"}])
+        self.assertEqual(self.queue.events(job_id, after=events[-1][0]), [])
+
+if __name__ == '__main__':
+    unittest.main()
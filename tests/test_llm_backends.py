@@ -0,0 +1,97 @@
+import unittest
+import asyncio
+import json
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.llm import LLM
+from models.llm_backends import BackendRegistry, ProviderBackend, SEED, SYSTEM_PROMPT, ASYNC, STREAMING
+from models.llm_calls import LLMResponse
+from models.llm_cache import is_deterministic
+from models.llm_prompt import PrefixedPrompt
+
+class EchoBackend(ProviderBackend):
+    """Answers with the prompt, without streaming or an async client."""
+    capabilities = frozenset({SEED})
+
+    def complete(self, llm, context, prompt):
+        return LLMResponse(f"{context}: {prompt}", {"prompt_tokens": 2, "completion_tokens": 2})
+
+class ChatCompletionsHandler(BaseHTTPRequestHandler):
+    """Stands in for a vLLM or llama.cpp server's /v1/chat/completions."""
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append((self.path, request))
+        data = json.dumps({"id": "chatcmpl-1", "object": "chat.completion", "created": 0,
+                           "model": request["model"],
+                           "choices": [{"index": 0, "finish_reason": "stop",
+                                        "message": {"role": "assistant", "content": " local answer "}}],
+                           "usage": {"prompt_tokens": 30, "completion_tokens": 2, "total_tokens": 32}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class TestBackendRegistry(unittest.TestCase):
+    def test_lazy_and_configured_backends(self):
+        registry = BackendRegistry(specs={}, load_configured=lambda: {
+            "echoserver": "tests.test_llm_backends:EchoBackend"})
+        backend = registry.get("EchoServer")
+        self.assertIsInstance(backend, EchoBackend)
+        self.assertIs(registry.get("EchoServer"), backend)
+        self.assertEqual(registry.names(), ["echoserver"])
+        with self.assertRaises(ValueError):
+            registry.get("Missing")
+
+    def test_new_backend_without_editing_llm(self):
+        registry = BackendRegistry(load_configured=None)
+        registry.register("Echo", EchoBackend)
+        llm = LLM(type="Echo", model_name="echo-1", max_tokens=10, seed=1, temperature=0.5)
+        with mock.patch("models.llm.get_backend", registry.get), \
+                mock.patch("models.llm_cache.get_backend", registry.get):
+            self.assertEqual(llm.query("context", "prompt"), "context: prompt")
+            # No streaming: the response comes as one chunk
+            self.assertEqual(list(llm.query_stream("context", "prompt")), ["context: prompt"])
+            # No async client: the query runs in a thread
+            self.assertEqual(asyncio.run(llm.aquery_provider("context", "prompt")), "context: prompt")
+            self.assertTrue(is_deterministic(llm))
+        self.assertEqual(registry.get("Anthropic").capabilities & {SEED, ASYNC, STREAMING},
+                         {ASYNC, STREAMING})
+
+class TestOpenAICompatibleBackend(unittest.TestCase):
+    def setUp(self):
+        ChatCompletionsHandler.requests = []
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionsHandler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        host, port = self.httpd.server_address[:2]
+        self.server = (f"http://{host}:{port}/v1", None)
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def test_query_local_server(self):
+        llm = LLM(type="OpenAICompatible", model_name="meta-llama/Meta-Llama-3.1-8B-Instruct", max_tokens=50,
+                  seed=7, temperature=0.2)
+        self.assertIn(SYSTEM_PROMPT, llm.backend.capabilities)
+        with mock.patch("models.llm_backend_openai.load_openai_compatible_server", return_value=self.server):
+            response = llm.query("the context", PrefixedPrompt("the dataset", "the question"))
+        self.assertEqual(response, "local answer")
+        self.assertEqual((response.call["provider"], response.call["prompt_tokens"]), ("OpenAICompatible", 30))
+        path, request = ChatCompletionsHandler.requests[0]
+        self.assertEqual(path, "/v1/chat/completions")
+        self.assertEqual((request["seed"], request["max_tokens"]), (7, 50))
+        self.assertEqual([message["content"] for message in request["messages"]],
+                         ["the context", "the dataset\n\nthe question"])
+
+if __name__ == '__main__':
+    unittest.main()
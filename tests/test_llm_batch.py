@@ -0,0 +1,106 @@
+import unittest
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import anthropic
+from openai import OpenAI
+from models.llm import LLM
+from models.llm_calls import LLMResponse
+from models.llm_batch import BatchEngine, BatchError, OpenAIBatchProvider, AnthropicBatchProvider
+from scripts.fake_batch_server import FakeBatchServer
+
+class FallbackEngine:
+    """Answers the queries of providers without a batch API."""
+    def __init__(self):
+        self.queries = []
+
+    def run_queries(self, queries, on_result=None):
+        self.queries.extend(queries)
+        responses = [f"direct answer to {prompt}" for llm, context, prompt in queries]
+        for index, response in enumerate(responses):
+            if on_result is not None:
+                on_result(index, response)
+        return responses
+
+class APIConnectionError(Exception):
+    pass
+
+class FlakyProvider:
+    """Wraps a batch provider, failing its first status check and results fetch with a connection error."""
+    def __init__(self, provider):
+        self.provider = provider
+        self.failures = {"status": 1, "results": 1}
+
+    def __getattr__(self, name):
+        method = getattr(self.provider, name)
+        if name not in self.failures:
+            return method
+
+        def flaky(*args):
+            if self.failures[name]:
+                self.failures[name] -= 1
+                raise APIConnectionError("connection reset")
+            return method(*args)
+        return flaky
+
+class TestBatchEngine(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeBatchServer(polls_to_complete=2).start()
+        self.fallback = FallbackEngine()
+        self.engine = BatchEngine(
+            providers={"OpenAI": OpenAIBatchProvider(OpenAI(api_key="test", base_url=self.server.url + "/v1")),
+                       "Anthropic": AnthropicBatchProvider(anthropic.Anthropic(api_key="test",
+                                                                                base_url=self.server.url))},
+            fallback=self.fallback, poll_interval=0)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_results_are_mapped_back_in_order(self):
+        openai_llm = LLM(type="OpenAI", model_name="gpt-4o", max_tokens=100, seed=42, temperature=0.0)
+        anthropic_llm = LLM(type="Anthropic", model_name="claude-3-haiku-20240307", max_tokens=100,
+                            seed=42, temperature=0.0)
+        groq_llm = LLM(type="Groq", model_name="llama3-8b-8192", max_tokens=100, seed=42, temperature=0.0)
+        queries = [(openai_llm, "context", "first prompt"),
+                   (anthropic_llm, "context", "second prompt"),
+                   (groq_llm, "context", "third prompt"),
+                   (openai_llm, "context", "fourth prompt FAIL"),
+                   (anthropic_llm, "context", "fifth prompt")]
+        finished = []
+        responses = self.engine.run_queries(queries, on_result=lambda index, response: finished.append(index))
+
+        self.assertEqual(len(self.server.batches), 1)
+        self.assertEqual(len(self.server.message_batches), 1)
+        self.assertEqual(sorted(finished), [0, 1, 2, 3, 4])
+        self.assertEqual(self.fallback.queries, [queries[2]])
+
+        self.assertIn("first prompt", json.loads(responses[0])["hypotheses"][0]["description"])
+        self.assertIn("second prompt", json.loads(responses[1])["hypotheses"][0]["description"])
+        self.assertEqual(responses[2], "direct answer to third prompt")
+        self.assertIsInstance(responses[3], BatchError)
+        self.assertIn("fifth prompt", json.loads(responses[4])["hypotheses"][0]["description"])
+
+        self.assertIsInstance(responses[0], LLMResponse)
+        self.assertEqual((responses[0].call["provider"], responses[0].call["prompt_tokens"]), ("OpenAI", 2))
+        self.assertEqual((responses[4].call["provider"], responses[4].call["prompt_tokens"]), ("Anthropic", 2))
+
+    def test_submit_failure_fails_its_queries(self):
+        llm = LLM(type="OpenAI", model_name="gpt-4o", max_tokens=100, seed=42, temperature=0.0)
+        engine = BatchEngine(providers={"OpenAI": OpenAIBatchProvider(
+            OpenAI(api_key="test", base_url=self.server.url + "/missing", max_retries=0))},
+            fallback=self.fallback, poll_interval=0)
+        responses = engine.run_queries([(llm, "context", "prompt")])
+        self.assertIsInstance(responses[0], Exception)
+
+    def test_transient_poll_errors_keep_the_batch(self):
+        llm = LLM(type="OpenAI", model_name="gpt-4o", max_tokens=100, seed=42, temperature=0.0)
+        provider = FlakyProvider(OpenAIBatchProvider(OpenAI(api_key="test", base_url=self.server.url + "/v1")))
+        engine = BatchEngine(providers={"OpenAI": provider}, fallback=self.fallback, poll_interval=0)
+        responses = engine.run_queries([(llm, "context", "first prompt")])
+        self.assertEqual(provider.failures, {"status": 0, "results": 0})
+        self.assertEqual(len(self.server.batches), 1)
+        self.assertIn("first prompt", json.loads(responses[0])["hypotheses"][0]["description"])
+
+if __name__ == '__main__':
+    unittest.main()
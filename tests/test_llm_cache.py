@@ -0,0 +1,76 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.llm_cache import ResponseCache, request_key, is_deterministic
+from models.llm import LLM
+
+class CountingLLM(LLM):
+    """Answers queries locally, counting how many reach the provider."""
+    calls = 0
+
+    def query_provider(self, context, prompt):
+        self.calls += 1
+        return f"response {self.calls} to {prompt}"
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.now = 1000.0
+        self.cache = ResponseCache(os.path.join(self.tmp_dir, "cache.db"), ttl=60, max_bytes=30,
+                                   clock=lambda: self.now)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_hits_misses_and_ttl(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.cache.put("a", "response a")
+        self.assertEqual(self.cache.get("a"), "response a")
+        self.now += 61
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.stats(), {"hits": 1, "misses": 2, "entries": 0, "bytes": 0})
+
+    def test_least_recently_used_evicted(self):
+        self.cache.put("a", "x" * 10)
+        self.now += 1
+        self.cache.put("b", "y" * 10)
+        self.now += 1
+        self.cache.get("a")
+        self.now += 1
+        self.cache.put("c", "z" * 15)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), "x" * 10)
+        self.assertEqual(self.cache.get("c"), "z" * 15)
+
+    def test_llm_opt_in_and_deterministic_bypass(self):
+        llm = CountingLLM(type="Anthropic", model_name="claude-3-haiku-20240307", max_tokens=100,
+                          seed=42, temperature=0.0, response_cache="on")
+        with mock.patch("models.llm.get_response_cache", return_value=self.cache):
+            self.assertFalse(llm.query("context", "prompt").call["cached"])
+            response = llm.query("context", "prompt")
+            self.assertEqual(response, "response 1 to prompt")
+            self.assertTrue(response.call["cached"])
+            self.assertEqual(llm.calls, 1)
+
+            # Anthropic ignores the seed, so sampling is only cached when forced
+            llm.temperature = 0.7
+            self.assertFalse(is_deterministic(llm))
+            llm.query("context", "prompt")
+            llm.query("context", "prompt")
+            self.assertEqual(llm.calls, 3)
+            llm.response_cache = "force"
+            llm.query("context", "prompt")
+            llm.query("context", "prompt")
+            self.assertEqual(llm.calls, 4)
+
+            llm.response_cache = "off"
+            llm.query("context", "prompt")
+            self.assertEqual(llm.calls, 5)
+        self.assertNotEqual(request_key(llm, "context", "prompt"), request_key(llm, "context", "other prompt"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import sys
+import os
+import threading
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.llm_backends import BackendRegistry, ProviderBackend
+from models.llm_catalog import ModelCatalog
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestModelCatalog(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        self.refreshed = threading.Event()
+        self.models = ["gemini-1.5-pro-latest"]
+
+        def fetch(api_key):
+            self.calls.append(api_key)
+            if len(self.calls) > 1:
+                self.refreshed.set()
+            return list(self.models)
+
+        self.clock = FakeClock()
+        self.catalog = ModelCatalog({"GoogleAI": fetch, "Anthropic": lambda api_key: None}, ttl=60, clock=self.clock)
+
+    def test_model_list_is_cached_until_ttl(self):
+        self.catalog.check("GoogleAI", "gemini-1.5-pro-latest", "key")
+        self.catalog.check("GoogleAI", "gemini-1.5-pro-latest", "key")
+        self.assertEqual(self.calls, ["key"])
+        with self.assertRaises(ValueError):
+            self.catalog.check("GoogleAI", "gemini-9", "key")
+
+        # After the TTL the stale list is served while a new one is fetched in the background
+        self.models.append("gemini-9")
+        self.clock.now = 61
+        with self.assertRaises(ValueError):
+            self.catalog.check("GoogleAI", "gemini-9", "key")
+        self.assertTrue(self.refreshed.wait(5))
+        for _ in range(100):
+            if "gemini-9" in self.catalog.get("GoogleAI", "key"):
+                break
+            threading.Event().wait(0.01)
+        self.catalog.check("GoogleAI", "gemini-9", "key")
+        self.assertEqual(len(self.calls), 2)
+
+    def test_providers_without_a_model_list_are_not_checked(self):
+        self.catalog.check("Anthropic", "claude-3-haiku-20240307", "key")
+
+    def test_failed_refresh_waits_for_the_next_ttl(self):
+        self.catalog.check("GoogleAI", "gemini-1.5-pro-latest", "key")
+        failed = threading.Event()
+
+        def failing_fetch(api_key):
+            self.calls.append(api_key)
+            failed.set()
+            raise ConnectionError("catalog unavailable")
+        self.catalog.fetchers["GoogleAI"] = failing_fetch
+
+        self.clock.now = 61
+        self.catalog.check("GoogleAI", "gemini-1.5-pro-latest", "key")
+        self.assertTrue(failed.wait(5))
+        self.wait_for_refreshes()
+        # The previous list is kept and no new refresh starts until another TTL has passed
+        self.clock.now = 100
+        self.catalog.check("GoogleAI", "gemini-1.5-pro-latest", "key")
+        self.wait_for_refreshes()
+        self.assertEqual(len(self.calls), 2)
+        self.clock.now = 122
+        self.catalog.check("GoogleAI", "gemini-1.5-pro-latest", "key")
+        self.wait_for_refreshes()
+        self.assertEqual(len(self.calls), 3)
+
+    def wait_for_refreshes(self):
+        for _ in range(500):
+            if not self.catalog._refreshing:
+                return
+            threading.Event().wait(0.01)
+
+    def test_registered_backends_supply_their_model_list(self):
+        class ServerBackend(ProviderBackend):
+            def list_models(self, credential):
+                return [f"{credential}-model"]
+
+        backends = BackendRegistry(specs={}, load_configured=None)
+        backends.register("MyServer", ServerBackend)
+        backends.register("Plain", ProviderBackend)
+        catalog = ModelCatalog()
+        with mock.patch("models.llm_backends.get_backend", backends.get):
+            catalog.check("MyServer", "server-model", "server")
+            with self.assertRaises(ValueError):
+                catalog.check("MyServer", "other-model", "server")
+            # The default list_models has no list, so any model name passes
+            catalog.check("Plain", "any-model", "key")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import asyncio
+import sys
+import os
+import tempfile
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.config import load_api_key
+from models.llm_backends import BackendRegistry, ProviderBackend
+from models.llm_clients import ClientRegistry, AsyncClientRegistry
+
+class FakeClient:
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class TestClientRegistry(unittest.TestCase):
+    def test_clients_are_shared_per_provider_and_key(self):
+        registry = ClientRegistry({"OpenAI": FakeClient, "Groq": FakeClient})
+        client = registry.get("OpenAI", "key-1")
+        self.assertIs(registry.get("OpenAI", "key-1"), client)
+        self.assertIsNot(registry.get("OpenAI", "key-2"), client)
+        self.assertIsNot(registry.get("Groq", "key-1"), client)
+        with self.assertRaises(ValueError):
+            registry.get("Unknown", "key-1")
+
+        registry.clear()
+        self.assertTrue(client.closed)
+        self.assertIsNot(registry.get("OpenAI", "key-1"), client)
+
+    def test_backends_create_their_own_clients(self):
+        class ServerBackend(ProviderBackend):
+            def create_client(self, api_key):
+                return FakeClient(api_key)
+
+            def create_async_client(self, api_key):
+                return FakeClient(f"async {api_key}")
+
+        backends = BackendRegistry(specs={}, load_configured=None)
+        backends.register("MyServer", ServerBackend)
+        with mock.patch("models.llm_backends.get_backend", backends.get):
+            self.assertEqual(ClientRegistry().get("MyServer", "key-1").api_key, "key-1")
+
+            async def get_async():
+                return AsyncClientRegistry().get("MyServer", "key-1")
+            self.assertEqual(asyncio.run(get_async()).api_key, "async key-1")
+            with self.assertRaises(ValueError):
+                ClientRegistry().get("Unknown", "key-1")
+
+class TestConfigCache(unittest.TestCase):
+    def test_config_is_reread_when_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            config_path = os.path.join(tmp_dir, "config.ini")
+            with open(config_path, "w") as f:
+                f.write("[API_KEYS]\nOPENAI_API_KEY = first\n")
+            self.assertEqual(load_api_key("OPENAI_API_KEY", config_path=config_path), "first")
+
+            with open(config_path, "w") as f:
+                f.write("[API_KEYS]\nOPENAI_API_KEY = second-key\n")
+            self.assertEqual(load_api_key("OPENAI_API_KEY", config_path=config_path), "second-key")
+
+if __name__ == '__main__':
+    unittest.main()
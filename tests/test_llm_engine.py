@@ -0,0 +1,104 @@
+import unittest
+import asyncio
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.llm_engine import QueryEngine, TokenBucket
+from models.llm_retry import RetryPolicy, RetryError
+
+class APIConnectionError(Exception):
+    pass
+
+class FakeLLM:
+    """Stands in for LLM, recording how many of its queries run at once."""
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def __init__(self, type="Groq", model_name="llama3-8b-8192", failures=0):
+        self.type = type
+        self.model_name = model_name
+        self.failures = failures
+
+    async def aquery(self, context, prompt, engine=None):
+        return await engine.query(self, context, prompt)
+
+    async def aquery_provider(self, context, prompt):
+        with FakeLLM.lock:
+            FakeLLM.in_flight += 1
+            FakeLLM.max_in_flight = max(FakeLLM.max_in_flight, FakeLLM.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if self.failures:
+                self.failures -= 1
+                raise APIConnectionError("connection reset")
+            return f"{self.model_name}: {prompt}"
+        finally:
+            with FakeLLM.lock:
+                FakeLLM.in_flight -= 1
+
+class TestQueryEngine(unittest.TestCase):
+    def setUp(self):
+        FakeLLM.in_flight = 0
+        FakeLLM.max_in_flight = 0
+
+    def test_queries_run_concurrently_within_provider_limit(self):
+        engine = QueryEngine(concurrency={"Groq": 3}, model_concurrency=10, requests_per_minute={})
+        queries = [(FakeLLM(), "context", f"prompt {i}") for i in range(10)]
+        results = engine.run_queries(queries)
+        self.assertEqual(results, [f"llama3-8b-8192: prompt {i}" for i in range(10)])
+        self.assertEqual(FakeLLM.max_in_flight, 3)
+
+    def test_provider_limit_is_shared_across_threads(self):
+        engine = QueryEngine(concurrency={"Groq": 3}, model_concurrency=10, requests_per_minute={})
+        results = {}
+
+        def run(worker):
+            queries = [(FakeLLM(), "context", f"prompt {worker}.{i}") for i in range(6)]
+            results[worker] = engine.run_queries(queries)
+
+        threads = [threading.Thread(target=run, args=(worker,)) for worker in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results[2], [f"llama3-8b-8192: prompt 2.{i}" for i in range(6)])
+        self.assertEqual(FakeLLM.max_in_flight, 3)
+
+    def test_retry_backoff_releases_slot(self):
+        engine = QueryEngine(concurrency={"Groq": 1}, model_concurrency=10, requests_per_minute={},
+                             retry_policy=RetryPolicy(max_attempts=2, base_delay=0.2, random=lambda: 1))
+        started = []
+
+        class RecordingLLM(FakeLLM):
+            async def aquery_provider(self, context, prompt):
+                started.append(prompt)
+                return await super().aquery_provider(context, prompt)
+
+        results = engine.run_queries([(RecordingLLM(failures=1), "context", "retried"),
+                                      (RecordingLLM(), "context", "waiting")])
+        self.assertEqual(results, ["llama3-8b-8192: retried", "llama3-8b-8192: waiting"])
+        # The second query ran while the first was backing off, not after its retry
+        self.assertEqual(started, ["retried", "waiting", "retried"])
+
+    def test_transient_errors_are_retried(self):
+        engine = QueryEngine(requests_per_minute={}, retry_policy=RetryPolicy(max_attempts=3, base_delay=0))
+        results = engine.run_queries([(FakeLLM(failures=2), "context", "retried"),
+                                      (FakeLLM(failures=3), "context", "failed")])
+        self.assertEqual(results[0], "llama3-8b-8192: retried")
+        self.assertIsInstance(results[1], RetryError)
+        self.assertIsInstance(results[1].last_error, APIConnectionError)
+
+class TestTokenBucket(unittest.TestCase):
+    def test_bucket_refills_at_rate(self):
+        now = [0.0]
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertAlmostEqual(bucket.try_acquire(), 0.5)
+        now[0] = 0.5
+        self.assertEqual(bucket.try_acquire(), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.sqlite_database import SqliteDatabase
+from models.agent import Agent
+from models.analysis_run import AnalysisRun
+from models.dataset import Dataset
+from models.llm import LLM
+from models.llm_backends import get_backend
+from models.llm_backend_anthropic import anthropic_usage
+from models.llm_backend_openai import openai_usage
+from models.llm_calls import summarize_calls
+from models.llm_prompt import PrefixedPrompt, format_prompt, split_prompt
+from services.hypothesis_generation import HypothesisGenerator
+
+class TestPromptPrefix(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = SqliteDatabase(os.path.join(self.tmp_dir, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_shared_values_move_to_prefix(self):
+        shared = [("experiment_description", "Experiment description", "an experiment"),
+                  ("data", "Data", "gene,score\nABC1,0.5")]
+        prompt = format_prompt("Data: {data}. Experiment: {experiment_description}. Context: {context}",
+                               {"context": "immunity"}, shared)
+        self.assertEqual(prompt.prefix, "Experiment description:\nan experiment\n\nData:\ngene,score\nABC1,0.5")
+        self.assertEqual(prompt.body, "Data: (data, given above). Experiment: (experiment description, "
+                                      "given above). Context: immunity")
+        self.assertEqual(prompt, prompt.prefix + "\n\n" + prompt.body)
+        self.assertEqual(split_prompt(format_prompt("No data {context}", {}, shared)), ("", "No data {context}"))
+
+    def test_agents_of_a_run_share_the_prefix(self):
+        llm = LLM.create(self.db, type="Anthropic", model_name="claude-3-haiku-20240307", seed=42)
+        dataset = Dataset.create(self.db, "dataset", "gene,score\nABC1,0.5\n", "experiment")
+        agent_ids = [Agent.create(self.db, llm.object_id, "context", template, name=f"a{i}").object_id
+                     for i, template in enumerate(["First {data} {experiment_description}",
+                                                   "Second {experiment_description} then {data}"])]
+        run = AnalysisRun.create(self.db, "analysis_plan_1", agent_ids, dataset.object_id, 1,
+                                 "context", "description", "run")
+        generator = HypothesisGenerator(self.db)
+        prompts = [generator.prepare_query(agent_id, run, 2)["prompt"] for agent_id in agent_ids]
+        self.assertEqual(prompts[0].prefix, prompts[1].prefix)
+        self.assertIn("gene,score", prompts[0].prefix)
+        self.assertNotIn("gene,score", prompts[0].body)
+        self.assertIn("Generate 2 hypotheses", prompts[1].body)
+
+    def test_provider_messages_put_prefix_first(self):
+        llm = LLM(type="Anthropic", model_name="claude-3-haiku-20240307", max_tokens=100, seed=42,
+                  temperature=0.0)
+        prompt = PrefixedPrompt("the dataset", "the question")
+        request = get_backend("Anthropic").request(llm, "the context", prompt)
+        self.assertEqual(request["system"], [{"type": "text", "text": "the dataset",
+                                              "cache_control": {"type": "ephemeral"}},
+                                             {"type": "text", "text": "the context"}])
+        self.assertEqual(request["messages"], [{"role": "user", "content": "the question"}])
+        self.assertEqual(get_backend("Anthropic").request(llm, "the context", "plain prompt")["system"],
+                         "the context")
+        self.assertEqual([message["content"] for message in get_backend("OpenAI").chat_messages("the context",
+                                                                                                prompt)],
+                         ["the context", "the dataset\n\nthe question"])
+
+    def test_cached_tokens_recorded(self):
+        usage = SimpleNamespace(input_tokens=10, output_tokens=5, cache_creation_input_tokens=0,
+                                cache_read_input_tokens=2000)
+        self.assertEqual(anthropic_usage(SimpleNamespace(usage=usage)),
+                         {"prompt_tokens": 2010, "completion_tokens": 5, "cached_tokens": 2000})
+        usage = SimpleNamespace(prompt_tokens=1500, completion_tokens=5,
+                                prompt_tokens_details={"cached_tokens": 1024})
+        self.assertEqual(openai_usage(SimpleNamespace(usage=usage))["cached_tokens"], 1024)
+        self.assertEqual(summarize_calls([{"cached_tokens": 1024}, {"cached_tokens": None}])["cached_tokens"], 1024)
+
+if __name__ == '__main__':
+    unittest.main()
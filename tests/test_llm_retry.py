@@ -0,0 +1,90 @@
+import unittest
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.llm_retry import RetryPolicy, RetryError, CircuitBreaker, CircuitOpenError, retry_after
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class APIStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.response = FakeResponse(status_code, headers)
+
+class Flaky:
+    """Raises the given errors in turn, then answers."""
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "answer"
+
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.policy = RetryPolicy(max_attempts=4, base_delay=0, budget=5, failure_threshold=3)
+
+    def test_transient_errors_and_rate_limits_are_retried(self):
+        query = Flaky(APIStatusError(503), APIStatusError(429, {"retry-after": "0"}))
+        self.assertEqual(self.policy.call("OpenAI", query), "answer")
+        self.assertEqual(query.calls, 3)
+
+    def test_client_errors_are_not_retried(self):
+        query = Flaky(APIStatusError(400))
+        with self.assertRaises(APIStatusError):
+            self.policy.call("OpenAI", query)
+        self.assertEqual(query.calls, 1)
+
+    def test_gives_up_after_max_attempts_or_budget(self):
+        with self.assertRaises(RetryError) as context:
+            self.policy.call("OpenAI", Flaky(*[APIStatusError(429)] * 4))
+        self.assertIn("Max retries exceeded", str(context.exception))
+        query = Flaky(APIStatusError(429, {"retry-after": "60"}))
+        with self.assertRaises(RetryError):
+            self.policy.call("OpenAI", query)
+        self.assertEqual(query.calls, 1)
+
+    def test_retry_after_header(self):
+        self.assertEqual(retry_after(APIStatusError(429, {"retry-after": "7"})), 7.0)
+        self.assertEqual(retry_after(APIStatusError(429, {"retry-after-ms": "250"})), 0.25)
+        self.assertIsNone(retry_after(APIStatusError(503)))
+        self.assertEqual(RetryPolicy(base_delay=2, random=lambda: 0.5).delay(2, APIStatusError(503)), 4.0)
+
+    def test_circuit_opens_per_provider(self):
+        # The third failure opens the circuit, so the fourth attempt is never sent
+        query = Flaky(*[APIStatusError(502)] * 4)
+        with self.assertRaises(CircuitOpenError):
+            self.policy.call("Groq", query)
+        self.assertEqual(query.calls, 3)
+        with self.assertRaises(CircuitOpenError):
+            self.policy.call("Groq", Flaky())
+        self.assertEqual(self.policy.call("OpenAI", Flaky()), "answer")
+        self.assertEqual(asyncio.run(self.policy.acall("OpenAI", lambda: asyncio.sleep(0, "async answer"))),
+                         "async answer")
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_half_open_trial(self):
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        now[0] = 10
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        now[0] = 20
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from unittest import mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from models.agent import Agent
+from models.llm import LLM
+from models.llm_cache import ResponseCache
+
+class StreamingLLM(LLM):
+    """Streams a canned response without calling a provider."""
+    streams = 0
+
+    def stream_provider(self, context, prompt, usage):
+        self.streams += 1
+        yield '{"answer": '
+        yield '42}'
+        usage.update({"prompt_tokens": 12, "completion_tokens": 3})
+
+def consume(generator):
+    """Collect a generator's chunks and its return value."""
+    chunks = []
+    while True:
+        try:
+            chunks.append(next(generator))
+        except StopIteration as finished:
+            return chunks, finished.value
+
+class TestStreaming(unittest.TestCase):
+    def setUp(self):
+        self.llm = StreamingLLM(type="Groq", model_name="llama3-8b-8192", max_tokens=100, seed=42,
+                                temperature=0.0)
+
+    def test_query_stream_yields_chunks_and_returns_response(self):
+        chunks, response = consume(self.llm.query_stream("context", "prompt"))
+        self.assertEqual(chunks, ['{"answer": ', '42}'])
+        self.assertEqual(response, '{"answer": 42}')
+        self.assertEqual((response.call["prompt_tokens"], response.call["completion_tokens"]), (12, 3))
+
+    def test_cached_response_streams_as_one_chunk(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            cache = ResponseCache(os.path.join(tmp_dir, "cache.db"))
+            self.llm.response_cache = "on"
+            with mock.patch("models.llm.get_response_cache", return_value=cache):
+                consume(self.llm.query_stream("context", "prompt"))
+                chunks, response = consume(self.llm.query_stream("context", "prompt"))
+            self.assertEqual(chunks, ['{"answer": 42}'])
+            self.assertTrue(response.call["cached"])
+            self.assertEqual(self.llm.streams, 1)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_agent_run_stream_returns_parsed_result(self):
+        agent = Agent(llm_id="llm", context="context", prompt_template="prompt")
+        with mock.patch.object(Agent, "prepare_query", return_value=(self.llm, "prompt")):
+            chunks, result = consume(agent.run_stream())
+        self.assertEqual("".join(chunks), '{"answer": 42}')
+        self.assertEqual(result, {"answer": 42})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.sqlite_database import SqliteDatabase
+from models.agent import Agent
+from models.analysis_run import AnalysisRun
+from models.dataset import Dataset
+from models.hypothesis import Hypothesis
+from models.llm import LLM
+from models.review import Review
+from models.review_plan import ReviewPlan
+from models.review_set import ReviewSet
+from services.reviewrunner import ReviewRunner
+
+class FakeEngine:
+    """Answers queries without calling a provider, failing for prompts containing 'fail'.
+
+    With reverse set the last query finishes first.
+    """
+    def __init__(self, reverse=False):
+        self.batches = []
+        self.reverse = reverse
+
+    def run_queries(self, queries, on_result=None):
+        self.batches.append(queries)
+        responses = [ValueError("provider error") if "fail" in prompt
+                     else "Final Rankings:\nHypothesis #1: 4\n\nSummary Review:\nGood."
+                     for llm, context, prompt in queries]
+        order = reversed(range(len(queries))) if self.reverse else range(len(queries))
+        for index in order:
+            if on_result is not None:
+                on_result(index, responses[index])
+        return responses
+
+class TestReviewRunner(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = SqliteDatabase(os.path.join(self.tmp_dir, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_parallel_review_commits_each_agent(self):
+        stored, _ = self.run_review(FakeEngine())
+        # One update per agent, then one marking the set done
+        self.assertEqual(stored.version, 4)
+
+    def test_out_of_order_reviews_keep_agent_order(self):
+        stored, _ = self.run_review(FakeEngine(reverse=True))
+        # Nothing can be saved until the first agent finishes, then all of them are saved at once
+        self.assertEqual(stored.version, 2)
+
+    def run_review(self, engine):
+        llm = LLM.create(self.db, type="Groq", model_name="llama3-8b-8192", seed=42)
+        dataset = Dataset.create(self.db, "dataset", "gene,score\nABC1,0.5\n", "experiment")
+        run = AnalysisRun.create(self.db, "analysis_plan_1", [], dataset.object_id, 1, "context", "description", "run")
+        hypothesis = Hypothesis.create(self.db, "ABC1 drives the response", dataset.data, "context", "agent_0",
+                                       dataset.object_id, "", run.object_id, name="h1")
+        run.hypothesis_ids.append(hypothesis.object_id)
+        run.update()
+
+        prompts = ["review {hypotheses_text}", "review fail", "review {n} hypotheses"]
+        agent_ids = [Agent.create(self.db, llm.object_id, "context", prompt, name=f"r{i}").object_id
+                     for i, prompt in enumerate(prompts)]
+        review_plan = ReviewPlan.create(self.db, "plan", agent_ids, run.object_id)
+        review_set = review_plan.generate_review_set()
+
+        ReviewRunner(self.db, review_set.object_id).run_parallel(engine=engine)
+
+        self.assertEqual(len(engine.batches), 1)
+        self.assertIn("ABC1 drives the response", engine.batches[0][0][2])
+        stored = ReviewSet.load(self.db, review_set.object_id)
+        self.assertEqual(stored.status, "done")
+        self.assertEqual(stored.attempts, {agent_ids[0]: ["success"], agent_ids[1]: ["failed"],
+                                           agent_ids[2]: ["success"]})
+        reviews = Review.load_many(self.db, stored.review_ids)
+        self.assertEqual([review.agent_id for review in reviews], [agent_ids[0], agent_ids[2]])
+        self.assertEqual(reviews[0].summary_review, "Good.")
+        return stored, agent_ids
+
+if __name__ == '__main__':
+    unittest.main()
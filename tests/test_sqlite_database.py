@@ -0,0 +1,286 @@
+import unittest
+import json
+import sys
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.sqlite_database import SqliteDatabase, StaleObjectError, is_blob_ref
+from models.hypothesis import Hypothesis
+from helpers.lazy_blob import stored_value
+
+class TestSqliteDatabase(unittest.TestCase):
+    def setUp(self):
+        # Each test gets its own database file so tests do not share state
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = SqliteDatabase(os.path.join(self.tmp_dir, "test.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_add_load_update_remove(self):
+        object_id, _, _ = self.db.add(None, {"name": "first", "count": 1}, "thing")
+
+        properties, object_type = self.db.load(object_id)
+        self.assertEqual(object_type, "thing")
+        self.assertEqual(properties["name"], "first")
+
+        self.db.update(object_id, {"count": 2})
+        properties, _ = self.db.load(object_id)
+        self.assertEqual(properties["count"], 2)
+        self.assertEqual(properties["name"], "first")
+
+        self.db.remove(object_id)
+        self.assertEqual(self.db.load(object_id), (None, None))
+
+    def test_connections_are_reused_with_wal(self):
+        with self.db._get_connection() as conn:
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        with self.db._get_connection() as conn_again:
+            pass
+        self.assertEqual(journal_mode.lower(), "wal")
+        self.assertIs(conn, conn_again)
+
+    def test_failed_transaction_is_rolled_back(self):
+        with self.assertRaises(RuntimeError):
+            with self.db._get_connection() as conn:
+                self.db._create_node_sql(conn, "node_1", "{}", "thing")
+                raise RuntimeError("boom")
+        self.assertEqual(self.db.load("node_1"), (None, None))
+
+    def test_find_uses_indexed_property_columns(self):
+        run_id = "analysis_run_1"
+        for i in range(3):
+            self.db.add(None, {"name": f"h{i}", "analysis_run_id": run_id}, "hypothesis")
+        self.db.add(None, {"name": "other", "analysis_run_id": "analysis_run_2"}, "hypothesis")
+
+        found = self.db.find("hypothesis", {"analysis_run_id": run_id})
+        self.assertEqual(sorted(obj["properties"]["name"] for obj in found), ["h0", "h1", "h2"])
+
+        query = "EXPLAIN QUERY PLAN SELECT object_id FROM nodes WHERE object_type = ? AND prop_analysis_run_id = ?"
+        with self.db._get_connection() as conn:
+            plan = " ".join(row[-1] for row in conn.execute(query, ("hypothesis", run_id)))
+        self.assertIn("idx_nodes_prop_analysis_run_id", plan)
+
+    def test_migrates_existing_database(self):
+        uri = os.path.join(self.tmp_dir, "legacy.db")
+        conn = sqlite3.connect(uri)
+        conn.execute("CREATE TABLE nodes (object_id TEXT PRIMARY KEY, properties TEXT, object_type TEXT)")
+        conn.execute("INSERT INTO nodes VALUES ('agent_1', '{\"name\": \"legacy\"}', 'agent')")
+        conn.execute("INSERT INTO nodes VALUES ('agent_2', 'not json', 'agent')")
+        conn.commit()
+        conn.close()
+
+        db = SqliteDatabase(uri)
+        self.assertIn("name", db.property_columns)
+        found = db.find("agent", {"name": "legacy"})
+        self.assertEqual([obj["object_id"] for obj in found], ["agent_1"])
+        db.close()
+
+    def test_bulk_add_load_update(self):
+        added = self.db.add_many([{"name": "a"}, {"name": "b"}, {"name": "c"}], "thing")
+        object_ids = [object_id for object_id, _, _ in added]
+        self.assertEqual([properties["name"] for _, properties, _ in added], ["a", "b", "c"])
+
+        loaded = self.db.load_many(object_ids[::-1] + ["missing"])
+        self.assertEqual([properties["name"] for properties, _ in loaded[:3]], ["c", "b", "a"])
+        self.assertEqual(loaded[3], (None, None))
+        self.assertEqual(loaded[0][0]["object_id"], object_ids[2])
+
+        self.db.update_many({object_ids[0]: {"status": "done"}, object_ids[1]: {"name": "bb"}})
+        first, second, third = self.db.load_many(object_ids)
+        self.assertEqual((first[0]["name"], first[0]["status"]), ("a", "done"))
+        self.assertEqual(second[0]["name"], "bb")
+        self.assertNotIn("status", third[0])
+
+        with self.assertRaises(ValueError):
+            self.db.update_many({object_ids[0]: {"status": "failed"}, "missing": {"status": "failed"}})
+        self.assertEqual(self.db.load(object_ids[0])[0]["status"], "done")
+
+    def test_name_is_unique(self):
+        agent_id, _, _ = self.db.add(None, {"name": "Reviewer"}, "agent")
+        self.assertFalse(self.db.name_is_unique("Reviewer"))
+        self.assertFalse(self.db.name_is_unique("Reviewer", object_type="agent"))
+        self.assertTrue(self.db.name_is_unique("Reviewer", object_type="llm"))
+        self.assertTrue(self.db.name_is_unique("Reviewer", exclude_object_id=agent_id))
+
+        self.db.update(agent_id, {"name": "Analyst"})
+        self.assertTrue(self.db.name_is_unique("Reviewer"))
+        self.assertEqual(self.db.find_ids_by_name("Analyst"), [agent_id])
+
+        self.db.remove(agent_id)
+        self.assertTrue(self.db.name_is_unique("Analyst"))
+
+        query = "EXPLAIN QUERY PLAN SELECT object_id FROM nodes WHERE prop_name = ?"
+        with self.db._get_connection() as conn:
+            plan = " ".join(row[-1] for row in conn.execute(query, ("Analyst",)))
+        self.assertIn("idx_nodes_name", plan)
+
+    def test_partial_update_with_versions(self):
+        object_id, _, _ = self.db.add(None, {"name": "big", "data": "x" * 1000, "nested": {"a": 1}}, "dataset")
+        self.assertEqual(self.db.get_version(object_id), 0)
+
+        version = self.db.update(object_id, {"status": "done", "nested": {"b": 2}, "note": None})
+        self.assertEqual(version, 1)
+        properties, _ = self.db.load(object_id)
+        self.assertEqual(properties["data"], "x" * 1000)
+        self.assertEqual(properties["status"], "done")
+        self.assertEqual(properties["nested"], {"b": 2})
+        self.assertIsNone(properties["note"])
+
+        self.assertEqual(self.db.update(object_id, {"status": "again"}, expected_version=1), 2)
+        with self.assertRaises(StaleObjectError):
+            self.db.update(object_id, {"status": "stale"}, expected_version=1)
+        self.assertEqual(self.db.load(object_id)[0]["status"], "again")
+
+        with self.assertRaises(ValueError):
+            self.db.update("missing", {"status": "done"})
+
+    def test_partial_update_with_many_properties(self):
+        object_id, _, _ = self.db.add(None, {"name": "wide"}, "thing")
+        self.db.update(object_id, {f"key_{i}": i for i in range(200)})
+        properties, _ = self.db.load(object_id)
+        self.assertEqual(properties["key_199"], 199)
+        self.assertEqual(properties["name"], "wide")
+
+    def test_large_properties_are_stored_once_as_blobs(self):
+        data = "gene,score\n" + "ABC1,0.5\n" * 500
+        first_id, _, _ = self.db.add(None, {"name": "h1", "data": data, "full_prompt": "short"}, "hypothesis")
+        second_id, _, _ = self.db.add(None, {"name": "h2", "data": data}, "hypothesis")
+
+        with self.db._get_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0], 1)
+
+        properties, _ = self.db.load(first_id)
+        self.assertEqual(properties["data"], data)
+        self.assertEqual(properties["full_prompt"], "short")
+
+        found = self.db.find("hypothesis", {"name": "h2"})
+        self.assertEqual(found[0]["properties"]["data"], data)
+        found = self.db.find("hypothesis", {"name": "h2"}, resolve_blobs=False)
+        self.assertTrue(is_blob_ref(found[0]["properties"]["data"]))
+
+        self.db.update(second_id, {"data": data + "XYZ9,1.0\n"})
+        self.assertEqual(self.db.load(second_id)[0]["data"], data + "XYZ9,1.0\n")
+        self.assertEqual(self.db.load(first_id)[0]["data"], data)
+
+        hypothesis = Hypothesis.load(self.db, first_id)
+        self.assertTrue(is_blob_ref(hypothesis.__dict__["_data"]))
+        self.assertEqual(hypothesis.data, data)
+        # Copies keep the reference after the content has been read
+        self.assertTrue(is_blob_ref(stored_value(hypothesis, "data")))
+
+        # The blob of the replaced data is still used by first_id; nothing else is
+        self.assertEqual(self.db.collect_blobs(), 0)
+        self.db.remove(first_id)
+        self.assertEqual(self.db.collect_blobs(), 1)
+        self.assertEqual(self.db.load(second_id)[0]["data"], data + "XYZ9,1.0\n")
+
+    def test_externalize_existing_blobs(self):
+        data = "x" * 5000
+        with self.db._get_connection() as conn:
+            self.db._create_node_sql(conn, "dataset_1", json.dumps({"name": "inline", "data": data}), "dataset")
+
+        self.assertEqual(self.db.externalize_blobs(), 1)
+        with self.db._get_connection() as conn:
+            stored = json.loads(self.db._get_node_sql(conn, "dataset_1")[0])
+        self.assertTrue(is_blob_ref(stored["data"]))
+        self.assertEqual(self.db.load("dataset_1")[0]["data"], data)
+        self.assertEqual(self.db.externalize_blobs(), 0)
+
+    def test_find_with_projection(self):
+        self.db.add(None, {"name": "h1", "agent_id": "agent_1", "ranking": {"stars": 3}, "full_prompt": "p" * 2000}, "hypothesis")
+        found = self.db.find("hypothesis", {"agent_id": "agent_1"}, fields=["name", "ranking", "missing"])
+        self.assertEqual(len(found), 1)
+        self.assertEqual(found[0]["properties"], {"name": "h1", "ranking": {"stars": 3}, "missing": None})
+
+        found = self.db.find("hypothesis", fields=["full_prompt"], resolve_blobs=True)
+        self.assertEqual(found[0]["properties"]["full_prompt"], "p" * 2000)
+
+    def test_find_sorted_and_paginated(self):
+        # created sorts by time, not by its %m.%d.%Y string
+        created = ["12.31.2023 10:00:00", "01.02.2024 09:00:00", "01.02.2024 09:00:00", "03.15.2024 08:30:00"]
+        added = self.db.add_many([{"name": f"h{i}", "status": "done" if i % 2 else "new"} for i in range(4)], "hypothesis")
+        self.db.update_many({object_id: {"created": timestamp} for (object_id, _, _), timestamp in zip(added, created)})
+
+        found = self.db.find("hypothesis", order_by="created", descending=True, fields=["name"])
+        self.assertEqual([obj["properties"]["name"] for obj in found][0], "h3")
+        self.assertEqual([obj["properties"]["name"] for obj in found][-1], "h0")
+
+        first_page = self.db.find("hypothesis", order_by="created", descending=True, limit=2)
+        second_page = self.db.find("hypothesis", order_by="created", descending=True, limit=2,
+                                   after=first_page[-1]["object_id"])
+        self.assertEqual([obj["object_id"] for obj in first_page + second_page], [obj["object_id"] for obj in found])
+        offset_page = self.db.find("hypothesis", order_by="created", descending=True, limit=2, offset=2)
+        self.assertEqual(offset_page, second_page)
+
+        for key in ["name') , (SELECT 1/0) --", "name') || (SELECT group_concat(name) FROM sqlite_master) || ('"]:
+            with self.assertRaises(ValueError):
+                self.db.find("hypothesis", order_by=key)
+            with self.assertRaises(ValueError):
+                self.db.count("hypothesis", {key: "x"})
+
+        self.assertEqual(self.db.count("hypothesis"), 4)
+        self.assertEqual(self.db.count("hypothesis", {"status": "done"}), 2)
+
+        query = "EXPLAIN QUERY PLAN SELECT object_id FROM nodes WHERE object_type = ? ORDER BY created_at DESC, rowid DESC LIMIT 2"
+        with self.db._get_connection() as conn:
+            plan = " ".join(row[-1] for row in conn.execute(query, ("hypothesis",)))
+        self.assertIn("idx_nodes_created_at", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_keyset_pages_cover_nulls_and_ties(self):
+        # One add_many gives every object the same created timestamp, and some have no rank
+        added = self.db.add_many([{"name": f"t{i}", "rank": None if i % 3 == 0 else i % 2} for i in range(10)], "thing")
+        inserted = [object_id for object_id, _, _ in added]
+        for order_by in ["created", "rank"]:
+            for descending in [False, True]:
+                expected = [obj["object_id"] for obj in self.db.find("thing", order_by=order_by, descending=descending)]
+                pages = []
+                after = None
+                while True:
+                    page = self.db.find("thing", order_by=order_by, descending=descending, limit=3, after=after)
+                    pages.extend(obj["object_id"] for obj in page)
+                    if len(page) < 3:
+                        break
+                    after = page[-1]["object_id"]
+                self.assertEqual(pages, expected)
+                self.assertEqual(sorted(pages), sorted(inserted))
+        # Ties are in insertion order, not random object_id order
+        by_created = [obj["object_id"] for obj in self.db.find("thing", order_by="created")]
+        self.assertEqual(by_created, inserted)
+
+        with self.assertRaises(ValueError):
+            self.db.find("thing", order_by="created", limit=3, after="thing_deleted")
+
+    def test_load_names(self):
+        agent_id, _, _ = self.db.add(None, {"name": "Analyst", "prompt": "p" * 2000}, "agent")
+        unnamed_id, _, _ = self.db.add(None, {"description": "no name"}, "llm")
+        names = self.db.load_names([agent_id, unnamed_id, agent_id, "missing"])
+        self.assertEqual(names, {agent_id: ("Analyst", "agent"), unnamed_id: (None, "llm")})
+        self.assertEqual(self.db.load_names([]), {})
+
+    def test_concurrent_writers(self):
+        errors = []
+
+        def writer(index):
+            try:
+                for i in range(20):
+                    self.db.add(None, {"name": f"w{index}-{i}"}, "thing")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.db.find("thing")), 80)
+
+if __name__ == '__main__':
+    unittest.main()